@@ -0,0 +1,147 @@
+import queue
+import threading
+import time
+from typing import BinaryIO, Iterable
+
+from SwissKnife.avro.AvroWriter import AvroWriter
+
+# Sent to the writer thread when the writer is closed
+_END = object()
+
+
+class AsyncWriterMetrics(object):
+    """
+    Metrics of an AsyncAvroWriter, to size its queue:
+        - records: The number of records sent to the queue.
+        - max_queue_depth: The maximum number of records that have been waiting in the queue.
+        - stalls: The number of writes that have waited because the queue was full.
+        - stall_time: The time (in seconds) that the writes have waited.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.max_queue_depth = 0
+        self.stalls = 0
+        self.stall_time = 0.0
+
+    def to_dict(self) -> dict:
+        """Returns the metrics as a dict.
+        :return: A dict that maps a metric name with its value.
+        :rtype: dict
+        """
+        return dict(self.__dict__)
+
+
+class AsyncAvroWriter(object):
+    """
+    An AvroWriter that serializes and writes the records in a background thread, so a slow output stream
+    (e.g. GCloudStreaming) doesn't stop the producer. The records are sent to the thread by a bounded queue:
+    write only blocks when the queue is full. An error of the writer thread is raised by the next call
+    to write or close.
+    """
+
+    def __init__(self,
+                 output_stream: BinaryIO,
+                 avro_schema: dict,
+                 max_queue_size: int = 10000,
+                 writer_options: dict = None):
+        """AsyncAvroWriter constructor
+
+        :param output_stream: The file-like object where data will be writed.
+        :type output_stream: file
+        :param avro_schema: A valid avro schema as a dict.
+        :type avro_schema: dict
+        :param max_queue_size: The maximum number of records waiting to be written, defaults to 10000
+        :type max_queue_size: int, optional
+        :param writer_options: Other arguments of the AvroWriter (codec, block_bytes...), defaults to None
+        :type writer_options: dict, optional
+        """
+        if max_queue_size < 1:
+            raise ValueError(f"The maximum size of the queue must be positive: {max_queue_size}")
+        self.avro_writer = AvroWriter(output_stream, avro_schema, **(writer_options or {}))
+        self.metrics = AsyncWriterMetrics()
+        self._queue = queue.Queue(max_queue_size)
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._write_records, name="AsyncAvroWriter", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    def queue_depth(self) -> int:
+        """The number of records waiting to be written."""
+        return self._queue.qsize()
+
+    def write(self, row: dict):
+        """Sends a row to the writer thread. It blocks if the queue is full.
+
+        :param row: A row of data that matchs with the current schema.
+        :type row: dict
+        :raises AvroMatchingException: When a previous row doesn't match with the current schema.
+        :raises ValueError: If the writer is closed.
+        """
+        self._check_state()
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            start = time.perf_counter()
+            self._queue.put(row)
+            self.metrics.stalls += 1
+            self.metrics.stall_time += time.perf_counter() - start
+        self.metrics.records += 1
+        queue_depth = self._queue.qsize()
+        if queue_depth > self.metrics.max_queue_depth:
+            self.metrics.max_queue_depth = queue_depth
+
+    def write_many(self, rows: Iterable[dict]) -> int:
+        """Sends several rows to the writer thread.
+
+        :param rows: The rows. They must match with the current schema.
+        :type rows: Iterable[dict]
+        :return: The number of rows.
+        :rtype: int
+        """
+        num_rows = 0
+        for row in rows:
+            self.write(row)
+            num_rows += 1
+        return num_rows
+
+    def close(self):
+        """Waits until all the rows are written and closes the AvroWriter.
+
+        :raises AvroMatchingException: When a row doesn't match with the current schema.
+        """
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_END)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def _check_state(self):
+        if self._error is not None:
+            raise self._error
+        if self._closed:
+            raise ValueError("The writer is closed")
+
+    def _write_records(self):
+        """The loop of the writer thread.
+        """
+        try:
+            self.avro_writer.write_many(iter(self._queue.get, _END))
+        except Exception as ex:
+            self._error = ex
+            # The queue is emptied, so the producer is not blocked
+            while self._queue.get() is not _END:
+                pass
+        try:
+            self.avro_writer.close()
+        except Exception as ex:
+            if self._error is None:
+                self._error = ex
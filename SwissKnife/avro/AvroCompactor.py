@@ -0,0 +1,251 @@
+import io
+import os
+from typing import Callable, Iterable, List, NamedTuple
+
+import fastavro
+
+from SwissKnife.avro.AvroContainer import SYNC_SIZE, PrefixedStream, read_exactly, read_header, read_long
+from SwissKnife.avro.AvroWriter import AvroWriter, get_codec
+from SwissKnife.avro.SchemaUtils import get_fingerprint
+from SwissKnife.avro.StreamUtils import open_input_stream
+
+
+class CompactedFile(NamedTuple):
+    """
+    An output file of the compaction:
+        - part: The number of the file (starting at 0).
+        - path: The local path of the file.
+        - records: The number of records.
+        - bytes: The size of the file.
+        - sources: The number of input files with records in this file.
+    """
+    part: int
+    path: str
+    records: int
+    bytes: int
+    sources: int
+
+
+class CompactionMetrics(object):
+    """
+    Metrics of an AvroCompactor:
+        - files: The number of input files.
+        - copied_files: The input files whose blocks were copied without decoding them.
+        - decoded_files: The input files that were decoded because their schema or codec is different.
+        - copied_blocks: The number of copied blocks.
+        - records: The number of records.
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.copied_files = 0
+        self.decoded_files = 0
+        self.copied_blocks = 0
+        self.records = 0
+
+    def to_dict(self) -> dict:
+        """Returns the metrics as a dict.
+        :return: A dict that maps a metric name with its value.
+        :rtype: dict
+        """
+        return dict(self.__dict__)
+
+
+def _get_source_name(source) -> str:
+    return getattr(source, "name", None) or str(source)
+
+
+class AvroCompactor(object):
+    """
+    Merges many small avro files into files of a target size. The data blocks of the files with the same
+    schema and codec as the output are copied as they are (only the header and the sync markers are
+    rewritten), and the other files are decoded with the output schema and encoded again.
+    The inputs can be local paths, file-like objects or Google Storage blobs (see compact_prefix), and
+    the outputs are local files. Each finished file is sent to a callback, for example to upload it
+    with GCloudStorage.save_file.
+    """
+
+    DEFAULT_FILE_NAME_TEMPLATE = "part-{part:05d}.avro"
+
+    def __init__(self,
+                 output_dir: str,
+                 target_bytes: int = 256 * 1024 * 1024,
+                 avro_schema: dict = None,
+                 codec: str = None,
+                 file_name_template: str = DEFAULT_FILE_NAME_TEMPLATE,
+                 file_callback: Callable[[CompactedFile], None] = None,
+                 writer_options: dict = None):
+        """AvroCompactor constructor
+
+        :param output_dir: The local directory of the output files.
+        :type output_dir: str
+        :param target_bytes: The size of the output files. A file is finished when it reaches this size,
+        so it can be a block bigger. Defaults to 256 MB
+        :type target_bytes: int, optional
+        :param avro_schema: The schema of the output files, defaults to None (the schema of the first input)
+        :type avro_schema: dict, optional
+        :param codec: The codec of the output files, defaults to None (the codec of the first input)
+        :type codec: str, optional
+        :param file_name_template: The template of the file names, relative to the output directory.
+        It receives the "part" number. Defaults to "part-{part:05d}.avro"
+        :type file_name_template: str, optional
+        :param file_callback: A function that receives a CompactedFile each time a file is finished,
+        defaults to None
+        :type file_callback: Callable[[CompactedFile], None], optional
+        :param writer_options: Other arguments of the AvroWriter of the output files (compression_level,
+        block_bytes...). The parallel compression is not supported. Defaults to None
+        :type writer_options: dict, optional
+        """
+        if target_bytes < 1:
+            raise ValueError(f"The target size must be positive: {target_bytes}")
+        self.output_dir = output_dir
+        self.target_bytes = target_bytes
+        self.avro_schema = avro_schema
+        self.codec = None if codec is None else get_codec(codec).value
+        self.file_name_template = file_name_template
+        self.file_callback = file_callback
+        self.writer_options = writer_options or {}
+        self.metrics = CompactionMetrics()
+        self._fingerprint = None if avro_schema is None else get_fingerprint(avro_schema)
+        self._compacted_files = []
+        self._num_files = 0
+        self._avro_writer = None
+        self._output_file = None
+        self._output_path = None
+        self._file_sources = 0
+
+    def compact(self, sources: Iterable) -> List[CompactedFile]:
+        """Compacts some avro files. The records are written in the order of the sources.
+
+        :param sources: The input files: local paths, file-like objects or Google Storage blobs.
+        :type sources: Iterable
+        :raises ValueError: If an input is not an avro file or a block is corrupted.
+        :return: The output files.
+        :rtype: List[CompactedFile]
+        """
+        self._compacted_files = []
+        try:
+            for source in sources:
+                self._compact_source(source)
+        except Exception:
+            # The unfinished file is closed, but it is not sent to the callback
+            if self._output_file is not None:
+                self._output_file.close()
+            self._avro_writer = self._output_file = None
+            raise
+        self._finish_file()
+        return self._compacted_files
+
+    def compact_prefix(self, storage, storage_path: str, with_prefix: bool = True,
+                       suffix: str = ".avro") -> List[CompactedFile]:
+        """Compacts the avro files of a Google Storage path (see GCloudStorage.list_blobs).
+
+        :param storage: The GCloudStorage of the bucket.
+        :type storage: GCloudStorage
+        :param storage_path: The path of the files.
+        :type storage_path: str
+        :param with_prefix: If the bucket prefix path is added to the path, defaults to True
+        :type with_prefix: bool, optional
+        :param suffix: Only the blobs whose name ends with this suffix are compacted, defaults to ".avro"
+        :type suffix: str, optional
+        :return: The output files.
+        :rtype: List[CompactedFile]
+        """
+        blobs = storage.list_blobs(storage_path, with_prefix=with_prefix)
+        return self.compact(blob for blob in blobs if blob.name.endswith(suffix))
+
+    def _compact_source(self, source):
+        """Writes the records of an input file to the output files.
+        """
+        input_stream, close_input = open_input_stream(source)
+        try:
+            header = read_header(input_stream)
+            if self.avro_schema is None:
+                self.avro_schema = header.schema
+                self._fingerprint = get_fingerprint(self.avro_schema)
+            if self.codec is None:
+                self.codec = header.codec
+            self.metrics.files += 1
+
+            if header.codec == self.codec and get_fingerprint(header.schema) == self._fingerprint:
+                self.metrics.copied_files += 1
+                self._copy_blocks(input_stream, header.sync_marker, _get_source_name(source))
+            else:
+                self.metrics.decoded_files += 1
+                # fastavro makes many small reads, so the prefixed stream is buffered
+                avro_stream = io.BufferedReader(PrefixedStream(header.raw, input_stream))
+                records = fastavro.reader(avro_stream, reader_schema=self.avro_schema)
+                self._copy_records(records)
+        finally:
+            if close_input:
+                input_stream.close()
+
+    def _copy_blocks(self, input_stream, sync_marker: bytes, source_name: str):
+        """Copies the blocks of an input file, without decoding them.
+        """
+        first_block = True
+        while True:
+            try:
+                num_records = read_long(input_stream)
+            except EOFError:
+                return
+            data = read_exactly(input_stream, read_long(input_stream))
+            if read_exactly(input_stream, SYNC_SIZE) != sync_marker:
+                raise ValueError(f"Invalid sync marker in {source_name}: the file is corrupted")
+            if num_records == 0:
+                continue
+            avro_writer = self._get_writer(first_block)
+            first_block = False
+            avro_writer.write_compressed_block(num_records, data)
+            self.metrics.copied_blocks += 1
+            self.metrics.records += num_records
+            self._finish_file_if_full()
+
+    def _copy_records(self, records: Iterable[dict]):
+        """Writes the decoded records of an input file.
+        """
+        first_record = True
+        for record in records:
+            avro_writer = self._get_writer(first_record)
+            first_record = False
+            avro_writer.write(record)
+            self.metrics.records += 1
+            self._finish_file_if_full()
+
+    def _get_writer(self, new_source: bool) -> AvroWriter:
+        """Gets the writer of the current output file, opening a new file if needed.
+        """
+        if self._avro_writer is None:
+            self._output_path = os.path.join(self.output_dir, self.file_name_template.format(part=self._num_files))
+            os.makedirs(os.path.dirname(self._output_path) or ".", exist_ok=True)
+            self._output_file = open(self._output_path, "wb")
+            self._avro_writer = AvroWriter(self._output_file, self.avro_schema, codec=self.codec,
+                                           **self.writer_options)
+            self._file_sources = 0
+            new_source = True
+        if new_source:
+            self._file_sources += 1
+        return self._avro_writer
+
+    def _finish_file_if_full(self):
+        if self._avro_writer.counters.bytes >= self.target_bytes:
+            self._finish_file()
+
+    def _finish_file(self):
+        """Closes the current output file and sends it to the callback.
+        """
+        if self._avro_writer is None:
+            return
+        avro_writer = self._avro_writer
+        self._avro_writer = None
+        try:
+            avro_writer.close()
+        finally:
+            self._output_file.close()
+            self._output_file = None
+        compacted_file = CompactedFile(self._num_files, self._output_path, avro_writer.counters.records,
+                                       avro_writer.counters.bytes, self._file_sources)
+        self._num_files += 1
+        self._compacted_files.append(compacted_file)
+        if self.file_callback is not None:
+            self.file_callback(compacted_file)
@@ -0,0 +1,178 @@
+import io
+import json
+from typing import BinaryIO, Dict, NamedTuple
+
+# Constants of the avro object container file format
+MAGIC = b"Obj\x01"
+SYNC_SIZE = 16
+SCHEMA_KEY = "avro.schema"
+CODEC_KEY = "avro.codec"
+
+
+class AvroHeader(NamedTuple):
+    """
+    The header of an avro object container file:
+        - metadata: The metadata map (keys are str, values are bytes).
+        - sync_marker: The 16 bytes that follow each block.
+        - raw: The bytes of the entire header, as they are in the file.
+    """
+    metadata: Dict[str, bytes]
+    sync_marker: bytes
+    raw: bytes
+
+    @property
+    def schema(self) -> dict:
+        """The writer schema of the file."""
+        return json.loads(self.metadata[SCHEMA_KEY].decode("utf-8"))
+
+    @property
+    def codec(self) -> str:
+        """The codec of the file ("null" if it is not defined)."""
+        return self.metadata.get(CODEC_KEY, b"null").decode("utf-8")
+
+
+class _RecordingStream(object):
+    """
+    A wrapper of a binary stream that keeps a copy of the read bytes.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.data = bytearray()
+
+    def read(self, size: int) -> bytes:
+        data = read_exactly(self.stream, size)
+        self.data += data
+        return data
+
+
+def read_exactly(stream: BinaryIO, size: int) -> bytes:
+    """Reads a number of bytes from a stream.
+
+    :param stream: A binary stream.
+    :type stream: BinaryIO
+    :param size: The number of bytes.
+    :type size: int
+    :raises EOFError: If the stream ends before.
+    :return: The bytes.
+    :rtype: bytes
+    """
+    data = stream.read(size)
+    while len(data) < size:
+        more_data = stream.read(size - len(data))
+        if not more_data:
+            raise EOFError(f"Expected {size} bytes, but the stream ended after {len(data)} bytes")
+        data += more_data
+    return data
+
+
+def read_long(stream: BinaryIO) -> int:
+    """Reads an avro long (zigzag encoded varint) from a stream.
+
+    :param stream: A binary stream.
+    :type stream: BinaryIO
+    :raises EOFError: If the stream ends.
+    :return: The number.
+    :rtype: int
+    """
+    shift = 0
+    result = 0
+    while True:
+        byte = read_exactly(stream, 1)[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return (result >> 1) ^ -(result & 1)
+        shift += 7
+
+
+def encode_long(number: int) -> bytes:
+    """Encodes a number as an avro long (zigzag encoded varint).
+
+    :param number: The number.
+    :type number: int
+    :return: The encoded number.
+    :rtype: bytes
+    """
+    number = (number << 1) ^ (number >> 63)
+    encoded = bytearray()
+    while number & ~0x7F:
+        encoded.append((number & 0x7F) | 0x80)
+        number >>= 7
+    encoded.append(number)
+    return bytes(encoded)
+
+
+def read_header(stream: BinaryIO) -> AvroHeader:
+    """Reads the header of an avro object container file. The stream is left at the start of the first block.
+
+    :param stream: A binary stream at the start of the file.
+    :type stream: BinaryIO
+    :raises ValueError: If the stream is not an avro file.
+    :return: The header.
+    :rtype: AvroHeader
+    """
+    recording_stream = _RecordingStream(stream)
+    if recording_stream.read(len(MAGIC)) != MAGIC:
+        raise ValueError("The stream is not an avro object container file")
+
+    metadata = {}
+    while True:
+        count = read_long(recording_stream)
+        if count == 0:
+            break
+        elif count < 0:
+            # A negative count is followed by the size of the block in bytes
+            count = -count
+            read_long(recording_stream)
+        for _ in range(count):
+            key = recording_stream.read(read_long(recording_stream)).decode("utf-8")
+            metadata[key] = recording_stream.read(read_long(recording_stream))
+
+    sync_marker = recording_stream.read(SYNC_SIZE)
+    return AvroHeader(metadata, sync_marker, bytes(recording_stream.data))
+
+
+def encode_header(metadata: Dict[str, bytes], sync_marker: bytes) -> bytes:
+    """Encodes the header of an avro object container file.
+
+    :param metadata: The metadata map. It must contain the schema ("avro.schema").
+    :type metadata: Dict[str, bytes]
+    :param sync_marker: The sync marker (16 bytes).
+    :type sync_marker: bytes
+    :return: The encoded header.
+    :rtype: bytes
+    """
+    encoded = bytearray(MAGIC)
+    if metadata:
+        encoded += encode_long(len(metadata))
+        for key, value in metadata.items():
+            key = key.encode("utf-8")
+            encoded += encode_long(len(key)) + key + encode_long(len(value)) + value
+    encoded += encode_long(0)
+    encoded += sync_marker
+    return bytes(encoded)
+
+
+class PrefixedStream(io.RawIOBase):
+    """
+    A read-only stream that returns some bytes (for example, an already read header)
+    before the data of another stream.
+    """
+
+    def __init__(self, prefix: bytes, stream: BinaryIO):
+        super().__init__()
+        self.prefix = memoryview(prefix)
+        self.stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if len(self.prefix) > 0:
+            size = min(len(buffer), len(self.prefix))
+            buffer[:size] = self.prefix[:size]
+            self.prefix = self.prefix[size:]
+            return size
+        data = self.stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
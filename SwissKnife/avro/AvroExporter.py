@@ -0,0 +1,174 @@
+import base64
+import csv
+import datetime
+import decimal
+import io
+import json
+import uuid
+from enum import Enum
+from itertools import islice
+from typing import List
+
+import fastavro
+
+from SwissKnife.avro.AvroContainer import PrefixedStream, read_header
+from SwissKnife.avro.SchemaUtils import project_schema
+from SwissKnife.avro.StreamUtils import open_input_stream, open_output_stream
+from SwissKnife.avro.types import Variables
+
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    JSONL = "jsonl"
+
+
+class AvroExporter(object):
+    """
+    Exports avro files to CSV or JSON Lines in a streaming way: the file is decoded block by block and
+    the rows are written in chunks, so the used memory doesn't depend on the file size.
+    With a list of fields, the file is decoded with a projected reader schema, so the other fields are
+    skipped and never materialized.
+    """
+
+    def __init__(self,
+                 fields: List[str] = None,
+                 export_format: ExportFormat = ExportFormat.CSV,
+                 chunk_size: int = 10000,
+                 delimiter: str = ",",
+                 encoding: str = "utf-8",
+                 header: bool = True):
+        """AvroExporter constructor
+
+        :param fields: The exported fields, in order. All the fields are exported by default.
+        :type fields: List[str], optional
+        :param export_format: The output format, defaults to ExportFormat.CSV
+        :type export_format: ExportFormat, optional
+        :param chunk_size: The number of rows written at once, defaults to 10000
+        :type chunk_size: int, optional
+        :param delimiter: The CSV delimiter, defaults to ","
+        :type delimiter: str, optional
+        :param encoding: The encoding of the output, defaults to "utf-8"
+        :type encoding: str, optional
+        :param header: If a CSV header is written, defaults to True
+        :type header: bool, optional
+        """
+        self.fields = fields
+        self.export_format = ExportFormat(export_format)
+        self.chunk_size = chunk_size
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.header = header
+
+    def export(self, source, sink) -> int:
+        """Exports an avro file.
+
+        :param source: The avro file: a local path, a binary file-like object or a Google Storage blob.
+        :param sink: The output: a local path or a file-like object (for example, GCloudStreaming).
+        :raises ValueError: If a field is not in the schema of the file.
+        :return: The number of exported rows.
+        :rtype: int
+        """
+        input_stream, close_input = open_input_stream(source)
+        output_stream, close_output = open_output_stream(sink)
+        try:
+            header = read_header(input_stream)
+            writer_schema = header.schema
+            if self.fields is None:
+                field_names = [field[Variables.NAME] for field in writer_schema[Variables.FIELDS]]
+                reader_schema = None
+            else:
+                field_names = list(self.fields)
+                reader_schema = project_schema(writer_schema, field_names)
+
+            # The header was already read to get the schema, so it is returned again before the blocks
+            avro_stream = io.BufferedReader(PrefixedStream(header.raw, input_stream))
+            records = fastavro.reader(avro_stream, reader_schema=reader_schema)
+
+            write_text = self._get_text_writer(output_stream)
+            if self.export_format == ExportFormat.CSV:
+                num_rows = self._export_csv(records, field_names, write_text)
+            else:
+                num_rows = self._export_jsonl(records, write_text)
+            if hasattr(output_stream, "flush"):
+                output_stream.flush()
+        finally:
+            if close_input:
+                input_stream.close()
+            if close_output:
+                output_stream.close()
+        return num_rows
+
+    def _get_text_writer(self, output_stream):
+        """Gets a function that writes a str to the output stream (encoded if it is a binary stream)."""
+        if isinstance(output_stream, io.TextIOBase):
+            return output_stream.write
+        encoding = self.encoding
+        return lambda text: output_stream.write(text.encode(encoding))
+
+    def _export_csv(self, records, field_names: List[str], write_text) -> int:
+        """Writes the records as CSV rows, chunk by chunk.
+
+        :return: The number of rows.
+        :rtype: int
+        """
+        buffer = io.StringIO()
+        csv_writer = csv.writer(buffer, delimiter=self.delimiter, lineterminator="\n")
+        if self.header:
+            csv_writer.writerow(field_names)
+
+        num_rows = 0
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            csv_writer.writerows([AvroExporter._to_csv_value(record.get(name)) for name in field_names]
+                                 for record in chunk)
+            num_rows += len(chunk)
+            write_text(buffer.getvalue())
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell() > 0:
+            write_text(buffer.getvalue())
+        return num_rows
+
+    def _export_jsonl(self, records, write_text) -> int:
+        """Writes the records as JSON lines, chunk by chunk.
+
+        :return: The number of rows.
+        :rtype: int
+        """
+        num_rows = 0
+        while True:
+            chunk = list(islice(records, self.chunk_size))
+            if not chunk:
+                break
+            write_text("".join(json.dumps(record, default=AvroExporter._to_json_value) + "\n"
+                               for record in chunk))
+            num_rows += len(chunk)
+        return num_rows
+
+    @staticmethod
+    def _to_csv_value(value: object) -> object:
+        """Converts a decoded avro value to a CSV value: None is an empty cell, bytes are base64 strings
+        and nested values (records, arrays and maps) are JSON strings.
+        """
+        if value is None:
+            return ""
+        elif isinstance(value, (dict, list)):
+            return json.dumps(value, default=AvroExporter._to_json_value)
+        elif isinstance(value, (str, int, float)):
+            return value
+        return AvroExporter._to_json_value(value)
+
+    @staticmethod
+    def _to_json_value(value: object) -> object:
+        """Converts the decoded avro values that are not JSON serializable (logical types and bytes).
+        """
+        if isinstance(value, bytes):
+            return base64.b64encode(value).decode("ascii")
+        elif isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+            return value.isoformat()
+        elif isinstance(value, (decimal.Decimal, uuid.UUID)):
+            return str(value)
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -0,0 +1,356 @@
+import io
+import mmap
+import os
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+
+import fastavro
+
+from SwissKnife.avro.AvroContainer import SYNC_SIZE, PrefixedStream, read_header, read_long
+from SwissKnife.avro.AvroTransformer import AvroTransformer
+from SwissKnife.avro.BlockIndex import BlockIndex, BlockIndexEntry
+from SwissKnife.avro.SchemaUtils import project_schema
+from SwissKnife.avro.types import Record
+
+
+class AvroSplit(NamedTuple):
+    """
+    A byte range of an avro file. A split contains the blocks that start in the range, so the splits
+    of a file can be read independently and each block is read by only one split.
+    """
+    path: str
+    start: int
+    end: int
+
+
+class AvroBlock(NamedTuple):
+    """
+    The position of a block in an avro file:
+        - offset: The position of the first byte of the block.
+        - records: The number of records.
+        - size: The size of the block, including the sync marker.
+    """
+    offset: int
+    records: int
+    size: int
+
+
+class _MappedRange(object):
+    """
+    A read-only stream of a range of a memory-mapped file.
+    """
+
+    def __init__(self, mapped_file: mmap.mmap, start: int, end: int):
+        self.mapped_file = mapped_file
+        self.position = start
+        self.end = end
+
+    def read(self, size: int = -1) -> bytes:
+        if size < 0:
+            size = self.end - self.position
+        data = self.mapped_file[self.position:min(self.position + size, self.end)]
+        self.position += len(data)
+        return data
+
+
+def _map_split(split: AvroSplit,
+               fields: List[str],
+               avro_transformer: AvroTransformer,
+               function: Callable[[Iterator[Record]], object]) -> object:
+    """Reads a split in a worker process and applies a function to its records.
+    """
+    with AvroReader(split.path, fields, avro_transformer) as avro_reader:
+        return function(avro_reader.read_split(split))
+
+
+class AvroReader(object):
+    """
+    Reads a local avro file through a memory map. The file can be divided in splits (byte ranges),
+    like the input splits of Hadoop: the blocks of each split are found by scanning for the sync marker,
+    so several processes can decode disjoint splits of the same file in parallel (see map_splits).
+    The records can be projected to some fields (the other fields are not decoded) and transformed
+    by an AvroTransformer.
+    """
+
+    def __init__(self, path: str, fields: List[str] = None, avro_transformer: AvroTransformer = None):
+        """AvroReader constructor
+
+        :param path: The path of the avro file.
+        :type path: str
+        :param fields: The fields of the returned records, defaults to None (all the fields)
+        :type fields: List[str], optional
+        :param avro_transformer: A transformer applied to each record, defaults to None
+        :type avro_transformer: AvroTransformer, optional
+        :raises ValueError: If the file is not an avro file or a field doesn't exist.
+        """
+        self.path = path
+        self.fields = fields
+        self.avro_transformer = avro_transformer
+        self._file = open(path, "rb")
+        try:
+            self._mapped_file = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.header = read_header(self._mapped_file)
+        except Exception:
+            self.close()
+            raise
+        self.data_start = len(self.header.raw)
+        self.size = len(self._mapped_file)
+        self.writer_schema = self.header.schema
+        self.reader_schema = project_schema(self.writer_schema, fields) if fields else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[Record]:
+        return self.read_split(AvroSplit(self.path, self.data_start, self.size))
+
+    def close(self):
+        """Closes the memory map and the file.
+        """
+        if getattr(self, "_mapped_file", None) is not None:
+            self._mapped_file.close()
+            self._mapped_file = None
+        self._file.close()
+
+    def get_splits(self, num_splits: int = None, split_size: int = None) -> List[AvroSplit]:
+        """Divides the blocks of the file in splits of the same size.
+
+        :param num_splits: The number of splits, defaults to the number of CPUs
+        :type num_splits: int, optional
+        :param split_size: The size in bytes of each split, instead of a number of splits. Defaults to None
+        :type split_size: int, optional
+        :return: The splits, in the order of the file. Some of them can be empty if the blocks are big.
+        :rtype: List[AvroSplit]
+        """
+        data_size = self.size - self.data_start
+        if data_size == 0:
+            return []
+        if split_size is None:
+            num_splits = num_splits or os.cpu_count() or 1
+            split_size = -(-data_size // num_splits)
+        split_size = max(split_size, 1)
+        return [AvroSplit(self.path, start, min(start + split_size, self.size))
+                for start in range(self.data_start, self.size, split_size)]
+
+    def iter_blocks(self, split: AvroSplit = None) -> Iterator[AvroBlock]:
+        """Gets the positions of the blocks of a split (or of the entire file). The data of the blocks is skipped.
+
+        :param split: The split, defaults to None (the entire file)
+        :type split: AvroSplit, optional
+        :raises ValueError: If the file is corrupted (a block doesn't end with the sync marker).
+        :return: An iterator of the blocks that start in the split.
+        :rtype: Iterator[AvroBlock]
+        """
+        start, end = (self.data_start, self.size) if split is None else (split.start, split.end)
+        offset = self._find_first_block(start)
+        mapped_file = self._mapped_file
+        sync_marker = self.header.sync_marker
+        while offset < min(end, self.size):
+            # The number of records and the size are two longs (10 bytes at most each one)
+            block_header = io.BytesIO(mapped_file[offset:offset + 20])
+            num_records = read_long(block_header)
+            block_end = offset + read_long(block_header) + block_header.tell() + SYNC_SIZE
+            if mapped_file[block_end - SYNC_SIZE:block_end] != sync_marker:
+                raise ValueError(f"Invalid sync marker at the end of the block in position {offset} of {self.path}")
+            yield AvroBlock(offset, num_records, block_end - offset)
+            offset = block_end
+
+    def _find_first_block(self, start: int) -> int:
+        """Finds the first block that starts at or after a position: the first block of the file,
+        or the one after the first sync marker that ends at or after the position.
+        """
+        if start <= self.data_start:
+            return self.data_start
+        position = self._mapped_file.find(self.header.sync_marker, start - SYNC_SIZE)
+        return self.size if position < 0 else position + SYNC_SIZE
+
+    def read_split(self, split: AvroSplit) -> Iterator[Record]:
+        """Reads the records of the blocks that start in a split.
+
+        :param split: A split of this file (see get_splits).
+        :type split: AvroSplit
+        :raises AvroTransformException: If the transformer can not transform a record.
+        :return: An iterator of the records (projected and transformed).
+        :rtype: Iterator[Record]
+        """
+        blocks = self.iter_blocks(split)
+        first_block = next(blocks, None)
+        if first_block is None:
+            return iter(())
+        last_block = first_block
+        for last_block in blocks:
+            pass
+        return self._transform(self._decode_blocks(first_block.offset, last_block.offset + last_block.size))
+
+    def _decode_blocks(self, start: int, end: int) -> Iterator[Record]:
+        """Decodes the consecutive blocks of a byte range (without the transformer).
+        """
+        # The blocks are decoded by fastavro, as a file with the same header and only the blocks of the range
+        blocks_stream = _MappedRange(self._mapped_file, start, end)
+        return iter(fastavro.reader(io.BufferedReader(PrefixedStream(self.header.raw, blocks_stream)),
+                                    reader_schema=self.reader_schema))
+
+    def _transform(self, records: Iterator[Record]) -> Iterator[Record]:
+        if self.avro_transformer is not None:
+            return map(self.avro_transformer.apply_all_transforms, records)
+        return records
+
+    def _decode_indexed_blocks(self, entries: Iterable[BlockIndexEntry]) -> Iterator[Record]:
+        """Decodes the blocks of some index entries. The consecutive blocks are decoded together.
+        """
+        sync_marker = self.header.sync_marker
+        start = end = None
+        for entry in entries:
+            block_end = entry.offset + entry.size
+            if self._mapped_file[block_end - SYNC_SIZE:block_end] != sync_marker:
+                raise ValueError(f"The block index doesn't match with the file {self.path}: "
+                                 f"there is not a block in position {entry.offset}")
+            if entry.offset != end:
+                if start is not None:
+                    yield from self._decode_blocks(start, end)
+                start = entry.offset
+            end = block_end
+        if start is not None:
+            yield from self._decode_blocks(start, end)
+
+    def read_blocks(self, entries: Iterable[BlockIndexEntry]) -> Iterator[Record]:
+        """Reads the records of some blocks of a block index.
+
+        :param entries: The entries of the blocks (see BlockIndex.filter_blocks).
+        :type entries: Iterable[BlockIndexEntry]
+        :raises ValueError: If the index doesn't match with the file.
+        :return: An iterator of the records (projected and transformed).
+        :rtype: Iterator[Record]
+        """
+        return self._transform(self._decode_indexed_blocks(entries))
+
+    def read_from_record(self, record_number: int, block_index: BlockIndex) -> Iterator[Record]:
+        """Reads the records from a record number to the end of the file. Only the block of the record
+        and the next ones are decoded.
+
+        :param record_number: The number of the first record (starting at 0).
+        :type record_number: int
+        :param block_index: The block index of the file.
+        :type block_index: BlockIndex
+        :raises IndexError: If the record is not in the file.
+        :return: An iterator of the records (projected and transformed).
+        :rtype: Iterator[Record]
+        """
+        position = block_index.find_block(record_number)
+        records = self._decode_indexed_blocks(block_index.entries[position:])
+        # The records of the block before the requested one are skipped
+        for _ in range(record_number - block_index.entries[position].first_record):
+            next(records)
+        return self._transform(records)
+
+    def read_record(self, record_number: int, block_index: BlockIndex) -> Record:
+        """Reads a record by its number. Only its block is decoded.
+
+        :param record_number: The number of the record (starting at 0).
+        :type record_number: int
+        :param block_index: The block index of the file.
+        :type block_index: BlockIndex
+        :raises IndexError: If the record is not in the file.
+        :return: The record (projected and transformed).
+        :rtype: Record
+        """
+        return next(self.read_from_record(record_number, block_index))
+
+    def read_range(self,
+                   block_index: BlockIndex,
+                   field: str,
+                   min_value: object = None,
+                   max_value: object = None) -> Iterator[Record]:
+        """Reads the records with the values of a field in a range. Only the blocks whose statistics
+        overlap with the range are decoded.
+
+        :param block_index: The block index of the file.
+        :type block_index: BlockIndex
+        :param field: A field with statistics in the index. It must be one of the read fields.
+        :type field: str
+        :param min_value: The minimum value (inclusive), defaults to None (no minimum)
+        :type min_value: object, optional
+        :param max_value: The maximum value (inclusive), defaults to None (no maximum)
+        :type max_value: object, optional
+        :raises ValueError: If the field is not indexed or it is not read.
+        :return: An iterator of the records (projected and transformed).
+        :rtype: Iterator[Record]
+        """
+        if self.fields and field not in self.fields:
+            raise ValueError(f"The field '{field}' must be one of the read fields: {self.fields}")
+        records = self._decode_indexed_blocks(block_index.filter_blocks(field, min_value, max_value))
+        return self._transform(record for record in records
+                               if record[field] is not None and
+                               (min_value is None or record[field] >= min_value) and
+                               (max_value is None or record[field] <= max_value))
+
+    def map_splits(self,
+                   function: Callable[[Iterator[Record]], object] = list,
+                   num_splits: int = None,
+                   workers: int = None,
+                   executor: Executor = None) -> Iterator[object]:
+        """Applies a function to the records of each split in a pool of processes. Each process opens
+        the file and decodes only its split.
+
+        :param function: A function that receives an iterator of the records of a split and returns a result.
+        It must be picklable (a module function). Defaults to list (the records are returned).
+        :type function: Callable[[Iterator[Record]], object], optional
+        :param num_splits: The number of splits, defaults to four per worker
+        :type num_splits: int, optional
+        :param workers: The number of processes, defaults to the number of CPUs
+        :type workers: int, optional
+        :param executor: A pool of processes (or threads) that is not shut down, instead of
+        creating one with workers processes. Defaults to None
+        :type executor: Executor, optional
+        :return: An iterator of the results of each split, in the order of the file.
+        :rtype: Iterator[object]
+        """
+        workers = workers or os.cpu_count() or 1
+        splits = self.get_splits(num_splits or 4 * workers)
+        return self._map_splits(function, splits, workers, executor)
+
+    def _map_splits(self,
+                    function: Callable[[Iterator[Record]], object],
+                    splits: List[AvroSplit],
+                    workers: int,
+                    executor: Executor) -> Iterator[object]:
+        """
+        The generator of map_splits.
+        """
+        shutdown_executor = executor is None
+        executor = executor or ProcessPoolExecutor(max_workers=workers)
+        # Only two splits per worker are pending, so the results are not kept in memory
+        max_pending_splits = 2 * workers
+        pending = deque()
+        try:
+            for split in splits:
+                pending.append(executor.submit(_map_split, split, self.fields, self.avro_transformer, function))
+                if len(pending) >= max_pending_splits:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+            if shutdown_executor:
+                executor.shutdown(wait=True)
+
+    def read_parallel(self, num_splits: int = None, workers: int = None,
+                      executor: Executor = None) -> Iterator[Record]:
+        """Reads the records of the file, decoding its splits in a pool of processes.
+
+        :param num_splits: The number of splits, defaults to four per worker
+        :type num_splits: int, optional
+        :param workers: The number of processes, defaults to the number of CPUs
+        :type workers: int, optional
+        :param executor: A pool of processes (or threads) that is not shut down, defaults to None
+        :type executor: Executor, optional
+        :return: An iterator of the records, in the order of the file.
+        :rtype: Iterator[Record]
+        """
+        for records in self.map_splits(list, num_splits, workers, executor):
+            yield from records
@@ -1,5 +1,13 @@
-import re
-from typing import Callable
+import os
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from enum import Enum
+from functools import partial
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, NamedTuple
+from SwissKnife.avro.CastPlan import DEFAULT_MEMO_SIZE, MemoizedCast, get_cast_function, register_named_type
+from SwissKnife.avro.SchemaCache import DEFAULT_SCHEMA_CACHE, SchemaCache
+from SwissKnife.avro.TransformRegistry import DEFAULT_TRANSFORM_REGISTRY, TransformRegistry
 from SwissKnife.avro.types import Record, Variables
 
 
@@ -10,6 +18,120 @@ class NoDefault(object):
     pass
 
 
+class AvroTransformException(Exception):
+    """
+    Exception when a field of a record can not be transformed. Unlike the exceptions of apply_all_transforms,
+    it doesn't include the entire record in its message.
+    """
+
+    def __init__(self, field: str, step: str, types: list, value: object, reason: str):
+        """
+        AvroTransformException constructor.
+        :param field: The name of the field that failed.
+        :type field: str
+        :param step: The step that failed: "transform", "default" or "cast".
+        :type step: str
+        :param types: The types of the field (its cast values).
+        :type types: list
+        :param value: The offending value.
+        :type value: object
+        :param reason: A description of the error.
+        :type reason: str
+        """
+        super().__init__(field, step, types, value, reason)
+        self.field = field
+        self.step = step
+        self.types = types
+        self.value = value
+        self.reason = reason
+
+    def __str__(self):
+        return f"Error in step '{self.step}' of field '{self.field}' with value '{self.value}': {self.reason}"
+
+
+class TransformError(NamedTuple):
+    """
+    A record that can not be transformed, sent to the dead letter sink.
+    """
+    record_index: int
+    record: Record
+    field: str
+    step: str
+    types: list
+    value: object
+    reason: str
+
+
+class ErrorPolicy(str, Enum):
+    """
+    What to do with a record that can not be transformed in transform_iter and transform_batch:
+        - RAISE: Raise an AvroTransformException.
+        - SKIP: Discard the record.
+        - DEAD_LETTER: Discard the record and send a TransformError to the dead letter sink.
+    """
+    RAISE: str = "raise"
+    SKIP: str = "skip"
+    DEAD_LETTER: str = "dead_letter"
+
+
+class TransformCounters(object):
+    """
+    Counters of the records processed by transform_iter and transform_batch.
+    """
+
+    def __init__(self):
+        self.read = 0
+        self.transformed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.dead_lettered = 0
+
+    def to_dict(self) -> dict:
+        """Returns the counters as a dict.
+        :return: A dict that maps a counter name with its value.
+        :rtype: dict
+        """
+        return dict(self.__dict__)
+
+
+# Marker for a field that is not present in a record (None is a valid value)
+_MISSING = object()
+
+
+class FieldPlan(NamedTuple):
+    """
+    The steps of a field in the compiled function:
+        - name: The field name.
+        - transform_function: Its transform function, or None.
+        - default: Its default value, or NoDefault.
+        - cast_function: Its cast function.
+        - types: Its types (its cast values).
+    """
+    name: str
+    transform_function: Callable[[object, dict], object]
+    default: object
+    cast_function: Callable[[object], object]
+    types: list
+
+
+# Transformer of a worker process of transform_parallel. It is rebuilt from the schema once per worker.
+_worker_transformer = None
+
+
+def _init_parallel_worker(avro_transformer: "AvroTransformer"):
+    global _worker_transformer
+    _worker_transformer = avro_transformer
+
+
+def _transform_parallel_chunk(records: List[Record], policy: "ErrorPolicy") -> tuple:
+    # Counters and dead letters are sent back to the main process with the transformed records
+    _worker_transformer.reset_counters()
+    dead_letters = []
+    transformed_records = _worker_transformer.transform_batch(
+        records, policy, dead_letters.append if policy is ErrorPolicy.DEAD_LETTER else None)
+    return transformed_records, dead_letters, _worker_transformer.counters
+
+
 class AvroTransformer(object):
     """
     Avrotransformer provides some useful methods to
@@ -21,20 +143,107 @@ class AvroTransformer(object):
           to input value to get the correct one. This transform can be a
           type conversion, scaling, a threshold, etc.
         - comment: Some info of the field.
+        - memoize: If true (or a maximum number of values), the casts of the string values of the field
+          are cached and their results are shared by the records (see CastPlan.MemoizedCast).
+          For fields with a few distinct values, like a country or a status.
     """
 
-    def __init__(self, avro_schema: dict):
+    # The attributes built from the schema, that can be shared by the transformers of the same schema
+    PLAN_ATTRIBUTES = ("rename_dict", "defaults_dict", "transform_dict", "cast_dict", "named_types",
+                       "cast_functions_dict", "memo_dict", "compiled_function")
+
+    def __init__(self,
+                 avro_schema: dict,
+                 compiled: bool = False,
+                 named_types: dict = None,
+                 transform_registry: TransformRegistry = None,
+                 schema_cache: SchemaCache = DEFAULT_SCHEMA_CACHE,
+                 profile: bool = False,
+                 profile_reporter: Callable[[dict], None] = None,
+                 profile_report_every: int = 10000):
         """
         AvroTransformer constructor. It use an avro schema
         as a reference to rename and transform records.
         :param avro_schema: The provided schema.
         :type avro_schema: dict
+        :param compiled: If True, apply_all_transforms uses a single function, specialized
+        for the schema, that does all the steps in one pass. Defaults to False.
+        transform_iter and transform_batch always use it.
+        :type compiled: bool, optional
+        :param named_types: The named types (records, enums and fixed) already defined in the parent schema,
+        if the provided schema is a nested record. Defaults to None.
+        :type named_types: dict, optional
+        :param transform_registry: The registry of the transform functions used in the schema.
+        Defaults to DEFAULT_TRANSFORM_REGISTRY.
+        :type transform_registry: TransformRegistry, optional
+        :param schema_cache: The cache of the objects built from the schema, shared by the transformers
+        of the same schema (they must not be modified). If None, they are always built.
+        Defaults to DEFAULT_SCHEMA_CACHE.
+        :type schema_cache: SchemaCache, optional
+        :param profile: If True, the calls and the time of each field and step are counted (see get_profile),
+        and all the records are transformed in one pass, like in compiled mode. Defaults to False.
+        :type profile: bool, optional
+        :param profile_reporter: A function that receives the profile every profile_report_every records,
+        defaults to None
+        :type profile_reporter: Callable[[dict], None], optional
+        :param profile_report_every: The number of records between two reports, defaults to 10000
+        :type profile_report_every: int, optional
         """
         self.original_schema = avro_schema
+        self.transform_registry = transform_registry or DEFAULT_TRANSFORM_REGISTRY
+        self.compiled = compiled
+        if schema_cache is not None and named_types is None:
+            cached_transformer = schema_cache.get_transformer_plan(
+                avro_schema, self.transform_registry,
+                lambda: AvroTransformer(avro_schema, transform_registry=self.transform_registry, schema_cache=None))
+            for attribute in AvroTransformer.PLAN_ATTRIBUTES:
+                setattr(self, attribute, getattr(cached_transformer, attribute))
+        else:
+            self._create_plan(avro_schema, named_types)
+        # The function used by apply_all_transforms (in compiled mode), transform_iter and transform_batch
+        self.transform_function = self.compiled_function
+        self.profiler = None
+        if profile:
+            # Imported here because TransformProfiler depends on this module
+            from SwissKnife.avro.TransformProfiler import TransformProfiler
+            self.profiler = TransformProfiler(profile_reporter, profile_report_every)
+            self.transform_function = self.profiler.create_profiled_function(self)
+        self.counters = TransformCounters()
+        self._columnar_transformer = None
+
+    def _create_plan(self, avro_schema: dict, named_types: dict = None):
+        """
+        Builds the objects used to transform the records (the PLAN_ATTRIBUTES) from the schema.
+        :param avro_schema: The provided schema.
+        :type avro_schema: dict
+        :param named_types: The named types already defined in the parent schema, defaults to None
+        :type named_types: dict, optional
+        """
         self.rename_dict = AvroTransformer._create_rename_dict(avro_schema)
         self.defaults_dict = AvroTransformer._create_defaults_dict(avro_schema)
-        self.transform_dict = AvroTransformer._create_transform_dict(avro_schema)
+        self.transform_dict = AvroTransformer._create_transform_dict(avro_schema, self.transform_registry)
         self.cast_dict = AvroTransformer._create_cast_dict(avro_schema)
+        self.named_types = {} if named_types is None else named_types
+        # The record is registered before the cast functions are built, so a field can reference it
+        named_record = None
+        if Variables.NAME in avro_schema and avro_schema[Variables.NAME] not in self.named_types:
+            named_record = register_named_type(avro_schema, self.named_types, lambda value: isinstance(value, dict))
+        self.cast_functions_dict = AvroTransformer._create_cast_functions_dict(self.cast_dict, self.named_types,
+                                                                               self.transform_registry)
+        self.memo_dict = AvroTransformer._memoize_cast_functions(avro_schema, self.cast_functions_dict)
+        self.compiled_function = self._create_compiled_function()
+        if named_record is not None:
+            named_record.cast_function = self.compiled_function
+
+    def __reduce__(self):
+        """
+        The transform functions are closures, so they can not be pickled. A pickled AvroTransformer
+        only contains its constructor arguments, and it is rebuilt from the schema when it is unpickled.
+        A custom transform registry is pickled too, so its factories must be picklable.
+        The profiler is not pickled (the profile of each process is different).
+        """
+        transform_registry = None if self.transform_registry is DEFAULT_TRANSFORM_REGISTRY else self.transform_registry
+        return AvroTransformer, (self.original_schema, self.compiled, None, transform_registry)
 
     def get_original_schema(self) -> dict:
         """Returns the original provided schema.
@@ -50,16 +259,259 @@ class AvroTransformer(object):
             - get_renamed_record_an_remove_invalid_fields
             - get_transformed_record
             - get_record_with_defaults
+            - get_record_with_casted_values
+        In compiled mode (or with profile=True), all the steps are done by a single function. If it fails,
+        its AvroTransformException is converted to the exception of the default mode.
         :param record: The input record.
         :type record: Record
+        :raises RuntimeError: When a required field is not in the record.
+        :raises ValueError: When a value can not be cast.
         :return: A record with all transformations applied.
         :rtype: Record
         """
+        if self.compiled or self.profiler is not None:
+            try:
+                return self.transform_function(record)
+            except AvroTransformException as ex:
+                step_exception = AvroTransformer._get_step_exception(ex, record)
+                if step_exception is ex.__cause__:
+                    raise step_exception
+                raise step_exception from ex.__cause__
         renamed_record = self.get_renamed_record_and_remove_invalid_fields(record)
         transformed_record = self.get_transformed_record(renamed_record)
         record_with_defaults = self.get_record_with_defaults(transformed_record)
         return self.get_record_with_casted_values(record_with_defaults)
 
+    @staticmethod
+    def _get_step_exception(transform_exception: AvroTransformException, record: Record) -> Exception:
+        """
+        Gets the exception that the steps of the default mode raise for the error of the compiled function.
+        :param transform_exception: The exception of the compiled function.
+        :type transform_exception: AvroTransformException
+        :param record: The input record.
+        :type record: Record
+        :return: The exception of the failed step: the exception of the transform function, a RuntimeError
+        for a missing required field or a ValueError for a cast error.
+        :rtype: Exception
+        """
+        if transform_exception.step == "default":
+            return RuntimeError(f"Required {transform_exception.field} not in record {record}")
+        cause = transform_exception.__cause__
+        if transform_exception.step == "transform" and cause is not None:
+            return cause
+        return ValueError(f"Error {cause if cause is not None else transform_exception.reason} casting the field "
+                          f"'{transform_exception.field}' with value '{transform_exception.value}' in the record "
+                          f"{record}.Available cast values: {transform_exception.types}")
+
+    def transform_iter(self,
+                       records: Iterable[Record],
+                       on_error: ErrorPolicy = ErrorPolicy.RAISE,
+                       dead_letter_sink: Callable[[TransformError], None] = None) -> Iterator[Record]:
+        """
+        Applies all the transformations (using the compiled function) to each record of an iterable,
+        lazily. The records that can not be transformed are handled according to the error policy.
+        The counters of the object are updated when the iteration ends.
+        :param records: The input records.
+        :type records: Iterable[Record]
+        :param on_error: What to do with invalid records, defaults to ErrorPolicy.RAISE
+        :type on_error: ErrorPolicy, optional
+        :param dead_letter_sink: A function that receives a TransformError for each invalid record
+        (for example, the "append" method of a list). Required with the ErrorPolicy.DEAD_LETTER policy.
+        :type dead_letter_sink: Callable[[TransformError], None], optional
+        :raises ValueError: If the policy is ErrorPolicy.DEAD_LETTER and there is not a dead_letter_sink.
+        :raises AvroTransformException: With the ErrorPolicy.RAISE policy, when a record is invalid.
+        :return: An iterator of transformed records.
+        :rtype: Iterator[Record]
+        """
+        policy = ErrorPolicy(on_error)
+        if policy is ErrorPolicy.DEAD_LETTER and dead_letter_sink is None:
+            raise ValueError("A dead_letter_sink is required with the dead letter policy")
+        return self._transform_iter(records, policy, dead_letter_sink)
+
+    def _transform_iter(self,
+                        records: Iterable[Record],
+                        policy: ErrorPolicy,
+                        dead_letter_sink: Callable[[TransformError], None]) -> Iterator[Record]:
+        """
+        The generator of transform_iter. It is a different function so the arguments
+        are checked when transform_iter is called, not when the iteration starts.
+        """
+        transform_function = self.transform_function
+        read = 0
+        failed = 0
+        try:
+            for record in records:
+                read += 1
+                try:
+                    new_record = transform_function(record)
+                except AvroTransformException as ex:
+                    failed += 1
+                    if policy is ErrorPolicy.RAISE:
+                        raise
+                    elif policy is ErrorPolicy.DEAD_LETTER:
+                        dead_letter_sink(TransformError(read - 1, record, ex.field, ex.step,
+                                                        ex.types, ex.value, ex.reason))
+                    continue
+                yield new_record
+        finally:
+            self.counters.read += read
+            self.counters.failed += failed
+            self.counters.transformed += read - failed
+            if policy is ErrorPolicy.SKIP:
+                self.counters.skipped += failed
+            elif policy is ErrorPolicy.DEAD_LETTER:
+                self.counters.dead_lettered += failed
+
+    def transform_batch(self,
+                        records: Iterable[Record],
+                        on_error: ErrorPolicy = ErrorPolicy.RAISE,
+                        dead_letter_sink: Callable[[TransformError], None] = None) -> List[Record]:
+        """
+        Like transform_iter, but it returns a list with all the transformed records.
+        :param records: The input records.
+        :type records: Iterable[Record]
+        :param on_error: What to do with invalid records, defaults to ErrorPolicy.RAISE
+        :type on_error: ErrorPolicy, optional
+        :param dead_letter_sink: A function that receives a TransformError for each invalid record.
+        :type dead_letter_sink: Callable[[TransformError], None], optional
+        :return: A list of transformed records.
+        :rtype: List[Record]
+        """
+        return list(self.transform_iter(records, on_error, dead_letter_sink))
+
+    def transform_parallel(self,
+                           records: Iterable[Record],
+                           workers: int = None,
+                           chunk_size: int = 1000,
+                           ordered: bool = True,
+                           on_error: ErrorPolicy = ErrorPolicy.RAISE,
+                           dead_letter_sink: Callable[[TransformError], None] = None,
+                           max_pending_chunks: int = None) -> Iterator[Record]:
+        """
+        Like transform_iter, but the records are sent in chunks to a pool of processes. Each worker
+        builds its own copy of this transformer once. Only a bounded number of chunks is pending
+        at the same time, so the input records are read lazily.
+        :param records: The input records.
+        :type records: Iterable[Record]
+        :param workers: The number of processes, defaults to the number of CPUs.
+        :type workers: int, optional
+        :param chunk_size: The number of records sent to a worker in each task, defaults to 1000
+        :type chunk_size: int, optional
+        :param ordered: If True, the records are returned in the input order. Otherwise, the chunks
+        are returned as soon as they are transformed. Defaults to True
+        :type ordered: bool, optional
+        :param on_error: What to do with invalid records, defaults to ErrorPolicy.RAISE
+        :type on_error: ErrorPolicy, optional
+        :param dead_letter_sink: A function that receives a TransformError for each invalid record.
+        Required with the ErrorPolicy.DEAD_LETTER policy. It is called in the main process.
+        :type dead_letter_sink: Callable[[TransformError], None], optional
+        :param max_pending_chunks: The maximum number of chunks sent to the workers and not returned yet,
+        defaults to two chunks per worker.
+        :type max_pending_chunks: int, optional
+        :raises ValueError: If the policy is ErrorPolicy.DEAD_LETTER and there is not a dead_letter_sink.
+        :raises AvroTransformException: With the ErrorPolicy.RAISE policy, when a record is invalid.
+        :return: An iterator of transformed records.
+        :rtype: Iterator[Record]
+        """
+        policy = ErrorPolicy(on_error)
+        if policy is ErrorPolicy.DEAD_LETTER and dead_letter_sink is None:
+            raise ValueError("A dead_letter_sink is required with the dead letter policy")
+        workers = workers or os.cpu_count() or 1
+        max_pending_chunks = max_pending_chunks or 2 * workers
+        return self._transform_parallel(records, workers, chunk_size, ordered,
+                                        policy, dead_letter_sink, max_pending_chunks)
+
+    def _transform_parallel(self,
+                            records: Iterable[Record],
+                            workers: int,
+                            chunk_size: int,
+                            ordered: bool,
+                            policy: ErrorPolicy,
+                            dead_letter_sink: Callable[[TransformError], None],
+                            max_pending_chunks: int) -> Iterator[Record]:
+        """
+        The generator of transform_parallel.
+        """
+        executor = ProcessPoolExecutor(max_workers=workers,
+                                       initializer=_init_parallel_worker,
+                                       initargs=(self,))
+        # Pairs of (index of the first record of the chunk, future)
+        pending = deque()
+        try:
+            records_iter = iter(records)
+            offset = 0
+            chunk = list(islice(records_iter, chunk_size))
+            while chunk or pending:
+                if chunk and len(pending) < max_pending_chunks:
+                    pending.append((offset, executor.submit(_transform_parallel_chunk, chunk, policy)))
+                    offset += len(chunk)
+                    chunk = list(islice(records_iter, chunk_size))
+                    continue
+
+                if not ordered:
+                    wait([future for _, future in pending], return_when=FIRST_COMPLETED)
+                    pending.rotate(-next(index for index, (_, future) in enumerate(pending) if future.done()))
+                chunk_offset, future = pending.popleft()
+                transformed_records, dead_letters, counters = future.result()
+                self._add_counters(counters)
+                for dead_letter in dead_letters:
+                    dead_letter_sink(dead_letter._replace(record_index=chunk_offset + dead_letter.record_index))
+                yield from transformed_records
+        finally:
+            for _, future in pending:
+                future.cancel()
+            executor.shutdown(wait=True)
+
+    def _add_counters(self, counters: TransformCounters):
+        """
+        Adds the values of other counters to the counters of this object.
+        :param counters: The counters to add.
+        :type counters: TransformCounters
+        """
+        for name, value in counters.to_dict().items():
+            setattr(self.counters, name, getattr(self.counters, name) + value)
+
+    def transform_columns(self, columns) -> "ColumnarResult":
+        """
+        Applies all the transformations to a set of columns instead of a list of records.
+        See ColumnarTransformer.transform (it requires numpy).
+        :param columns: A dict that maps a field name with a numpy array or a list, or a pyarrow Table.
+        :type columns: Union[Dict[str, Union[np.ndarray, list]], pyarrow.Table]
+        :return: The transformed columns and the validity mask.
+        :rtype: ColumnarResult
+        """
+        if self._columnar_transformer is None:
+            # Imported here because ColumnarTransformer depends on this module
+            from SwissKnife.avro.ColumnarTransformer import ColumnarTransformer
+            self._columnar_transformer = ColumnarTransformer(self)
+        return self._columnar_transformer.transform(columns)
+
+    def get_profile(self) -> dict:
+        """
+        Returns the profile of the transformations (only if the object was created with profile=True).
+        See TransformProfiler.snapshot.
+        :raises RuntimeError: If profiling is not enabled.
+        :return: A dict with the number of transformed "records" and the counters of each field.
+        :rtype: dict
+        """
+        if self.profiler is None:
+            raise RuntimeError("Profiling is not enabled. Create the AvroTransformer with profile=True")
+        return self.profiler.snapshot()
+
+    def get_memo_stats(self) -> dict:
+        """
+        Returns the statistics of the memoized fields (see the "memoize" attribute). The caches are shared
+        by the transformers of the same schema.
+        :return: A dict that maps a memoized field with its "misses", "size" and "enabled" (see MemoizedCast.stats).
+        :rtype: dict
+        """
+        return {field_name: memoized_cast.stats() for field_name, memoized_cast in self.memo_dict.items()}
+
+    def reset_counters(self):
+        """Sets all the counters of the object to zero.
+        """
+        self.counters = TransformCounters()
+
     def get_renamed_record_and_remove_invalid_fields(self, record: Record) -> Record:
         """
         Transforms a record to another one with correct names: If a record field
@@ -139,11 +591,13 @@ class AvroTransformer(object):
         return rename_dict
 
     @staticmethod
-    def _create_transform_dict(schema: dict) -> dict:
+    def _create_transform_dict(schema: dict, transform_registry: TransformRegistry = None) -> dict:
         """
         Creates a dict that maps a field with a transform function.
         :param schema: The provided schema.
         :type schema: dict
+        :param transform_registry: The registry of transform functions, defaults to DEFAULT_TRANSFORM_REGISTRY
+        :type transform_registry: TransformRegistry, optional
         :return: A dict that maps a field with a transform function.
         It can be an empty dict if there are not fields with transform functions to apply.
         :rtype: dict
@@ -153,7 +607,8 @@ class AvroTransformer(object):
             if Variables.TRANSFORM in field:
                 field_name = field[Variables.NAME]
                 transform_name = field[Variables.TRANSFORM]
-                transform_dict[field_name] = AvroTransformer._get_transform_function(transform_name)
+                transform_dict[field_name] = AvroTransformer._get_transform_function(transform_name,
+                                                                                     transform_registry)
         return transform_dict
 
     @staticmethod
@@ -171,6 +626,47 @@ class AvroTransformer(object):
             cast_dict[field_name] = types_list
         return cast_dict
 
+    @staticmethod
+    def _create_cast_functions_dict(cast_dict: dict,
+                                    named_types: dict = None,
+                                    transform_registry: TransformRegistry = None) -> dict:
+        """
+        Creates a dict that maps a field with a cast function built from its types list.
+        :param cast_dict: A dict that maps a field with its types list.
+        :type cast_dict: dict
+        :param named_types: The named types defined in the schema, defaults to None
+        :type named_types: dict, optional
+        :param transform_registry: The registry of transform functions of nested records,
+        defaults to DEFAULT_TRANSFORM_REGISTRY
+        :type transform_registry: TransformRegistry, optional
+        :return: A dict that maps a field with its cast function.
+        :rtype: dict
+        """
+        named_types = {} if named_types is None else named_types
+        return {field_name: AvroTransformer._get_cast_function(types_list, named_types, transform_registry)
+                for field_name, types_list in cast_dict.items()}
+
+    @staticmethod
+    def _memoize_cast_functions(schema: dict, cast_functions_dict: dict) -> dict:
+        """
+        Replaces the cast functions of the fields with the "memoize" attribute by the function of a MemoizedCast.
+        :param schema: The provided avro schema
+        :type schema: dict
+        :param cast_functions_dict: A dict that maps a field with its cast function.
+        :type cast_functions_dict: dict
+        :return: A dict that maps a memoized field with its MemoizedCast.
+        :rtype: dict
+        """
+        memo_dict = {}
+        for field in schema[Variables.FIELDS]:
+            memoize = field.get(Variables.MEMOIZE)
+            if memoize:
+                max_size = DEFAULT_MEMO_SIZE if memoize is True else int(memoize)
+                field_name = field[Variables.NAME]
+                memo_dict[field_name] = MemoizedCast(cast_functions_dict[field_name], max_size)
+                cast_functions_dict[field_name] = memo_dict[field_name].function
+        return memo_dict
+
     @staticmethod
     def _create_defaults_dict(schema: dict) -> dict:
         """
@@ -191,51 +687,40 @@ class AvroTransformer(object):
         return defaults_dict
 
     @staticmethod
-    def _get_transform_function(transform_name: str) -> Callable[[object, dict], object]:
+    def _get_transform_function(transform_name: str,
+                                transform_registry: TransformRegistry = None) -> Callable[[object, dict], object]:
         """
         Gets a transform function from a transform_name. The purpose of this function
         is to transform the current value of a field to another one (for example, an available
         value for the field type).
         transform_name could be a function name or an expression, so the result will always be a closure.
-        For example, "copyFrom(date)" refers to function "copyFrom" with the parameter "date".
+        For example, "copyFrom(date)" refers to function "copyFrom" with the parameter "date", and
+        "strip | lower" applies "strip" and then "lower". See TransformRegistry.
         The returned function has two parameters:
             - value: The current value of the field.
             - record: The entire record.
 
-        Available functions:
+        Available functions (in DEFAULT_TRANSFORM_REGISTRY):
             - int2boolean: Transform an int to a boolean. True if x > 0, otherwise False.
             - copyFrom(y): Return the value of field Y. The current value of the
                            target field is ignored.
+            - scale(f): Multiply the value by f.
+            - clamp(min, max): Limit the value to the range [min, max].
+            - defaultIfEmpty(x): Return x if the value is null or an empty string.
+            - lower, upper, strip: String functions.
+            - regexExtract(pattern, group): Return a group of the first match of the pattern.
+            - epochToWeek: Convert a timestamp in milliseconds to the week format.
 
         :param transform_name: The transform name.
         :type transform_name: str
+        :param transform_registry: The registry of transform functions, defaults to DEFAULT_TRANSFORM_REGISTRY
+        :type transform_registry: TransformRegistry, optional
         :raises RuntimeError: Raises a exception if transform_name is invalid.
         :raises RuntimeError: copyFrom function raises exception if the provided field is invalid when it is executed.
         :return: A transform function.
         :rtype: Callable[[object, dict], object]
         """
-        selected_function = None
-        if transform_name == "int2boolean":
-            def int2boolean(value: int, record: dict) -> bool:
-                if value is None:
-                    return None
-                else:
-                    return int(value) > 0
-            selected_function = int2boolean
-        elif re.match("copyFrom\(\w+\)", transform_name):
-            copied_field = re.match("copyFrom\((\w+)\)", transform_name)[1]
-
-            def copyFrom(value: int, record: dict) -> bool:
-                if copied_field in record:
-                    return record[copied_field]
-                else:
-                    raise RuntimeError("Invalid field in copyFrom")
-
-            selected_function = copyFrom
-        # If there is not an available function, raise Exception
-        if selected_function is None:
-            raise RuntimeError(f"Invalid or unsupported name for a transform function: '{transform_name}'")
-        return selected_function
+        return (transform_registry or DEFAULT_TRANSFORM_REGISTRY).compile(transform_name)
 
     def get_record_with_casted_values(self, record: Record) -> Record:
         """
@@ -247,7 +732,7 @@ class AvroTransformer(object):
         for key, value in record.items():
             try:
                 types_list = self.cast_dict[key]
-                casted_value = self._get_casted_value(value, types_list)
+                casted_value = self.cast_functions_dict[key](value)
             except Exception as ex:
                 raise ValueError(f"Error {ex} casting the field '{key}' with value '{value}' in the record {record}."
                                  f"Available cast values: {types_list}")
@@ -288,3 +773,180 @@ class AvroTransformer(object):
         # If the iteration over types list ends, the value is not valid. So, it raises an exception.
         raise ValueError(f"The value {value} can not be cast to any type of {types_to_cast_list}")
 
+    @staticmethod
+    def _resolve_cast_type(types_to_cast_list: list) -> (bool, str):
+        """
+        Walks a types list like _get_casted_value does: only the first castable type is used,
+        and None values are kept if "null" appears before it.
+        :param types_to_cast_list: list with cast values
+        :type types_to_cast_list: list
+        :return: If None values are allowed and the cast type ("int", "boolean", "double", "string"),
+        or None if there is not a castable type in the list.
+        :rtype: (bool, str)
+        """
+        nullable = False
+        for type_to_cast in types_to_cast_list:
+            if type_to_cast == "null":
+                nullable = True
+            elif type_to_cast in ["int", "long"]:
+                return nullable, "int"
+            elif type_to_cast == "boolean":
+                return nullable, "boolean"
+            elif type_to_cast in ["double", "float"]:
+                return nullable, "double"
+            elif type_to_cast in ["string"]:
+                return nullable, "string"
+        return nullable, None
+
+    @staticmethod
+    def _get_cast_function(types_to_cast_list: list,
+                           named_types: dict = None,
+                           transform_registry: TransformRegistry = None) -> Callable[[object], object]:
+        """
+        Gets a cast function for a types list. The types list is walked only once, so the returned
+        function gives the same result as _get_casted_value without comparing type names for every value.
+        It also supports complex types (nested records, arrays, maps, enums and fixed) and logical types.
+        See CastPlan.get_cast_function.
+        :param types_to_cast_list: list with cast values
+        :type types_to_cast_list: list
+        :param named_types: The named types defined in the schema, defaults to None
+        :type named_types: dict, optional
+        :param transform_registry: The registry of transform functions of nested records,
+        defaults to DEFAULT_TRANSFORM_REGISTRY
+        :type transform_registry: TransformRegistry, optional
+        :return: A function that casts a value.
+        :rtype: Callable[[object], object]
+        """
+        return get_cast_function(types_to_cast_list,
+                                 {} if named_types is None else named_types,
+                                 partial(AvroTransformer._get_record_cast_function,
+                                         transform_registry=transform_registry))
+
+    @staticmethod
+    def _get_record_cast_function(record_schema: dict,
+                                  named_types: dict,
+                                  transform_registry: TransformRegistry = None) -> Callable[[Record], Record]:
+        """
+        Gets the cast function of a nested record. It applies all the transformations of its schema
+        (renames, transforms, defaults and casts).
+        :param record_schema: The schema of the nested record.
+        :type record_schema: dict
+        :param named_types: The named types defined in the schema.
+        :type named_types: dict
+        :param transform_registry: The registry of transform functions, defaults to DEFAULT_TRANSFORM_REGISTRY
+        :type transform_registry: TransformRegistry, optional
+        :return: A function that transforms a nested record.
+        :rtype: Callable[[Record], Record]
+        """
+        return AvroTransformer(record_schema, named_types=named_types,
+                               transform_registry=transform_registry).compiled_function
+
+    def get_fields_plan(self) -> tuple:
+        """
+        Returns the steps of each field, in the order of the schema.
+        :return: A tuple of FieldPlan.
+        :rtype: tuple
+        """
+        return tuple(
+            FieldPlan(field_name,
+                      self.transform_dict.get(field_name),
+                      defaults_value,
+                      self.cast_functions_dict[field_name],
+                      self.cast_dict[field_name])
+            for field_name, defaults_value in self.defaults_dict.items()
+        )
+
+    def _create_compiled_function(self) -> Callable[[Record], Record]:
+        """
+        Creates a function that applies all the transformations to a record in a single pass.
+        Renamed fields, transform functions, defaults and cast functions are resolved
+        per field when the function is created.
+        The result is the same as the one of the steps applied one by one,
+        but errors are raised as AvroTransformException, without the entire record.
+        :return: A function that transforms a record.
+        :rtype: Callable[[Record], Record]
+        """
+        # If there are no aliases nor transform functions (that receive the renamed record),
+        # the fields can be read directly from the input record.
+        needs_renamed_record = bool(self.transform_dict) or \
+            any(key != value for key, value in self.rename_dict.items())
+        return AvroTransformer.create_record_function(self.get_fields_plan(), self.rename_dict.get,
+                                                      needs_renamed_record)
+
+    @staticmethod
+    def create_record_function(fields_plan: tuple,
+                               get_new_key: Callable[[str], str],
+                               needs_renamed_record: bool = True,
+                               count_default: Callable[[str], None] = None) -> Callable[[Record], Record]:
+        """
+        Creates the function that transforms a record with the steps of its fields. It is used by the
+        compiled mode and by the TransformProfiler, that wraps the steps with its counters.
+        :param fields_plan: The FieldPlan of each field (see get_fields_plan).
+        :type fields_plan: tuple
+        :param get_new_key: A function that returns the field name of a key of the input record,
+        or None if it is not a field.
+        :type get_new_key: Callable[[str], str]
+        :param needs_renamed_record: False if the fields can be read from the input record, without
+        renaming its keys. Defaults to True
+        :type needs_renamed_record: bool, optional
+        :param count_default: A function that receives the name of a field each time its default value is used,
+        defaults to None
+        :type count_default: Callable[[str], None], optional
+        :return: A function that transforms a record.
+        :rtype: Callable[[Record], Record]
+        """
+        fields_plan = tuple(fields_plan)
+        transforms_plan = {field_plan.name: field_plan for field_plan in fields_plan
+                           if field_plan.transform_function is not None}
+        required_plan = tuple(field_plan for field_plan in fields_plan if field_plan.default is NoDefault)
+        # The transform functions receive the renamed record
+        needs_renamed_record = needs_renamed_record or bool(transforms_plan)
+
+        def raise_missing_field(renamed_record: dict):
+            for field_plan in required_plan:
+                if field_plan.name not in renamed_record:
+                    raise AvroTransformException(field_plan.name, "default", field_plan.types, None,
+                                                 "Required field not in record")
+
+        def record_function(record: Record) -> Record:
+            if needs_renamed_record:
+                renamed_record = {}
+                for key, value in record.items():
+                    new_key = get_new_key(key)
+                    if new_key is not None:
+                        renamed_record[new_key] = value
+            else:
+                renamed_record = record
+
+            # The steps fail in the same order as in the default mode: the transforms (in the order of the record),
+            # then the required fields and then the casts (in the order of the schema).
+            if transforms_plan:
+                transformed_values = {}
+                for key, value in renamed_record.items():
+                    field_plan = transforms_plan.get(key)
+                    if field_plan is not None:
+                        try:
+                            transformed_values[key] = field_plan.transform_function(value, renamed_record)
+                        except Exception as ex:
+                            raise AvroTransformException(key, "transform", field_plan.types, value, repr(ex)) from ex
+                renamed_record.update(transformed_values)
+
+            new_record = {}
+            for field_name, _, defaults_value, cast_function, types_list in fields_plan:
+                value = renamed_record.get(field_name, _MISSING)
+                if value is _MISSING:
+                    if defaults_value is NoDefault:
+                        raise AvroTransformException(field_name, "default", types_list, None,
+                                                     "Required field not in record")
+                    value = defaults_value
+                    if count_default is not None:
+                        count_default(field_name)
+                try:
+                    new_record[field_name] = cast_function(value)
+                except Exception as ex:
+                    # A required field missing after this one fails before the casts
+                    raise_missing_field(renamed_record)
+                    raise AvroTransformException(field_name, "cast", types_list, value, repr(ex)) from ex
+            return new_record
+
+        return record_function
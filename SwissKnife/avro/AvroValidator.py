@@ -0,0 +1,330 @@
+from collections.abc import Mapping, Sequence
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Callable, Iterable, List, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from SwissKnife.avro.SchemaCache import DEFAULT_SCHEMA_CACHE, SchemaCache
+from SwissKnife.avro.SchemaUtils import get_full_name
+from SwissKnife.avro.types import Record, Variables
+
+# A validator receives a value and returns None if it is valid, or a (path, reason) tuple
+Validator = Callable[[object], Optional[Tuple[str, str]]]
+
+INT_RANGE = (-(1 << 31), (1 << 31) - 1)
+LONG_RANGE = (-(1 << 63), (1 << 63) - 1)
+
+# The python types accepted by fastavro for each logical type, besides the types of the underlying avro type
+LOGICAL_PYTHON_TYPES = {
+    "timestamp-millis": (datetime,),
+    "timestamp-micros": (datetime,),
+    "local-timestamp-millis": (datetime,),
+    "local-timestamp-micros": (datetime,),
+    "date": (date,),
+    "time-millis": (time,),
+    "time-micros": (time,),
+    "decimal": (Decimal,),
+    "uuid": (UUID,),
+}
+
+_MISSING = object()
+
+
+class RejectedRow(NamedTuple):
+    """
+    A row that doesn't match with the schema.
+    """
+    row_index: int
+    row: Record
+    reason: str
+
+
+class _NamedValidator(object):
+    """
+    The validator of a named type. It is registered before the validator is built,
+    so a type can reference itself (recursive records).
+    """
+
+    def __init__(self):
+        self.validator = None
+
+    def __call__(self, value: object) -> Optional[Tuple[str, str]]:
+        return self.validator(value)
+
+
+def _got(value: object) -> str:
+    return type(value).__name__
+
+
+def _join_path(name: str, path: str) -> str:
+    if not path:
+        return name
+    return f"{name}{path}" if path.startswith("[") else f"{name}.{path}"
+
+
+def _get_type_name(avro_type: object) -> str:
+    """Gets a short description of an avro type for the error messages."""
+    if isinstance(avro_type, list):
+        return " or ".join(_get_type_name(branch) for branch in avro_type)
+    if isinstance(avro_type, dict):
+        return avro_type.get(Variables.LOGICAL_TYPE) or avro_type.get(Variables.NAME) or \
+            _get_type_name(avro_type[Variables.TYPE])
+    return str(avro_type)
+
+
+def _create_range_validator(type_name: str, value_range: Tuple[int, int]) -> Validator:
+    minimum, maximum = value_range
+
+    def validate_integer(value: object) -> Optional[Tuple[str, str]]:
+        if type(value) is int or (isinstance(value, int) and not isinstance(value, bool)):
+            if minimum <= value <= maximum:
+                return None
+            return "", f"{value} is out of the range of {type_name}"
+        return "", f"expected {type_name}, got {_got(value)}"
+    return validate_integer
+
+
+def _create_type_validator(type_name: str, python_types: tuple, excluded_types: tuple = ()) -> Validator:
+    def validate_type(value: object) -> Optional[Tuple[str, str]]:
+        if isinstance(value, python_types) and not isinstance(value, excluded_types):
+            return None
+        return "", f"expected {type_name}, got {_got(value)}"
+    return validate_type
+
+
+def _validate_null(value: object) -> Optional[Tuple[str, str]]:
+    if value is None:
+        return None
+    return "", f"expected null, got {_got(value)}"
+
+
+PRIMITIVE_VALIDATORS = {
+    "null": _validate_null,
+    "boolean": _create_type_validator("boolean", (bool,)),
+    "int": _create_range_validator("int", INT_RANGE),
+    "long": _create_range_validator("long", LONG_RANGE),
+    "float": _create_type_validator("float", (int, float), (bool,)),
+    "double": _create_type_validator("double", (int, float), (bool,)),
+    "string": _create_type_validator("string", (str,)),
+    "bytes": _create_type_validator("bytes", (bytes, bytearray)),
+}
+
+
+def get_validator(avro_type: object, named_types: dict = None, namespace: str = None) -> Validator:
+    """
+    Builds the validator of an avro type. It accepts the same python values as the fastavro writer:
+    a missing field is valid if it has a default value, and the logical types also accept
+    their python types (datetime, date, time, Decimal and UUID).
+    :param avro_type: The avro type: a primitive name, a union (list) or a complex type (dict).
+    :type avro_type: object
+    :param named_types: A dict that maps a name with its validator. New named types are added to it.
+    :type named_types: dict, optional
+    :param namespace: The namespace of the enclosing type, defaults to None
+    :type namespace: str, optional
+    :return: A function that returns None if a value is valid, or a (path, reason) tuple.
+    :rtype: Validator
+    """
+    named_types = {} if named_types is None else named_types
+    if isinstance(avro_type, list):
+        return _create_union_validator(avro_type, named_types, namespace)
+    if isinstance(avro_type, str):
+        if avro_type in PRIMITIVE_VALIDATORS:
+            return PRIMITIVE_VALIDATORS[avro_type]
+        if namespace and f"{namespace}.{avro_type}" in named_types:
+            return named_types[f"{namespace}.{avro_type}"]
+        if avro_type in named_types:
+            return named_types[avro_type]
+        raise ValueError(f"Unknown avro type: {avro_type}")
+
+    type_name = avro_type[Variables.TYPE]
+    logical_type = avro_type.get(Variables.LOGICAL_TYPE)
+    if logical_type in LOGICAL_PYTHON_TYPES:
+        return _create_logical_validator(avro_type, logical_type, named_types, namespace)
+    if type_name in ("record", "error"):
+        return _create_record_validator(avro_type, named_types, namespace)
+    if type_name == "enum":
+        symbols = frozenset(avro_type[Variables.SYMBOLS])
+
+        def validate_enum(value: object) -> Optional[Tuple[str, str]]:
+            if isinstance(value, str) and value in symbols:
+                return None
+            return "", f"{value!r} is not a symbol of {avro_type[Variables.NAME]}"
+        return _register_named_type(avro_type, named_types, namespace, validate_enum)
+    if type_name == "fixed":
+        size = avro_type[Variables.SIZE]
+
+        def validate_fixed(value: object) -> Optional[Tuple[str, str]]:
+            if isinstance(value, (bytes, bytearray)) and len(value) == size:
+                return None
+            return "", f"expected {size} bytes ({avro_type[Variables.NAME]}), got {_got(value)}"
+        return _register_named_type(avro_type, named_types, namespace, validate_fixed)
+    if type_name == "array":
+        return _create_array_validator(get_validator(avro_type[Variables.ITEMS], named_types, namespace))
+    if type_name == "map":
+        return _create_map_validator(get_validator(avro_type[Variables.VALUES], named_types, namespace))
+    # A type written as a dict, like {"type": "string"}
+    return get_validator(type_name, named_types, namespace)
+
+
+def _register_named_type(avro_type: dict, named_types: dict, namespace: str, validator: Validator) -> Validator:
+    named_types[avro_type[Variables.NAME]] = validator
+    named_types[get_full_name(avro_type, namespace)] = validator
+    return validator
+
+
+def _create_record_validator(avro_type: dict, named_types: dict, namespace: str) -> Validator:
+    named_validator = _NamedValidator()
+    _register_named_type(avro_type, named_types, namespace, named_validator)
+    # The namespace of the fields is the namespace of the record
+    fields_namespace = get_full_name(avro_type, namespace).rpartition(".")[0] or None
+    fields = tuple(
+        (field[Variables.NAME], Variables.DEFAULT in field,
+         get_validator(field[Variables.TYPE], named_types, fields_namespace))
+        for field in avro_type[Variables.FIELDS]
+    )
+    record_name = avro_type[Variables.NAME]
+
+    def validate_record(value: object) -> Optional[Tuple[str, str]]:
+        if not isinstance(value, Mapping):
+            return "", f"expected record {record_name}, got {_got(value)}"
+        for field_name, has_default, field_validator in fields:
+            field_value = value.get(field_name, _MISSING)
+            if field_value is _MISSING:
+                if has_default:
+                    continue
+                field_value = None
+            error = field_validator(field_value)
+            if error is not None:
+                return _join_path(field_name, error[0]), error[1]
+        return None
+
+    named_validator.validator = validate_record
+    return validate_record
+
+
+def _create_array_validator(items_validator: Validator) -> Validator:
+    def validate_array(value: object) -> Optional[Tuple[str, str]]:
+        if not isinstance(value, Sequence) or isinstance(value, (str, bytes, bytearray)):
+            return "", f"expected array, got {_got(value)}"
+        for position, item in enumerate(value):
+            error = items_validator(item)
+            if error is not None:
+                return _join_path(f"[{position}]", error[0]), error[1]
+        return None
+    return validate_array
+
+
+def _create_map_validator(values_validator: Validator) -> Validator:
+    def validate_map(value: object) -> Optional[Tuple[str, str]]:
+        if not isinstance(value, Mapping):
+            return "", f"expected map, got {_got(value)}"
+        for key, item in value.items():
+            if not isinstance(key, str):
+                return "", f"the keys of a map must be strings, got {_got(key)}"
+            error = values_validator(item)
+            if error is not None:
+                return _join_path(f"[{key!r}]", error[0]), error[1]
+        return None
+    return validate_map
+
+
+def _create_logical_validator(avro_type: dict, logical_type: str, named_types: dict, namespace: str) -> Validator:
+    python_types = LOGICAL_PYTHON_TYPES[logical_type]
+    base_validator = get_validator(avro_type[Variables.TYPE], named_types, namespace)
+
+    def validate_logical(value: object) -> Optional[Tuple[str, str]]:
+        if isinstance(value, python_types):
+            return None
+        error = base_validator(value)
+        if error is not None:
+            return "", f"expected {logical_type}, got {_got(value)}"
+        return None
+    return validate_logical
+
+
+def _create_union_validator(branches: list, named_types: dict, namespace: str) -> Validator:
+    branch_validators = tuple(get_validator(branch, named_types, namespace) for branch in branches)
+    non_null_validators = [validator for branch, validator in zip(branches, branch_validators) if branch != "null"]
+    nullable = len(non_null_validators) < len(branch_validators)
+    type_name = _get_type_name(branches)
+
+    if nullable and len(non_null_validators) == 1:
+        # The most common union: the errors of the type are more useful than a generic message
+        validator = non_null_validators[0]
+
+        def validate_nullable(value: object) -> Optional[Tuple[str, str]]:
+            if value is None:
+                return None
+            return validator(value)
+        return validate_nullable
+
+    def validate_union(value: object) -> Optional[Tuple[str, str]]:
+        for branch_validator in branch_validators:
+            if branch_validator(value) is None:
+                return None
+        return "", f"expected {type_name}, got {_got(value)}"
+    return validate_union
+
+
+class AvroValidator(object):
+    """
+    Checks if the rows match with an avro schema before they are written, with validators
+    built once per schema (see get_validator). Each invalid row has a reason with the path of the wrong value.
+    """
+
+    def __init__(self, avro_schema: dict, schema_cache: SchemaCache = DEFAULT_SCHEMA_CACHE):
+        """AvroValidator constructor
+
+        :param avro_schema: A valid avro schema as a dict.
+        :type avro_schema: dict
+        :param schema_cache: The cache of the validators. If None, the validator is always built.
+        Defaults to DEFAULT_SCHEMA_CACHE.
+        :type schema_cache: SchemaCache, optional
+        """
+        if schema_cache is None:
+            self.validator = get_validator(avro_schema)
+        else:
+            self.validator = schema_cache.get_or_create(("validator",) + schema_cache.get_schema_key(avro_schema),
+                                                        lambda: get_validator(avro_schema))
+
+    def validate(self, row: Record) -> Optional[str]:
+        """Validates a row.
+
+        :param row: A row of data.
+        :type row: Record
+        :return: None if the row is valid, or the reason why it is not valid.
+        :rtype: Optional[str]
+        """
+        error = self.validator(row)
+        if error is None:
+            return None
+        path, reason = error
+        return f"{path}: {reason}" if path else reason
+
+    def is_valid(self, row: Record) -> bool:
+        """Checks if a row is valid.
+
+        :param row: A row of data.
+        :type row: Record
+        :return: True if the row matches with the schema.
+        :rtype: bool
+        """
+        return self.validator(row) is None
+
+    def validate_batch(self, rows: Iterable[Record]) -> (List[Record], List[RejectedRow]):
+        """Splits some rows in valid and rejected rows.
+
+        :param rows: The rows.
+        :type rows: Iterable[Record]
+        :return: The valid rows, and a RejectedRow for each invalid row.
+        :rtype: (List[Record], List[RejectedRow])
+        """
+        validator = self.validator
+        valid_rows = []
+        rejected_rows = []
+        for row_index, row in enumerate(rows):
+            if validator(row) is None:
+                valid_rows.append(row)
+            else:
+                rejected_rows.append(RejectedRow(row_index, row, self.validate(row)))
+        return valid_rows, rejected_rows
@@ -1,7 +1,18 @@
-from typing import BinaryIO
+import io
+from concurrent.futures import Executor
+from enum import Enum
+from functools import lru_cache
+from typing import BinaryIO, Callable, Iterable, List, NamedTuple
 
 import fastavro
 
+from SwissKnife.avro.AvroContainer import CODEC_KEY, encode_header, encode_long, read_header, read_long
+from SwissKnife.avro.AvroValidator import AvroValidator, RejectedRow
+from SwissKnife.avro.BlockIndex import BlockIndex
+from SwissKnife.avro.ColumnEncoder import ColumnEncoder, get_num_rows, split_blocks
+from SwissKnife.avro.ParallelBlockWriter import BLOCK_COMPRESSORS, ParallelBlockWriter, compress_block
+from SwissKnife.avro.SchemaCache import DEFAULT_SCHEMA_CACHE, SchemaCache
+
 
 class AvroMatchingException(Exception):
     """
@@ -10,39 +21,625 @@ class AvroMatchingException(Exception):
     pass
 
 
+class AvroCodec(str, Enum):
+    """
+    The compression codecs of the avro files. Some of them require optional libraries
+    (see get_available_codecs).
+    """
+    NULL: str = "null"
+    DEFLATE: str = "deflate"
+    SNAPPY: str = "snappy"
+    ZSTANDARD: str = "zstandard"
+    BZIP2: str = "bzip2"
+    XZ: str = "xz"
+    LZ4: str = "lz4"
+
+
+class WriteMode(str, Enum):
+    """
+    How the rows are checked before they are written:
+        - CHECKED: The rows are not validated, but the errors of fastavro are raised as AvroMatchingException.
+        - TRUSTED: The rows are not validated (e.g. rows already cast by AvroTransformer). The errors
+          of fastavro are raised as they are.
+        - VALIDATE: The rows are validated before they are encoded (see AvroValidator). The invalid rows
+          are sent to the rejected callback (or returned by write_batch) and the valid rows are written.
+    """
+    CHECKED: str = "checked"
+    TRUSTED: str = "trusted"
+    VALIDATE: str = "validate"
+
+
+# Other common names of the codecs
+CODEC_ALIASES = {
+    "zstd": AvroCodec.ZSTANDARD,
+    "bz2": AvroCodec.BZIP2,
+}
+
+
+def get_codec(codec: str) -> AvroCodec:
+    """Gets a codec from its name or one of its aliases ("zstd", "bz2").
+
+    :param codec: The name of the codec.
+    :type codec: str
+    :raises ValueError: If the codec doesn't exist.
+    :return: The codec.
+    :rtype: AvroCodec
+    """
+    return CODEC_ALIASES.get(codec) or AvroCodec(codec)
+
+
+@lru_cache(maxsize=None)
+def is_codec_available(codec: str) -> bool:
+    """Checks if a codec can be used (its library is installed).
+
+    :param codec: The name of the codec.
+    :type codec: str
+    :return: True if the codec is available.
+    :rtype: bool
+    """
+    try:
+        fastavro.writer(io.BytesIO(), {"type": "string"}, ["test"], codec=get_codec(codec).value)
+        return True
+    except Exception:
+        return False
+
+
+def get_available_codecs() -> List[AvroCodec]:
+    """Gets the codecs that can be used.
+
+    :return: The available codecs.
+    :rtype: List[AvroCodec]
+    """
+    return [codec for codec in AvroCodec if is_codec_available(codec.value)]
+
+
+class BlockInfo(NamedTuple):
+    """
+    The information of a block written to the output stream.
+    """
+    index: int
+    records: int
+    bytes: int
+
+
+class EncodedRecords(NamedTuple):
+    """
+    Records encoded with the avro binary encoding (see encode_records and AvroWriter.write_encoded):
+        - data: The bytes of the records, one after another.
+        - records: The number of records.
+    """
+    data: bytes
+    records: int
+
+
+class WriterCounters(object):
+    """
+    Counters of an AvroWriter. The bytes include the header and the sync markers.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.rejected = 0
+        self.blocks = 0
+        self.bytes = 0
+
+    def to_dict(self) -> dict:
+        """Returns the counters as a dict.
+        :return: A dict that maps a counter name with its value.
+        :rtype: dict
+        """
+        return dict(self.__dict__)
+
+
+class _CountingStream(object):
+    """
+    A wrapper of the output stream that counts the written bytes. The other methods are delegated.
+    """
+
+    def __init__(self, stream: BinaryIO):
+        self.stream = stream
+        self.bytes_written = 0
+
+    def write(self, data: bytes) -> int:
+        self.bytes_written += len(data)
+        return self.stream.write(data)
+
+    def __getattr__(self, name: str):
+        return getattr(self.stream, name)
+
+
+class _BlockCapture(object):
+    """
+    The output stream of the fastavro writer in parallel mode: it keeps the written data,
+    so the serialized blocks can be sent to the ParallelBlockWriter.
+    """
+
+    def __init__(self):
+        self.data = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self.data += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def seekable(self) -> bool:
+        return False
+
+    def pop(self) -> bytes:
+        data = bytes(self.data)
+        self.data.clear()
+        return data
+
+
+def encode_records(avro_schema: dict,
+                   records: Iterable[dict],
+                   schema_cache: SchemaCache = DEFAULT_SCHEMA_CACHE) -> EncodedRecords:
+    """Encodes a batch of records, so they can be written by an AvroWriter with the same schema
+    (see AvroWriter.write_encoded). The result can be sent between processes.
+
+    :param avro_schema: A valid avro schema as a dict.
+    :type avro_schema: dict
+    :param records: The records. They must match with the schema.
+    :type records: Iterable[dict]
+    :param schema_cache: The cache of parsed schemas. If None, the schema is always parsed.
+    Defaults to DEFAULT_SCHEMA_CACHE.
+    :type schema_cache: SchemaCache, optional
+    :raises AvroMatchingException: When a record doesn't match with the schema.
+    :return: The encoded records.
+    :rtype: EncodedRecords
+    """
+    if schema_cache is None:
+        parsed_schema = fastavro.parse_schema(avro_schema)
+    else:
+        parsed_schema = schema_cache.get_parsed_schema(avro_schema)
+
+    # The records are written as blocks without compression, and the data of the blocks is joined
+    block_capture = _BlockCapture()
+    writer = fastavro._write.Writer(block_capture, parsed_schema, AvroCodec.NULL.value)
+    block_capture.pop()
+    record = None
+    try:
+        for record in records:
+            writer.write(record)
+    except ValueError as ex:
+        raise AvroMatchingException(f"Exception: {ex} for row -> {record}")
+    if writer.block_count > 0:
+        writer.dump()
+
+    blocks = io.BytesIO(block_capture.pop())
+    data = bytearray()
+    num_records = 0
+    while blocks.tell() < len(blocks.getbuffer()):
+        num_records += read_long(blocks)
+        data += blocks.read(read_long(blocks))
+        blocks.seek(len(writer.sync_marker), io.SEEK_CUR)
+    return EncodedRecords(bytes(data), num_records)
+
+
 class AvroWriter(object):
     """This object create a writer that writes avro data into a file-like object.
+    The rows are encoded in a buffer, that is compressed and written as a block when it
+    reaches block_bytes (or block_records rows). In parallel mode (with compression_workers or
+    an executor), the blocks are compressed in a pool of threads or processes.
     """
 
-    def __init__(self, output_stream: BinaryIO, avro_schema: dict):
+    def __init__(self,
+                 output_stream: BinaryIO,
+                 avro_schema: dict,
+                 schema_cache: SchemaCache = DEFAULT_SCHEMA_CACHE,
+                 codec: str = AvroCodec.NULL,
+                 compression_level: int = None,
+                 block_records: int = None,
+                 block_bytes: int = None,
+                 block_callback: Callable[[BlockInfo], None] = None,
+                 compression_workers: int = None,
+                 executor: Executor = None,
+                 max_pending_blocks: int = None,
+                 write_mode: WriteMode = WriteMode.CHECKED,
+                 rejected_callback: Callable[[RejectedRow], None] = None,
+                 block_index: BlockIndex = None):
         """AvroWriter constructor
-        
+
         :param output_stream: The file-like object where data will be writed.
         :type output_stream: file
         :param avro_schema: A valid avro schema as a dict.
         :type avro_schema: dict
+        :param schema_cache: The cache of parsed schemas. If None, the schema is always parsed.
+        Defaults to DEFAULT_SCHEMA_CACHE.
+        :type schema_cache: SchemaCache, optional
+        :param codec: The compression codec ("null", "deflate", "snappy", "zstandard" or "zstd",
+        "bzip2" or "bz2", "xz", "lz4"), defaults to AvroCodec.NULL
+        :type codec: str, optional
+        :param compression_level: The compression level of the codec, defaults to the level of the codec library.
+        The level of "lz4" (its high compression mode) requires the parallel compression.
+        :type compression_level: int, optional
+        :param block_records: The maximum number of rows of a block, defaults to None (no limit)
+        :type block_records: int, optional
+        :param block_bytes: The size of the uncompressed rows that makes a block to be written,
+        defaults to the sync interval of fastavro (16000 bytes)
+        :type block_bytes: int, optional
+        :param block_callback: A function that receives a BlockInfo each time a block is written, defaults to None
+        :type block_callback: Callable[[BlockInfo], None], optional
+        :param compression_workers: The number of threads that compress the blocks in parallel.
+        Defaults to None (the blocks are compressed when they are written).
+        :type compression_workers: int, optional
+        :param executor: A pool of threads or processes that compresses the blocks in parallel, instead of
+        creating one with compression_workers threads. It is not shut down by the writer. Defaults to None
+        :type executor: Executor, optional
+        :param max_pending_blocks: In parallel mode, the maximum number of blocks in memory
+        that are being compressed or waiting to be written, defaults to twice the number of workers
+        :type max_pending_blocks: int, optional
+        :param write_mode: How the rows are checked (see WriteMode), defaults to WriteMode.CHECKED
+        :type write_mode: WriteMode, optional
+        :param rejected_callback: In WriteMode.VALIDATE, a function that receives a RejectedRow for each
+        invalid row, defaults to None
+        :type rejected_callback: Callable[[RejectedRow], None], optional
+        :param block_index: An index that is filled with the position and the statistics of each block.
+        The offsets are relative to the position of the output stream when the writer is created.
+        It must be saved after close (see BlockIndex.save). Defaults to None
+        :type block_index: BlockIndex, optional
+        :raises ValueError: If the codec doesn't exist or its library is not installed, or a level of "lz4" is
+        given without the parallel compression.
         """
 
-        parsed_schema = fastavro.parse_schema(avro_schema)
-        # IMPORTANT: I use the private module because the public API hasn't the
-        # the required features.
-        self.writer = fastavro._write.Writer(output_stream, parsed_schema)
+        if schema_cache is None:
+            parsed_schema = fastavro.parse_schema(avro_schema)
+        else:
+            parsed_schema = schema_cache.get_parsed_schema(avro_schema)
+
+        self.codec = get_codec(codec)
+        if not is_codec_available(self.codec.value):
+            raise ValueError(f"The codec '{self.codec.value}' is not available. Its library must be installed")
+        writer_options = {}
+        if compression_level is not None:
+            writer_options["compression_level"] = compression_level
+        if block_bytes is not None:
+            writer_options["sync_interval"] = block_bytes
+
+        self.avro_schema = avro_schema
+        self.compression_level = compression_level
+        self._column_encoder = None
+        self.write_mode = WriteMode(write_mode)
+        self.validator = None
+        if self.write_mode is WriteMode.VALIDATE:
+            self.validator = AvroValidator(avro_schema, schema_cache)
+        self.rejected_callback = rejected_callback
+        self.block_index = block_index
+        self.block_records = block_records
+        self.block_callback = block_callback
+        self.counters = WriterCounters()
+        self.output_stream = _CountingStream(output_stream)
+        self.parallel = compression_workers is not None or executor is not None
+        if compression_level is not None and self.codec is AvroCodec.LZ4 and not self.parallel:
+            # fastavro ignores the compression level of lz4
+            raise ValueError("The compression level of 'lz4' requires the parallel compression "
+                             "(compression_workers or executor)")
+        if self.parallel:
+            # The fastavro writer serializes the blocks without compression, and the header is
+            # rewritten with the real codec. The blocks are compressed by the ParallelBlockWriter.
+            self._block_capture = _BlockCapture()
+            writer_options.pop("compression_level", None)
+            self.writer = fastavro._write.Writer(self._block_capture, parsed_schema, AvroCodec.NULL.value,
+                                                 **writer_options)
+            header = read_header(io.BytesIO(self._block_capture.pop()))
+            metadata = dict(header.metadata)
+            metadata[CODEC_KEY] = self.codec.value.encode("utf-8")
+            self.output_stream.write(encode_header(metadata, header.sync_marker))
+            self._block_writer = ParallelBlockWriter(self.output_stream, header.sync_marker, self.codec.value,
+                                                     compression_level, compression_workers, executor,
+                                                     max_pending_blocks, self._register_block)
+        else:
+            # IMPORTANT: I use the private module because the public API hasn't the
+            # the required features.
+            self.writer = fastavro._write.Writer(self.output_stream, parsed_schema, self.codec.value,
+                                                 **writer_options)
+        self.counters.bytes = self.output_stream.bytes_written
+        self.block_bytes = self.writer.sync_interval
+        # Records in the current block and bytes written before it
+        self._block_records = 0
+        self._block_start = self.output_stream.bytes_written
+        # Encoded records (see write_encoded) that are waiting to be written as a block
+        self._encoded_data = bytearray()
+        self._encoded_records = 0
 
     def write(self, row: dict):
         """A method to write an Avro row to the output_stream.
-        
+
         :param row: A row of data that matchs with the current schema.
         :type row: dict
-        :raises AvroMatchingException: When the provided row doesn't match with the current schema.
+        :raises AvroMatchingException: When the provided row doesn't match with the current schema
+        (only in WriteMode.CHECKED).
         """
 
-        try:
+        if self._encoded_records > 0:
+            self._write_encoded_records()
+        if self.validator is not None:
+            reason = self.validator.validate(row)
+            if reason is not None:
+                self._reject(RejectedRow(self.counters.records + self.counters.rejected, row, reason))
+                return
+            self.writer.write(row)
+        elif self.write_mode is WriteMode.TRUSTED:
             self.writer.write(row)
+        else:
+            try:
+                self.writer.write(row)
+            except ValueError as ex:
+                raise AvroMatchingException(f"Exception: {ex} for row -> {row}")
+        if self.block_index is not None:
+            self.block_index.update_stats(row)
+        self._after_write()
+
+    def write_many(self, rows: Iterable[dict]) -> int:
+        """Writes several rows to the output_stream. It's faster than calling write for each row.
+
+        :param rows: The rows. They must match with the current schema.
+        :type rows: Iterable[dict]
+        :raises AvroMatchingException: When a row doesn't match with the current schema
+        (only in WriteMode.CHECKED). The previous rows are already written.
+        :return: The number of written rows.
+        :rtype: int
+        """
+
+        if self._encoded_records > 0:
+            self._write_encoded_records()
+        if self.validator is not None or self.block_index is not None:
+            records = self.counters.records
+            for row in rows:
+                self.write(row)
+            return self.counters.records - records
+
+        writer_write = self.writer.write
+        after_write = self._after_write
+        num_rows = 0
+        row = None
+        if self.write_mode is WriteMode.TRUSTED:
+            for row in rows:
+                writer_write(row)
+                after_write()
+                num_rows += 1
+            return num_rows
+        try:
+            for row in rows:
+                writer_write(row)
+                after_write()
+                num_rows += 1
         except ValueError as ex:
             raise AvroMatchingException(f"Exception: {ex} for row -> {row}")
+        return num_rows
+
+    def write_batch(self, rows: Iterable[dict]) -> List[RejectedRow]:
+        """Validates a batch of rows and writes the valid ones. It requires WriteMode.VALIDATE.
+
+        :param rows: The rows.
+        :type rows: Iterable[dict]
+        :raises ValueError: If the write mode is not WriteMode.VALIDATE.
+        :return: A RejectedRow for each invalid row (the row_index is the position in the batch).
+        They are not sent to the rejected callback.
+        :rtype: List[RejectedRow]
+        """
+
+        if self.validator is None:
+            raise ValueError("write_batch requires the validate write mode")
+        if self._encoded_records > 0:
+            self._write_encoded_records()
+        valid_rows, rejected_rows = self.validator.validate_batch(rows)
+        writer_write = self.writer.write
+        after_write = self._after_write
+        for row in valid_rows:
+            writer_write(row)
+            if self.block_index is not None:
+                self.block_index.update_stats(row)
+            after_write()
+        self.counters.rejected += len(rejected_rows)
+        return rejected_rows
+
+    # The maximum number of rows encoded at the same time by write_columns
+    COLUMN_CHUNK_RECORDS = 65536
+
+    def write_columns(self, columns, masks: dict = None) -> int:
+        """Writes rows from columns, without creating a dict per row (see ColumnEncoder). The rows
+        are encoded in the order of the schema directly from the columns. It requires numpy.
+
+        :param columns: A dict that maps a field name with a numpy array (or masked array) or a list,
+        or a pyarrow RecordBatch or Table. The missing fields must be nullable or have a default value.
+        :param masks: The validity masks (True for the not null values) of some columns, defaults to None
+        :type masks: Dict[str, np.ndarray], optional
+        :raises RuntimeError: If numpy is not installed.
+        :raises ValueError: If a type of the schema is not supported, or the columns haven't the same length.
+        :raises AvroMatchingException: If a column is missing or has values that don't match with the schema
+        (nulls in a not nullable field, NaN, decimals or out of range values in an integer field...).
+        The rows of the previous blocks are already written.
+        :return: The number of written rows.
+        :rtype: int
+        """
+
+        if not self.parallel and self.codec.value not in BLOCK_COMPRESSORS:
+            raise ValueError(f"The codec '{self.codec.value}' is not available for write_columns")
+        if self._encoded_records > 0:
+            self._write_encoded_records()
+        if self._column_encoder is None:
+            self._column_encoder = ColumnEncoder(self.avro_schema)
+        prepared_columns = ColumnEncoder.get_columns(columns, masks)
+        num_rows = get_num_rows(prepared_columns)
+
+        # The rows written by write are sent in their own block
+        if self._block_records > 0:
+            self.writer.dump()
+            self._end_block()
+
+        for chunk_start in range(0, num_rows, self.COLUMN_CHUNK_RECORDS):
+            chunk_end = min(chunk_start + self.COLUMN_CHUNK_RECORDS, num_rows)
+            try:
+                encoded_rows = self._column_encoder.encode(prepared_columns, chunk_start, chunk_end)
+            except ValueError as ex:
+                raise AvroMatchingException(f"Exception: {ex} for rows {chunk_start} to {chunk_end - 1}")
+            first_row = 0
+            for end_row in split_blocks(encoded_rows.row_ends, self.block_bytes, self.block_records):
+                data_start = int(encoded_rows.row_ends[first_row - 1]) if first_row > 0 else 0
+                data_end = int(encoded_rows.row_ends[end_row - 1])
+                if self.block_index is not None:
+                    self._update_column_stats(prepared_columns, chunk_start + first_row, chunk_start + end_row)
+                self._write_encoded_block(end_row - first_row, encoded_rows.data[data_start:data_end].tobytes())
+                first_row = end_row
+        return num_rows
+
+    def write_encoded(self, data: bytes, num_records: int):
+        """Writes records that are already encoded with the schema of the writer (see encode_records),
+        without decoding them. They are joined in a block until it reaches block_bytes (or block_records
+        rows), but the data of a call is never split between blocks. The records are not validated and
+        the statistics of the blocks are unknown in the block index (they are never discarded by a range).
+
+        :param data: The encoded records, one after another.
+        :type data: bytes
+        :param num_records: The number of records in data.
+        :type num_records: int
+        :raises ValueError: If the number of records is negative, or the codec can't be used
+        to compress the encoded blocks.
+        """
+
+        if not self.parallel and self.codec.value not in BLOCK_COMPRESSORS:
+            raise ValueError(f"The codec '{self.codec.value}' is not available for write_encoded")
+        if num_records < 0:
+            raise ValueError(f"The number of records can't be negative: {num_records}")
+        if num_records == 0:
+            return
+        # The rows written by write are sent in their own block
+        if self._block_records > 0:
+            self.writer.dump()
+            self._end_block()
+
+        self._encoded_data += data
+        self._encoded_records += num_records
+        if len(self._encoded_data) >= self.block_bytes or \
+                (self.block_records is not None and self._encoded_records >= self.block_records):
+            self._write_encoded_records()
+
+    def _write_encoded_records(self):
+        """Writes the encoded records of write_encoded as a block.
+        """
+        data = bytes(self._encoded_data)
+        num_records = self._encoded_records
+        self._encoded_data.clear()
+        self._encoded_records = 0
+        self._write_encoded_block(num_records, data, known_stats=False)
+
+    def _update_column_stats(self, columns: dict, start: int, stop: int):
+        """Updates the statistics of the block index with the values of some rows of the columns.
+        """
+        for field in self.block_index.fields:
+            if field not in columns:
+                continue
+            values, valid = columns[field]
+            values = values[start:stop] if valid is None else values[start:stop][valid[start:stop]]
+            if len(values) > 0:
+                min_value, max_value = values.min(), values.max()
+                self.block_index.update_field_stats(field, getattr(min_value, "item", lambda: min_value)(),
+                                                    getattr(max_value, "item", lambda: max_value)())
+
+    def _write_encoded_block(self, num_records: int, data: bytes, known_stats: bool = True):
+        """Writes a block of rows that are already encoded (without compression).
+        """
+        if self.block_index is not None:
+            self.block_index.end_block(known_stats)
+        if self.parallel:
+            self._block_writer.write_block(num_records, data)
+            self.counters.records += num_records
+        else:
+            self._write_block_data(num_records, compress_block(data, self.codec.value, self.compression_level))
+
+    def write_compressed_block(self, num_records: int, data: bytes):
+        """Writes a block that is already encoded and compressed with the codec of the writer, for example
+        a block copied from another avro file with the same schema and codec. The pending rows are written
+        in their own block before it. Its statistics are unknown in the block index.
+        It is not available in parallel mode.
+
+        :param num_records: The number of records of the block.
+        :type num_records: int
+        :param data: The compressed data of the block (without the count, the size and the sync marker).
+        :type data: bytes
+        :raises ValueError: If the writer is in parallel mode.
+        """
+
+        if self.parallel:
+            raise ValueError("write_compressed_block is not available in parallel mode")
+        if self._encoded_records > 0:
+            self._write_encoded_records()
+        if self._block_records > 0:
+            self.writer.dump()
+            self._end_block()
+        if self.block_index is not None:
+            self.block_index.end_block(known_stats=False)
+        self._write_block_data(num_records, data)
+
+    def _write_block_data(self, num_records: int, compressed_data: bytes):
+        """Writes a compressed block to the output stream, with the sync marker of the writer.
+        """
+        self.output_stream.write(encode_long(num_records) + encode_long(len(compressed_data)) +
+                                 compressed_data + self.writer.sync_marker)
+        self._register_block(num_records, self.output_stream.bytes_written - self._block_start)
+        self._block_start = self.output_stream.bytes_written
+        self.counters.records += num_records
+
+    def _reject(self, rejected_row: RejectedRow):
+        """Counts an invalid row and sends it to the rejected callback.
+        """
+        self.counters.rejected += 1
+        if self.rejected_callback is not None:
+            self.rejected_callback(rejected_row)
+
+    def _after_write(self):
+        """Updates the counters after a row is written, and writes the block if it's full.
+        """
+        self.counters.records += 1
+        self._block_records += 1
+        if self.writer.block_count == 0:
+            # The writer has written the block because it reached the sync interval
+            self._end_block()
+        elif self.block_records is not None and self._block_records >= self.block_records:
+            self.writer.dump()
+            self._end_block()
+
+    def _end_block(self):
+        """Called when the fastavro writer has written a block.
+        """
+        if self.block_index is not None:
+            self.block_index.end_block()
+        if self.parallel:
+            # The captured data is a block without compression: count, size, data and sync marker
+            block = io.BytesIO(self._block_capture.pop())
+            num_records = read_long(block)
+            data = block.read(read_long(block))
+            self._block_writer.write_block(num_records, data)
+        else:
+            self._register_block(self._block_records, self.output_stream.bytes_written - self._block_start)
+            self._block_start = self.output_stream.bytes_written
+        self._block_records = 0
+
+    def _register_block(self, num_records: int, num_bytes: int):
+        """Updates the counters after a block is written to the output stream.
+        """
+        block_info = BlockInfo(self.counters.blocks, num_records, num_bytes)
+        self.counters.blocks += 1
+        self.counters.bytes = self.output_stream.bytes_written
+        if self.block_index is not None:
+            self.block_index.add_block(self.counters.bytes - num_bytes, num_records, num_bytes)
+        if self.block_callback is not None:
+            self.block_callback(block_info)
 
     def close(self):
         """Sends the buffer reamining data and closes the output stream
         """
 
-        self.writer.flush()
\ No newline at end of file
+        if self._encoded_records > 0:
+            self._write_encoded_records()
+        self.writer.flush()
+        if self._block_records > 0:
+            self._end_block()
+        if self.parallel:
+            self._block_writer.close()
+            if hasattr(self.output_stream, "flush"):
+                self.output_stream.flush()
+        self.counters.bytes = self.output_stream.bytes_written
@@ -0,0 +1,286 @@
+import base64
+import bisect
+import json
+import uuid
+from collections import deque
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional
+
+from SwissKnife.avro.types import Record
+
+# The suffix of the sidecar index of an avro file
+INDEX_SUFFIX = ".index.json"
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_stat_value(value: object) -> object:
+    """Encodes a value of the statistics for JSON. The numbers, strings and booleans are not changed, and
+    the values of the logical types (datetime, date, time, Decimal, UUID) and bytes are encoded as
+    a {"type": ..., "value": ...} dict, so they are restored with the same type by decode_stat_value.
+
+    :param value: The value.
+    :type value: object
+    :raises TypeError: If the type of the value is not supported.
+    :return: A value that can be serialized to JSON.
+    :rtype: object
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            return {"type": "datetime", "value": (value - _EPOCH) // _MICROSECOND}
+        return {"type": "datetime-utc", "value": (value - _EPOCH_UTC) // _MICROSECOND}
+    if isinstance(value, date):
+        return {"type": "date", "value": value.toordinal()}
+    if isinstance(value, time):
+        return {"type": "time", "value": ((value.hour * 60 + value.minute) * 60 + value.second) * 1000000 +
+                value.microsecond}
+    if isinstance(value, Decimal):
+        return {"type": "decimal", "value": str(value)}
+    if isinstance(value, uuid.UUID):
+        return {"type": "uuid", "value": str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {"type": "bytes", "value": base64.b64encode(value).decode("ascii")}
+    raise TypeError(f"The statistics of type {type(value).__name__} can not be saved: {value!r}")
+
+
+def decode_stat_value(value: object) -> object:
+    """Decodes a value encoded by encode_stat_value.
+
+    :param value: The encoded value.
+    :type value: object
+    :raises ValueError: If the type of an encoded value is unknown.
+    :return: The original value.
+    :rtype: object
+    """
+    if not isinstance(value, dict):
+        return value
+    value_type, encoded_value = value["type"], value["value"]
+    if value_type == "datetime":
+        return _EPOCH + encoded_value * _MICROSECOND
+    if value_type == "datetime-utc":
+        return _EPOCH_UTC + encoded_value * _MICROSECOND
+    if value_type == "date":
+        return date.fromordinal(encoded_value)
+    if value_type == "time":
+        return (datetime.min + encoded_value * _MICROSECOND).time()
+    if value_type == "decimal":
+        return Decimal(encoded_value)
+    if value_type == "uuid":
+        return uuid.UUID(encoded_value)
+    if value_type == "bytes":
+        return base64.b64decode(encoded_value)
+    raise ValueError(f"Unknown type of a statistics value: {value_type}")
+
+
+class BlockIndexEntry(NamedTuple):
+    """
+    The position and statistics of a block of an avro file:
+        - offset: The position of the first byte of the block.
+        - records: The number of records.
+        - first_record: The number of the first record of the block in the file (starting at 0).
+        - size: The size of the block, including the sync marker.
+        - stats: The [min, max] values of each indexed field. A field without values (all None) is not included.
+          It is None if the statistics of the block are unknown (e.g. blocks written by AvroWriter.write_encoded).
+    """
+    offset: int
+    records: int
+    first_record: int
+    size: int
+    stats: Optional[Dict[str, list]]
+
+
+def get_index_path(avro_path: str) -> str:
+    """Gets the path of the sidecar index of an avro file.
+
+    :param avro_path: The path of the avro file.
+    :type avro_path: str
+    :return: The path of the index.
+    :rtype: str
+    """
+    return avro_path + INDEX_SUFFIX
+
+
+class BlockIndex(object):
+    """
+    An index of the blocks of an avro file, with the min and max values of some fields in each block.
+    It is filled by an AvroWriter (see its block_index argument) and saved as a JSON sidecar file.
+    The readers use it to find the block of a record number, or to skip the blocks that
+    can't contain the values of a range (see AvroReader.read_record and AvroReader.read_range).
+    The statistics only use the top-level fields, and their values must be comparable (numbers, strings,
+    bytes or the values of the logical types, see encode_stat_value).
+    """
+
+    def __init__(self, fields: List[str] = None, entries: List[BlockIndexEntry] = None):
+        """BlockIndex constructor
+
+        :param fields: The fields with statistics, defaults to None (no statistics)
+        :type fields: List[str], optional
+        :param entries: The entries of the blocks, defaults to None (an empty index)
+        :type entries: List[BlockIndexEntry], optional
+        """
+        self.fields = list(fields or [])
+        self.entries = list(entries or [])
+        self.num_records = sum(entry.records for entry in self.entries)
+        # The statistics of the block that is being written, and of the finished blocks not added yet
+        self._block_stats = {}
+        self._pending_stats = deque()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def update_stats(self, record: Record):
+        """Updates the statistics of the current block with a written record.
+
+        :param record: The record.
+        :type record: Record
+        """
+        block_stats = self._block_stats
+        for field in self.fields:
+            value = record.get(field)
+            if value is None:
+                continue
+            bounds = block_stats.get(field)
+            if bounds is None:
+                block_stats[field] = [value, value]
+            elif value < bounds[0]:
+                bounds[0] = value
+            elif value > bounds[1]:
+                bounds[1] = value
+
+    def update_field_stats(self, field: str, min_value: object, max_value: object):
+        """Updates the statistics of a field in the current block with the range of some written values.
+
+        :param field: The field.
+        :type field: str
+        :param min_value: The minimum value.
+        :type min_value: object
+        :param max_value: The maximum value.
+        :type max_value: object
+        """
+        bounds = self._block_stats.get(field)
+        if bounds is None:
+            self._block_stats[field] = [min_value, max_value]
+        else:
+            bounds[0] = min(bounds[0], min_value)
+            bounds[1] = max(bounds[1], max_value)
+
+    def end_block(self, known_stats: bool = True):
+        """Finishes the statistics of the current block. They are used by the next call to add_block.
+
+        :param known_stats: False if the values of the block are unknown (e.g. the records were already encoded),
+        so the block is never discarded by filter_blocks. Defaults to True
+        :type known_stats: bool, optional
+        """
+        self._pending_stats.append(self._block_stats if known_stats else None)
+        self._block_stats = {}
+
+    def add_block(self, offset: int, num_records: int, size: int):
+        """Adds the entry of a written block, with the statistics of the oldest finished block.
+
+        :param offset: The position of the block.
+        :type offset: int
+        :param num_records: The number of records of the block.
+        :type num_records: int
+        :param size: The size of the block.
+        :type size: int
+        """
+        stats = self._pending_stats.popleft() if self._pending_stats else None
+        self.entries.append(BlockIndexEntry(offset, num_records, self.num_records, size, stats))
+        self.num_records += num_records
+
+    def find_block(self, record_number: int) -> int:
+        """Finds the block that contains a record.
+
+        :param record_number: The number of the record in the file (starting at 0).
+        :type record_number: int
+        :raises IndexError: If the record is not in the file.
+        :return: The position of the entry of the block in entries.
+        :rtype: int
+        """
+        if not 0 <= record_number < self.num_records:
+            raise IndexError(f"The record {record_number} is not in the file ({self.num_records} records)")
+        first_records = [entry.first_record for entry in self.entries]
+        return bisect.bisect_right(first_records, record_number) - 1
+
+    def filter_blocks(self, field: str, min_value: object = None, max_value: object = None) -> List[BlockIndexEntry]:
+        """Gets the blocks that can contain values of a field in a range. A block without statistics
+        of the field (e.g. all its values are None) is discarded, and a block with unknown statistics is kept.
+
+        :param field: An indexed field.
+        :type field: str
+        :param min_value: The minimum value (inclusive), defaults to None (no minimum)
+        :type min_value: object, optional
+        :param max_value: The maximum value (inclusive), defaults to None (no maximum)
+        :type max_value: object, optional
+        :raises ValueError: If the field is not indexed.
+        :return: The entries of the blocks, in the order of the file.
+        :rtype: List[BlockIndexEntry]
+        """
+        if field not in self.fields:
+            raise ValueError(f"The field '{field}' is not indexed. Indexed fields: {self.fields}")
+        blocks = []
+        for entry in self.entries:
+            if entry.stats is None:
+                blocks.append(entry)
+                continue
+            bounds = entry.stats.get(field)
+            if bounds is None:
+                continue
+            if (min_value is None or bounds[1] >= min_value) and (max_value is None or bounds[0] <= max_value):
+                blocks.append(entry)
+        return blocks
+
+    def to_dict(self) -> dict:
+        """Returns the index as a dict that can be serialized to JSON.
+
+        :return: A dict with the "fields" and the "blocks".
+        :rtype: dict
+        """
+        return {"fields": self.fields,
+                "blocks": [dict(entry._asdict(),
+                                stats=None if entry.stats is None else
+                                {field: [encode_stat_value(bound) for bound in bounds]
+                                 for field, bounds in entry.stats.items()})
+                           for entry in self.entries]}
+
+    @staticmethod
+    def from_dict(index_dict: dict) -> "BlockIndex":
+        """Creates an index from the result of to_dict.
+
+        :param index_dict: A dict with the "fields" and the "blocks".
+        :type index_dict: dict
+        :return: The index.
+        :rtype: BlockIndex
+        """
+        return BlockIndex(index_dict["fields"], [
+            BlockIndexEntry(**dict(block, stats=None if block["stats"] is None else
+                                   {field: [decode_stat_value(bound) for bound in bounds]
+                                    for field, bounds in block["stats"].items()}))
+            for block in index_dict["blocks"]])
+
+    def save(self, path: str):
+        """Saves the index as a JSON file (see get_index_path).
+
+        :param path: The path of the index file.
+        :type path: str
+        :raises TypeError: If a statistics value can not be saved (see encode_stat_value).
+        """
+        with open(path, "w", encoding="utf-8") as index_file:
+            json.dump(self.to_dict(), index_file)
+
+    @staticmethod
+    def load(path: str) -> "BlockIndex":
+        """Loads an index saved with save.
+
+        :param path: The path of the index file.
+        :type path: str
+        :return: The index.
+        :rtype: BlockIndex
+        """
+        with open(path, encoding="utf-8") as index_file:
+            return BlockIndex.from_dict(json.load(index_file))
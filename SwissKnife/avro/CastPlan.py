@@ -0,0 +1,386 @@
+import sys
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Callable, List, Tuple
+
+from SwissKnife.avro.types import Variables
+
+# A function that builds the cast function of a record schema. It receives the schema and the named types.
+RecordCastBuilder = Callable[[dict, dict], Callable[[object], object]]
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_EPOCH_DATE = date(1970, 1, 1)
+
+
+def _cast_to_int(value: object) -> int:
+    # if empty string
+    if type(value) is str and len(value) == 0:
+        return None
+    else:
+        return int(value)
+
+
+def _cast_to_float(value: object) -> float:
+    if type(value) is str:
+        # if empty string
+        if len(value) == 0:
+            return None
+        # Str value can contains "comma" instead of "dot"
+        else:
+            return float(value.replace(",", "."))
+    else:
+        return float(value)
+
+
+# Cast function of each cast type returned by AvroTransformer._resolve_cast_type
+CAST_FUNCTIONS = {
+    "int": _cast_to_int,
+    "boolean": bool,
+    "double": _cast_to_float,
+    "string": str
+}
+
+# Primitive types that are always cast (like in AvroTransformer._get_casted_value), and their cast type.
+PRIMITIVE_CAST_TYPES = {
+    "int": "int",
+    "long": "int",
+    "boolean": "boolean",
+    "double": "double",
+    "float": "double",
+    "string": "string"
+}
+
+
+# The maximum number of distinct values of a memoized field (see MemoizedCast)
+DEFAULT_MEMO_SIZE = 1024
+
+_NOT_CACHED = object()
+
+
+class MemoizedCast(object):
+    """
+    The cache of a cast function, for the fields with a few distinct values (country, status...).
+    Its function (see the function attribute) reuses the results of the string values already cast,
+    and the string results are interned, so the records share them. When a field has more than max_size
+    distinct values, the cache is removed and the values are cast without it. Only the str values are
+    cached: they are hashable and their casts are immutable.
+    """
+
+    def __init__(self, cast_function: Callable[[object], object], max_size: int = DEFAULT_MEMO_SIZE):
+        """MemoizedCast constructor
+
+        :param cast_function: The cast function of the field.
+        :type cast_function: Callable[[object], object]
+        :param max_size: The maximum number of cached values, defaults to DEFAULT_MEMO_SIZE
+        :type max_size: int, optional
+        """
+        self.cast_function = cast_function
+        self.max_size = max_size
+        self.cache = {}
+        self.enabled = True
+        self.misses = 0
+        self.function = self._create_function()
+
+    def _create_function(self) -> Callable[[object], object]:
+        get_cached = self.cache.get
+        cast_function = self.cast_function
+        memoized_cast = self
+
+        def memoized_function(value: object) -> object:
+            if type(value) is str:
+                result = get_cached(value, _NOT_CACHED)
+                if result is not _NOT_CACHED:
+                    return result
+                if memoized_cast.enabled:
+                    return memoized_cast._add(value)
+            return cast_function(value)
+        return memoized_function
+
+    def _add(self, value: str) -> object:
+        """Casts a value that is not in the cache and adds it.
+        """
+        result = self.cast_function(value)
+        if type(result) is str:
+            result = sys.intern(result)
+        self.misses += 1
+        if len(self.cache) >= self.max_size:
+            # High cardinality: the cache would not be reused
+            self.enabled = False
+            self.cache.clear()
+        else:
+            self.cache[value] = result
+        return result
+
+    def stats(self) -> dict:
+        """Returns the statistics of the cache.
+
+        :return: A dict with the "misses" (values cast without the cache), the "size" (cached values)
+        and "enabled".
+        :rtype: dict
+        """
+        return {"misses": self.misses, "size": len(self.cache), "enabled": self.enabled}
+
+
+class NamedType(object):
+    """
+    A cast function of a named type (record, enum or fixed). It is registered before the cast function is built,
+    so a type can reference itself (recursive records).
+    """
+
+    def __init__(self, matcher: Callable[[object], bool]):
+        self.matcher = matcher
+        self.cast_function = None
+
+    def __call__(self, value: object) -> object:
+        return self.cast_function(value)
+
+
+def register_named_type(schema: dict, named_types: dict, matcher: Callable[[object], bool]) -> NamedType:
+    """
+    Registers a named type with its name and its full name (with namespace).
+    :param schema: The schema of the named type.
+    :type schema: dict
+    :param named_types: A dict that maps a name with a NamedType.
+    :type named_types: dict
+    :param matcher: A function that indicates if a value is of the named type.
+    :type matcher: Callable[[object], bool]
+    :return: The registered NamedType. Its cast_function must be set later.
+    :rtype: NamedType
+    """
+    named_type = NamedType(matcher)
+    name = schema[Variables.NAME]
+    named_types[name] = named_type
+    if Variables.NAMESPACE in schema and "." not in name:
+        named_types[f"{schema[Variables.NAMESPACE]}.{name}"] = named_type
+    return named_type
+
+
+def get_cast_function(avro_type: object,
+                      named_types: dict,
+                      record_cast_builder: RecordCastBuilder) -> Callable[[object], object]:
+    """
+    Builds the cast function ("cast plan") of an avro type: a primitive name, a union (list) or a complex type (dict).
+    The union branches are walked like in AvroTransformer._get_casted_value: "null" keeps None values, and the
+    first primitive type of the list is always used to cast the value. Before it, the complex branches (records,
+    arrays, maps, enums, fixed and bytes) are only used if the value is of their python type. The logical types
+    (timestamp-millis, timestamp-micros, date, time-millis, time-micros and decimal) are always used.
+    :param avro_type: The avro type.
+    :type avro_type: object
+    :param named_types: A dict that maps a name with a NamedType. New named types are added to it.
+    :type named_types: dict
+    :param record_cast_builder: A function that builds the cast function of a record.
+    :type record_cast_builder: RecordCastBuilder
+    :return: A function that casts a value.
+    :rtype: Callable[[object], object]
+    """
+    branches = avro_type if isinstance(avro_type, list) else [avro_type]
+    nullable = False
+    conditional_branches = []
+    selected_function = None
+    for branch in branches:
+        if branch == "null":
+            nullable = True
+        elif isinstance(branch, str) and branch in PRIMITIVE_CAST_TYPES:
+            selected_function = CAST_FUNCTIONS[PRIMITIVE_CAST_TYPES[branch]]
+        else:
+            matcher, cast_function = _get_branch(branch, named_types, record_cast_builder)
+            if matcher is None:
+                selected_function = cast_function
+            elif cast_function is not None:
+                conditional_branches.append((matcher, cast_function))
+        # Only the first castable type is used, like in _get_casted_value
+        if selected_function is not None:
+            break
+
+    return _create_union_function(avro_type, nullable, conditional_branches, selected_function)
+
+
+def _create_union_function(avro_type: object,
+                           nullable: bool,
+                           conditional_branches: List[Tuple[Callable[[object], bool], Callable[[object], object]]],
+                           selected_function: Callable[[object], object]) -> Callable[[object], object]:
+    """
+    Creates the cast function of a union.
+    :param avro_type: The avro type (for error messages).
+    :param nullable: If None values are kept.
+    :param conditional_branches: Pairs of (matcher, cast function), used if the matcher returns True.
+    :param selected_function: The cast function used if there is not a matching branch. It can be None.
+    :return: A function that casts a value.
+    :rtype: Callable[[object], object]
+    """
+    if conditional_branches:
+        conditional_branches = tuple(conditional_branches)
+
+        def union_cast(value: object) -> object:
+            if nullable and value is None:
+                return None
+            for matcher, cast_function in conditional_branches:
+                if matcher(value):
+                    return cast_function(value)
+            if selected_function is not None:
+                return selected_function(value)
+            raise ValueError(f"The value {value} can not be cast to any type of {avro_type}")
+        return union_cast
+    elif selected_function is None:
+        def cast_not_available(value: object) -> object:
+            if nullable and value is None:
+                return None
+            raise ValueError(f"The value {value} can not be cast to any type of {avro_type}")
+        return cast_not_available
+    elif nullable:
+        def nullable_cast(value: object) -> object:
+            if value is None:
+                return None
+            return selected_function(value)
+        return nullable_cast
+    else:
+        return selected_function
+
+
+def _get_branch(avro_type: object,
+                named_types: dict,
+                record_cast_builder: RecordCastBuilder) -> (Callable[[object], bool], Callable[[object], object]):
+    """
+    Gets the matcher and the cast function of a union branch that is not "null" nor a primitive type
+    with a cast type.
+    :param avro_type: The avro type of the branch.
+    :param named_types: A dict that maps a name with a NamedType.
+    :param record_cast_builder: A function that builds the cast function of a record.
+    :return: The matcher and the cast function. The matcher is None if the branch must always be used,
+    and the cast function is None if the branch is not supported.
+    :rtype: (Callable[[object], bool], Callable[[object], object])
+    """
+    if isinstance(avro_type, str):
+        if avro_type == "bytes":
+            return _is_bytes, bytes
+        elif avro_type in named_types:
+            named_type = named_types[avro_type]
+            return named_type.matcher, named_type
+        return _never, None
+
+    if not isinstance(avro_type, dict):
+        return _never, None
+
+    type_name = avro_type[Variables.TYPE]
+    logical_type = avro_type.get(Variables.LOGICAL_TYPE)
+    if logical_type in _LOGICAL_CAST_BUILDERS:
+        return None, _LOGICAL_CAST_BUILDERS[logical_type](avro_type)
+    elif type_name in ("record", "error"):
+        named_type = register_named_type(avro_type, named_types, _is_dict)
+        named_type.cast_function = record_cast_builder(avro_type, named_types)
+        return named_type.matcher, named_type.cast_function
+    elif type_name == "enum":
+        symbols = frozenset(avro_type[Variables.SYMBOLS])
+        named_type = register_named_type(avro_type, named_types, lambda value: type(value) is str and value in symbols)
+        named_type.cast_function = _identity
+        return named_type.matcher, named_type.cast_function
+    elif type_name == "fixed":
+        size = avro_type[Variables.SIZE]
+        named_type = register_named_type(avro_type, named_types,
+                                         lambda value: _is_bytes(value) and len(value) == size)
+        named_type.cast_function = bytes
+        return named_type.matcher, named_type.cast_function
+    elif type_name == "array":
+        items_cast = get_cast_function(avro_type[Variables.ITEMS], named_types, record_cast_builder)
+        return _is_sequence, lambda value: [items_cast(item) for item in value]
+    elif type_name == "map":
+        values_cast = get_cast_function(avro_type[Variables.VALUES], named_types, record_cast_builder)
+        return _is_dict, lambda value: {key: values_cast(item) for key, item in value.items()}
+    elif isinstance(type_name, str) and type_name in PRIMITIVE_CAST_TYPES:
+        # A primitive type written as a dict, like {"type": "string"}
+        return None, CAST_FUNCTIONS[PRIMITIVE_CAST_TYPES[type_name]]
+    return _get_branch(type_name, named_types, record_cast_builder)
+
+
+def _identity(value: object) -> object:
+    return value
+
+
+def _never(value: object) -> bool:
+    return False
+
+
+def _is_bytes(value: object) -> bool:
+    return isinstance(value, (bytes, bytearray))
+
+
+def _is_dict(value: object) -> bool:
+    return isinstance(value, dict)
+
+
+def _is_sequence(value: object) -> bool:
+    return isinstance(value, (list, tuple))
+
+
+def _create_timestamp_cast(unit: timedelta) -> Callable[[object], object]:
+    """
+    Creates the cast function of a timestamp logical type. Datetimes are converted to the number of units
+    from the unix epoch (naive datetimes are considered UTC). Other values are cast to int.
+    """
+    def timestamp_cast(value: object) -> int:
+        if isinstance(value, datetime):
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return (value - _EPOCH) // unit
+        return _cast_to_int(value)
+    return timestamp_cast
+
+
+def _create_date_cast(avro_type: dict) -> Callable[[object], object]:
+    """
+    Creates the cast function of the date logical type. Dates (or "YYYY-MM-DD" strings) are converted to
+    the number of days from the unix epoch. Other values are cast to int.
+    """
+    def date_cast(value: object) -> int:
+        if isinstance(value, datetime):
+            value = value.date()
+        elif type(value) is str and value.count("-") == 2:
+            value = datetime.strptime(value, "%Y-%m-%d").date()
+        if isinstance(value, date):
+            return (value - _EPOCH_DATE).days
+        return _cast_to_int(value)
+    return date_cast
+
+
+def _create_time_cast(unit: timedelta) -> Callable[[object], object]:
+    """
+    Creates the cast function of a time logical type. Times are converted to the number of units
+    from midnight. Other values are cast to int.
+    """
+    def time_cast(value: object) -> int:
+        if isinstance(value, time):
+            return timedelta(hours=value.hour, minutes=value.minute, seconds=value.second,
+                             microseconds=value.microsecond) // unit
+        return _cast_to_int(value)
+    return time_cast
+
+
+def _create_decimal_cast(avro_type: dict) -> Callable[[object], object]:
+    """
+    Creates the cast function of the decimal logical type. Values are converted to a Decimal with
+    the scale of the schema. Str values can contain "comma" instead of "dot".
+    """
+    exponent = Decimal(1).scaleb(-avro_type.get(Variables.SCALE, 0))
+
+    def decimal_cast(value: object) -> Decimal:
+        if type(value) is str:
+            # if empty string
+            if len(value) == 0:
+                return None
+            value = value.replace(",", ".")
+        elif isinstance(value, float):
+            value = repr(value)
+        return Decimal(value).quantize(exponent)
+    return decimal_cast
+
+
+_LOGICAL_CAST_BUILDERS = {
+    "timestamp-millis": lambda avro_type: _create_timestamp_cast(timedelta(milliseconds=1)),
+    "timestamp-micros": lambda avro_type: _create_timestamp_cast(timedelta(microseconds=1)),
+    "local-timestamp-millis": lambda avro_type: _create_timestamp_cast(timedelta(milliseconds=1)),
+    "local-timestamp-micros": lambda avro_type: _create_timestamp_cast(timedelta(microseconds=1)),
+    "date": _create_date_cast,
+    "time-millis": lambda avro_type: _create_time_cast(timedelta(milliseconds=1)),
+    "time-micros": lambda avro_type: _create_time_cast(timedelta(microseconds=1)),
+    "decimal": _create_decimal_cast
+}
@@ -0,0 +1,388 @@
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from SwissKnife.avro.types import Variables
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+try:
+    import pyarrow
+except ModuleNotFoundError:
+    pyarrow = None
+
+INT_RANGE = (-(1 << 31), (1 << 31) - 1)
+
+_NO_DEFAULT = object()
+
+# The numpy unit of the datetime64 columns of each logical type
+DATETIME_UNITS = {
+    "timestamp-millis": "ms",
+    "timestamp-micros": "us",
+    "local-timestamp-millis": "ms",
+    "local-timestamp-micros": "us",
+    "date": "D",
+}
+
+# An encoded part of a field: the bytes of all the rows (in order) and the number of bytes of each row
+EncodedPart = Tuple["np.ndarray", "np.ndarray"]
+
+
+class EncodedRows(NamedTuple):
+    """
+    Rows encoded with the avro binary encoding:
+        - data: The bytes of all the rows, one after another.
+        - row_ends: The position where each row ends in data.
+    """
+    data: "np.ndarray"
+    row_ends: "np.ndarray"
+
+
+def encode_varints(values: "np.ndarray") -> EncodedPart:
+    """Encodes an array of integers as avro longs (zigzag varints) without a python loop.
+
+    :param values: The integers.
+    :type values: np.ndarray
+    :return: The encoded bytes and the number of bytes of each value.
+    :rtype: EncodedPart
+    """
+    values = values.astype(np.int64, copy=False)
+    zigzag = ((values << 1) ^ (values >> 63)).view(np.uint64)
+    lengths = np.ones(len(values), dtype=np.int64)
+    for shift in range(7, 64, 7):
+        lengths += (zigzag >> np.uint64(shift)) != 0
+    width = int(lengths.max()) if len(values) else 1
+    matrix = np.empty((len(values), width), dtype=np.uint8)
+    for position in range(width):
+        byte = ((zigzag >> np.uint64(7 * position)) & np.uint64(0x7F)).astype(np.uint8)
+        # The high bit indicates that there are more bytes
+        matrix[:, position] = byte | ((position < lengths - 1) * 0x80).astype(np.uint8)
+    return matrix[np.arange(width) < lengths[:, None]], lengths
+
+
+def _encode_fixed_size(values: "np.ndarray", dtype: str) -> EncodedPart:
+    data = np.ascontiguousarray(values, dtype=dtype).view(np.uint8).reshape(-1)
+    return data, np.full(len(values), np.dtype(dtype).itemsize, dtype=np.int64)
+
+
+def _encode_buffers(buffers: List[bytes], with_length: bool = True) -> List[EncodedPart]:
+    lengths = np.fromiter(map(len, buffers), dtype=np.int64, count=len(buffers))
+    data = np.frombuffer(b"".join(buffers), dtype=np.uint8)
+    if not with_length:
+        return [(data, lengths)]
+    return [encode_varints(lengths), (data, lengths)]
+
+
+def _to_integers(values: "np.ndarray") -> "np.ndarray":
+    """Converts the values of a column of an integer type to int64. Like the row writer, the floats must be
+    finite and integral, and they are not truncated.
+    """
+    kind = values.dtype.kind
+    if kind in "ib":
+        return values
+    if kind == "u":
+        if values.dtype.itemsize == 8 and len(values) and values.max() > np.iinfo(np.int64).max:
+            raise ValueError("There are values out of the range of long")
+        return values.astype(np.int64)
+    if kind == "f":
+        if not np.isfinite(values).all():
+            raise ValueError("There are NaN or infinite values")
+        if (values != np.trunc(values)).any():
+            raise ValueError("There are values with decimals")
+        if len(values) and (values.min() < -2.0 ** 63 or values.max() >= 2.0 ** 63):
+            raise ValueError("There are values out of the range of long")
+    integers = values.astype(np.int64)
+    if kind == "O" and (integers != values).any():
+        raise ValueError("There are values with decimals")
+    return integers
+
+
+def _encode_long(values: "np.ndarray") -> List[EncodedPart]:
+    return [encode_varints(_to_integers(values))]
+
+
+def _encode_int(values: "np.ndarray") -> List[EncodedPart]:
+    values = _to_integers(values)
+    if len(values) and (values.min() < INT_RANGE[0] or values.max() > INT_RANGE[1]):
+        raise ValueError("There are values out of the range of int")
+    return [encode_varints(values)]
+
+
+def _encode_string(values: "np.ndarray") -> List[EncodedPart]:
+    return _encode_buffers([value.encode("utf-8") for value in values.tolist()])
+
+
+def _encode_bytes(values: "np.ndarray") -> List[EncodedPart]:
+    return _encode_buffers([bytes(value) for value in values.tolist()])
+
+
+PRIMITIVE_ENCODERS = {
+    "boolean": lambda values: [_encode_fixed_size(values.astype(bool), np.uint8)],
+    "int": _encode_int,
+    "long": _encode_long,
+    "float": lambda values: [_encode_fixed_size(values, "<f4")],
+    "double": lambda values: [_encode_fixed_size(values, "<f8")],
+    "string": _encode_string,
+    "bytes": _encode_bytes,
+}
+
+
+def _get_value_encoder(avro_type: object) -> Callable[["np.ndarray"], List[EncodedPart]]:
+    """Gets the function that encodes the values of a (not union) type.
+    """
+    if isinstance(avro_type, str):
+        if avro_type in PRIMITIVE_ENCODERS:
+            return PRIMITIVE_ENCODERS[avro_type]
+        raise ValueError(f"The type {avro_type} is not supported by the column encoder")
+
+    type_name = avro_type[Variables.TYPE]
+    logical_type = avro_type.get(Variables.LOGICAL_TYPE)
+    if logical_type in DATETIME_UNITS and type_name in ("int", "long"):
+        unit = DATETIME_UNITS[logical_type]
+        base_encoder = PRIMITIVE_ENCODERS[type_name]
+
+        def encode_datetime(values: "np.ndarray") -> List[EncodedPart]:
+            if values.dtype.kind == "M":
+                values = values.astype(f"datetime64[{unit}]").astype(np.int64)
+            return base_encoder(values)
+        return encode_datetime
+    if type_name == "enum":
+        symbol_indexes = {symbol: index for index, symbol in enumerate(avro_type[Variables.SYMBOLS])}
+
+        def encode_enum(values: "np.ndarray") -> List[EncodedPart]:
+            try:
+                indexes = [symbol_indexes[value] for value in values.tolist()]
+            except KeyError as ex:
+                raise ValueError(f"{ex} is not a symbol of {avro_type[Variables.NAME]}")
+            return [encode_varints(np.array(indexes, dtype=np.int64))]
+        return encode_enum
+    if type_name == "fixed":
+        size = avro_type[Variables.SIZE]
+
+        def encode_fixed(values: "np.ndarray") -> List[EncodedPart]:
+            buffers = [bytes(value) for value in values.tolist()]
+            if any(len(buffer) != size for buffer in buffers):
+                raise ValueError(f"The values of {avro_type[Variables.NAME]} must have {size} bytes")
+            return _encode_buffers(buffers, with_length=False)
+        return encode_fixed
+    if isinstance(type_name, str) and type_name in PRIMITIVE_ENCODERS:
+        return PRIMITIVE_ENCODERS[type_name]
+    raise ValueError(f"The type {avro_type} is not supported by the column encoder")
+
+
+class _FieldEncoder(NamedTuple):
+    name: str
+    value_encoder: Callable[["np.ndarray"], List[EncodedPart]]
+    # The union indexes of the null and value branches (None if the field is not a union or not nullable)
+    null_index: int
+    value_index: int
+    default: object
+
+
+class ColumnEncoder(object):
+    """
+    Encodes rows with the avro binary encoding directly from columns (a dict of numpy arrays or lists,
+    or a pyarrow RecordBatch or Table), without creating a dict per row. The fields are encoded in the
+    order of the schema, and each part of a field (union index, length and value) is encoded for all
+    the rows at once and copied to its positions in the output.
+    It supports records of primitive types, enums, fixed, the logical types of int and long (from numpy
+    datetime64 columns too) and unions of null and one of these types. The null values of a column
+    are given by a validity mask, a numpy masked array, None values or the validity of a pyarrow column.
+    """
+
+    def __init__(self, avro_schema: dict):
+        """ColumnEncoder constructor
+
+        :param avro_schema: A record schema.
+        :type avro_schema: dict
+        :raises RuntimeError: If numpy is not installed.
+        :raises ValueError: If a type of the schema is not supported.
+        """
+        if np is None:
+            raise RuntimeError("You need install SwissKnife with 'columnar' tag to use ColumnEncoder.")
+
+        self.field_encoders = []
+        for field in avro_schema[Variables.FIELDS]:
+            field_type = field[Variables.TYPE]
+            null_index = value_index = None
+            if isinstance(field_type, list) and len(field_type) == 1:
+                # A union with only one type: its index is always 0
+                value_index = 0
+                field_type = field_type[0]
+            elif isinstance(field_type, list):
+                if len(field_type) != 2 or "null" not in field_type:
+                    raise ValueError(f"The union of the field {field[Variables.NAME]} is not supported by "
+                                     f"the column encoder. Only unions of null and another type are supported")
+                null_index = field_type.index("null")
+                value_index = 1 - null_index
+                field_type = field_type[value_index]
+            self.field_encoders.append(_FieldEncoder(field[Variables.NAME], _get_value_encoder(field_type),
+                                                     null_index, value_index, field.get(Variables.DEFAULT, _NO_DEFAULT)))
+
+    @staticmethod
+    def get_columns(columns, masks: Dict[str, "np.ndarray"] = None) -> Dict[str, Tuple["np.ndarray", "np.ndarray"]]:
+        """Gets the values and the validity mask of each column.
+
+        :param columns: A dict of numpy arrays (or masked arrays) or lists, or a pyarrow RecordBatch or Table.
+        :param masks: The validity masks (True for the not null values) of some columns, defaults to None
+        :type masks: Dict[str, np.ndarray], optional
+        :raises ValueError: If the columns haven't the same length.
+        :return: A dict that maps a column name with its values and its validity mask (None if all are valid).
+        :rtype: Dict[str, Tuple[np.ndarray, np.ndarray]]
+        """
+        prepared_columns = {}
+        if pyarrow is not None and isinstance(columns, (pyarrow.RecordBatch, pyarrow.Table)):
+            for name in columns.schema.names:
+                column = columns.column(name)
+                valid = None
+                if column.null_count > 0:
+                    valid = np.asarray(column.is_valid())
+                    if pyarrow.types.is_integer(column.type):
+                        # Otherwise, the integers with nulls are converted to float64 and they lose precision
+                        column = column.fill_null(0)
+                prepared_columns[name] = (np.asarray(column.to_numpy(zero_copy_only=False)), valid)
+        else:
+            for name, column in columns.items():
+                valid = None
+                if isinstance(column, np.ma.MaskedArray):
+                    valid = ~np.ma.getmaskarray(column)
+                    column = column.data
+                elif not isinstance(column, np.ndarray):
+                    values = np.empty(len(column), dtype=object)
+                    values[:] = column
+                    column = values
+                if column.dtype == object:
+                    not_none = np.not_equal(column, None)
+                    if not not_none.all():
+                        valid = not_none if valid is None else valid & not_none
+                prepared_columns[name] = (column, valid)
+
+        for name, mask in (masks or {}).items():
+            column, valid = prepared_columns[name]
+            mask = np.asarray(mask, dtype=bool)
+            prepared_columns[name] = (column, mask if valid is None else valid & mask)
+
+        lengths = {len(column) for column, _ in prepared_columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All the columns must have the same length. Lengths: {sorted(lengths)}")
+        return prepared_columns
+
+    def encode(self, columns: Dict[str, Tuple["np.ndarray", "np.ndarray"]], start: int = 0,
+               stop: int = None) -> EncodedRows:
+        """Encodes some rows of the columns.
+
+        :param columns: The result of get_columns.
+        :type columns: Dict[str, Tuple[np.ndarray, np.ndarray]]
+        :param start: The first row, defaults to 0
+        :type start: int, optional
+        :param stop: The row after the last one, defaults to None (all the rows)
+        :type stop: int, optional
+        :raises ValueError: If a column is missing or has invalid values.
+        :return: The encoded rows.
+        :rtype: EncodedRows
+        """
+        if stop is None:
+            stop = get_num_rows(columns)
+        num_rows = stop - start
+        parts = []
+        for field_encoder in self.field_encoders:
+            parts += self._encode_field(field_encoder, columns, start, stop, num_rows)
+
+        # The position of each part in each row is the sum of the lengths of the previous parts
+        row_lengths = np.zeros(num_rows, dtype=np.int64)
+        for _, lengths in parts:
+            row_lengths += lengths
+        row_ends = np.cumsum(row_lengths)
+        data = np.empty(int(row_ends[-1]) if num_rows else 0, dtype=np.uint8)
+        part_starts = row_ends - row_lengths
+        for part_data, lengths in parts:
+            if len(part_data):
+                # The position of each byte in its row part, and the start of the row part in the output
+                part_ends = np.cumsum(lengths)
+                offsets = np.arange(len(part_data)) - np.repeat(part_ends - lengths, lengths)
+                data[np.repeat(part_starts, lengths) + offsets] = part_data
+            part_starts = part_starts + lengths
+        return EncodedRows(data, row_ends)
+
+    @staticmethod
+    def _encode_field(field_encoder: _FieldEncoder, columns: dict, start: int, stop: int,
+                      num_rows: int) -> List[EncodedPart]:
+        """Encodes the parts of a field (the union index and the parts of the value).
+        """
+        name = field_encoder.name
+        if name in columns:
+            values, valid = columns[name]
+            values = values[start:stop]
+            valid = None if valid is None else valid[start:stop]
+        elif field_encoder.default is not _NO_DEFAULT:
+            values = np.empty(num_rows, dtype=object)
+            values[:] = [field_encoder.default] * num_rows
+            valid = None if field_encoder.default is not None else np.zeros(num_rows, dtype=bool)
+        elif field_encoder.null_index is not None:
+            values, valid = np.empty(num_rows, dtype=object), np.zeros(num_rows, dtype=bool)
+        else:
+            raise ValueError(f"The column {name} is required")
+
+        if field_encoder.null_index is None:
+            if valid is not None and not valid.all():
+                raise ValueError(f"The column {name} has null values, but its type is not nullable")
+            try:
+                parts = field_encoder.value_encoder(values)
+            except (TypeError, ValueError, AttributeError, OverflowError) as ex:
+                raise ValueError(f"Invalid values in column {name}: {ex}")
+            if field_encoder.value_index is not None:
+                parts.insert(0, encode_varints(np.full(num_rows, field_encoder.value_index)))
+            return parts
+
+        if valid is None:
+            valid = np.ones(num_rows, dtype=bool)
+        # The union index of each row, and the parts of the value (empty for the null rows)
+        parts = [encode_varints(np.where(valid, field_encoder.value_index, field_encoder.null_index))]
+        try:
+            value_parts = field_encoder.value_encoder(values[valid])
+        except (TypeError, ValueError, AttributeError, OverflowError) as ex:
+            raise ValueError(f"Invalid values in column {name}: {ex}")
+        for part_data, lengths in value_parts:
+            row_lengths = np.zeros(num_rows, dtype=np.int64)
+            row_lengths[valid] = lengths
+            parts.append((part_data, row_lengths))
+        return parts
+
+
+def split_blocks(row_ends: "np.ndarray", block_bytes: int, block_records: int = None) -> List[int]:
+    """Divides some encoded rows in blocks, like the avro writer: a block ends with the first row
+    that makes it reach block_bytes, or with block_records rows.
+
+    :param row_ends: The position where each row ends (see EncodedRows).
+    :type row_ends: np.ndarray
+    :param block_bytes: The size that makes a block to be finished.
+    :type block_bytes: int
+    :param block_records: The maximum number of rows of a block, defaults to None (no limit)
+    :type block_records: int, optional
+    :return: The row after the last row of each block.
+    :rtype: List[int]
+    """
+    block_ends = []
+    first_row = 0
+    while first_row < len(row_ends):
+        block_start = int(row_ends[first_row - 1]) if first_row > 0 else 0
+        end_row = min(int(np.searchsorted(row_ends, block_start + block_bytes, side="left")) + 1, len(row_ends))
+        if block_records is not None:
+            end_row = min(end_row, first_row + block_records)
+        block_ends.append(end_row)
+        first_row = end_row
+    return block_ends
+
+
+def get_num_rows(columns: Dict[str, Tuple["np.ndarray", "np.ndarray"]]) -> int:
+    """Gets the number of rows of the result of ColumnEncoder.get_columns.
+
+    :param columns: The columns.
+    :type columns: Dict[str, Tuple[np.ndarray, np.ndarray]]
+    :return: The number of rows (0 if there are not columns).
+    :rtype: int
+    """
+    for values, _ in columns.values():
+        return len(values)
+    return 0
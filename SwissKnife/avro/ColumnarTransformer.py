@@ -0,0 +1,425 @@
+from typing import Callable, Dict, Iterable, NamedTuple
+
+from SwissKnife.avro.AvroTransformer import AvroTransformer, NoDefault
+from SwissKnife.avro.CastPlan import PRIMITIVE_CAST_TYPES
+from SwissKnife.avro.TransformRegistry import TransformRegistry, _copy_from_factory, _int2boolean_factory
+from SwissKnife.avro.types import Variables
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+try:
+    import pyarrow
+except ModuleNotFoundError:
+    pyarrow = None
+
+
+class ColumnarResult(NamedTuple):
+    """
+    The result of a columnar transformation:
+        - columns: A dict that maps each field of the schema (in schema order) with a numpy array.
+        - valid: A boolean numpy array. It is False for the rows with a value that can not be cast.
+          The invalid values are replaced with None.
+    """
+    columns: Dict[str, "np.ndarray"]
+    valid: "np.ndarray"
+
+
+class ColumnarTransformer(object):
+    """
+    ColumnarTransformer applies the transformations of an AvroTransformer to columns
+    (a dict of numpy arrays or lists, or a pyarrow Table) instead of records:
+        - Renames are column relabeling.
+        - copyFrom is a column alias.
+        - int2boolean and the casts are vectorized when the type of the column allows it.
+          Otherwise, the cast function of the AvroTransformer is applied to each value,
+          so the result is always the same as the one of apply_all_transforms.
+    The transforms are only vectorized when they are the built-in ones in the registry of the transformer.
+    The other transforms (and the overridden ones) are applied to each row.
+    A column is present in all the rows or in none of them.
+    """
+
+    def __init__(self, avro_transformer: AvroTransformer):
+        """
+        ColumnarTransformer constructor.
+        :param avro_transformer: The transformer whose schema will be used.
+        :type avro_transformer: AvroTransformer
+        :raises RuntimeError: If numpy is not installed.
+        """
+        if np is None:
+            raise RuntimeError("You need install SwissKnife with 'columnar' tag to use ColumnarTransformer.")
+
+        self.avro_transformer = avro_transformer
+        self.transform_names_dict = {
+            field[Variables.NAME]: field[Variables.TRANSFORM]
+            for field in avro_transformer.get_original_schema()[Variables.FIELDS]
+            if Variables.TRANSFORM in field
+        }
+        # The name and arguments of the transforms with a vectorized version
+        self.vectorized_transforms_dict = {
+            field_name: vectorized_transform
+            for field_name, vectorized_transform in (
+                (field_name, ColumnarTransformer._get_vectorized_transform(transform_name,
+                                                                           avro_transformer.transform_registry))
+                for field_name, transform_name in self.transform_names_dict.items())
+            if vectorized_transform is not None
+        }
+        # Only the fields with primitive types are vectorized
+        self.cast_types_dict = {
+            field_name: AvroTransformer._resolve_cast_type(types_list)
+            for field_name, types_list in avro_transformer.cast_dict.items()
+            if isinstance(types_list, list) and all(
+                isinstance(avro_type, str) and (avro_type == "null" or avro_type in PRIMITIVE_CAST_TYPES)
+                for avro_type in types_list)
+        }
+
+    def transform(self, columns) -> ColumnarResult:
+        """
+        Applies all the transformations to a set of columns.
+        :param columns: A dict that maps a field name with a numpy array or a list, or a pyarrow Table.
+        :type columns: Union[Dict[str, Union[np.ndarray, list]], pyarrow.Table]
+        :raises ValueError: If the columns haven't the same length.
+        :raises RuntimeError: If a required field is not in the columns or a transform is invalid.
+        :return: The transformed columns and the validity mask.
+        :rtype: ColumnarResult
+        """
+        input_columns, null_masks = ColumnarTransformer._to_numpy_columns(columns)
+        num_rows = ColumnarTransformer._get_num_rows(input_columns)
+
+        renamed_columns = {}
+        renamed_null_masks = {}
+        rename_dict = self.avro_transformer.rename_dict
+        for key, column in input_columns.items():
+            if key in rename_dict:
+                renamed_columns[rename_dict[key]] = column
+                if key in null_masks:
+                    renamed_null_masks[rename_dict[key]] = null_masks[key]
+
+        valid = np.ones(num_rows, dtype=bool)
+        transformed_columns = {}
+        transformed_null_masks = {}
+        nullable_columns = None
+        for key, column in renamed_columns.items():
+            if key in self.transform_names_dict:
+                if nullable_columns is None:
+                    # The transform functions receive the null values as None
+                    nullable_columns = {
+                        name: ColumnarTransformer._with_nulls(renamed_column, renamed_null_masks.get(name))
+                        for name, renamed_column in renamed_columns.items()
+                    }
+                column, invalid = self._get_transformed_column(key, nullable_columns[key], nullable_columns)
+                valid &= ~invalid
+            elif key in renamed_null_masks:
+                transformed_null_masks[key] = renamed_null_masks[key]
+            transformed_columns[key] = column
+
+        result_columns = {}
+        for key, defaults_value in self.avro_transformer.defaults_dict.items():
+            if key in transformed_columns:
+                column, invalid = self._get_casted_column(key, transformed_columns[key])
+                if key in transformed_null_masks:
+                    column, invalid = self._set_null_values(key, column, invalid, transformed_null_masks[key])
+                valid &= ~invalid
+            elif defaults_value is NoDefault:
+                raise RuntimeError(f"Required {key} not in columns")
+            else:
+                column = self._get_defaults_column(key, defaults_value, num_rows)
+                if column is None:
+                    column = np.full(num_rows, None, dtype=object)
+                    valid[:] = False
+            result_columns[key] = column
+
+        return ColumnarResult(result_columns, valid)
+
+    @staticmethod
+    def _to_numpy_columns(columns) -> (Dict[str, "np.ndarray"], Dict[str, "np.ndarray"]):
+        """
+        Converts the input columns to a dict of numpy arrays.
+        The null values of a numeric pyarrow column are filled with 0 (numpy has no null integers),
+        and its null mask is returned, so they are set to None after the cast. The null values of the other
+        pyarrow columns are None.
+        :param columns: A dict of numpy arrays or lists, or a pyarrow Table.
+        :return: A dict that maps a column name with a numpy array, and a dict that maps the name
+        of a column with null values with its null mask.
+        :rtype: (Dict[str, np.ndarray], Dict[str, np.ndarray])
+        """
+        if pyarrow is not None and isinstance(columns, pyarrow.Table):
+            numpy_columns = {}
+            null_masks = {}
+            for name in columns.column_names:
+                column = columns.column(name)
+                if column.null_count == 0:
+                    numpy_columns[name] = column.to_numpy()
+                    continue
+                null_mask = column.is_null().to_numpy()
+                if pyarrow.types.is_integer(column.type) or pyarrow.types.is_floating(column.type):
+                    numpy_columns[name] = column.fill_null(0).to_numpy()
+                    null_masks[name] = null_mask
+                else:
+                    numpy_columns[name] = ColumnarTransformer._with_nulls(column.to_numpy(), null_mask)
+            return numpy_columns, null_masks
+
+        numpy_columns = {}
+        for name, column in columns.items():
+            if isinstance(column, np.ndarray):
+                numpy_columns[name] = column
+            else:
+                numpy_columns[name] = np.asarray(column)
+                # Lists of lists or dicts are not columns of scalar values
+                if numpy_columns[name].ndim != 1:
+                    numpy_columns[name] = np.empty(len(column), dtype=object)
+                    numpy_columns[name][:] = column
+        return numpy_columns, {}
+
+    @staticmethod
+    def _with_nulls(column: "np.ndarray", null_mask: "np.ndarray") -> "np.ndarray":
+        """
+        Sets the null values of a column to None.
+        :param column: The column.
+        :type column: np.ndarray
+        :param null_mask: The null mask of the column, or None if it has no null values.
+        :type null_mask: np.ndarray
+        :return: The column (with dtype object if it has null values).
+        :rtype: np.ndarray
+        """
+        if null_mask is None or not null_mask.any():
+            return column
+        column = column.astype(object)
+        column[null_mask] = None
+        return column
+
+    @staticmethod
+    def _get_num_rows(columns: Dict[str, "np.ndarray"]) -> int:
+        """
+        Gets the number of rows of a set of columns.
+        :param columns: A dict of numpy arrays.
+        :type columns: Dict[str, np.ndarray]
+        :raises ValueError: If the columns haven't the same length.
+        :return: The number of rows.
+        :rtype: int
+        """
+        lengths = {len(column) for column in columns.values()}
+        if len(lengths) > 1:
+            raise ValueError(f"All the columns must have the same length. Lengths: {sorted(lengths)}")
+        return lengths.pop() if lengths else 0
+
+    def _get_transformed_column(self,
+                                key: str,
+                                column: "np.ndarray",
+                                renamed_columns: Dict[str, "np.ndarray"]) -> ("np.ndarray", "np.ndarray"):
+        """
+        Applies the transform function of a field to its column.
+        :param key: The field name.
+        :type key: str
+        :param column: The column.
+        :type column: np.ndarray
+        :param renamed_columns: All the columns, before the transformations.
+        :type renamed_columns: Dict[str, np.ndarray]
+        :raises RuntimeError: copyFrom raises exception if the provided field is invalid.
+        :return: The transformed column and a mask with the values that can not be transformed.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        transform_function = self.avro_transformer.transform_dict[key]
+        name, args = self.vectorized_transforms_dict.get(key, (None, None))
+        if name == "int2boolean":
+            return ColumnarTransformer._int2boolean(column, transform_function)
+        if name == "copyFrom":
+            copied_field = str(args[0])
+            if copied_field not in renamed_columns:
+                raise RuntimeError("Invalid field in copyFrom")
+            return renamed_columns[copied_field], np.zeros(len(column), dtype=bool)
+
+        # There is not a vectorized version, so the transform function is applied to each row.
+        names = list(renamed_columns.keys())
+        rows = (dict(zip(names, row_values))
+                for row_values in zip(*[renamed_columns[name].tolist() for name in names]))
+        return ColumnarTransformer._apply_elementwise(zip(column.tolist(), rows),
+                                                      lambda value_and_row: transform_function(*value_and_row),
+                                                      len(column))
+
+    @staticmethod
+    def _get_vectorized_transform(transform_name: str, transform_registry: TransformRegistry) -> tuple:
+        """
+        Gets the name and the arguments of a transform if it has a vectorized version: it is a single call
+        of a built-in transform (int2boolean or copyFrom) that has not been overridden in the registry.
+        :param transform_name: The transform expression.
+        :type transform_name: str
+        :param transform_registry: The registry of the transformer.
+        :type transform_registry: TransformRegistry
+        :return: A (name, arguments) tuple, or None if the transform must be applied to each row.
+        :rtype: tuple
+        """
+        calls = TransformRegistry._parse(transform_name)
+        if len(calls) != 1:
+            return None
+        name, args = calls[0]
+        builtin_factory = {"int2boolean": _int2boolean_factory, "copyFrom": _copy_from_factory}.get(name)
+        if builtin_factory is None or transform_registry.get_factory(name) is not builtin_factory:
+            return None
+        return name, args
+
+    @staticmethod
+    def _int2boolean(column: "np.ndarray",
+                     int2boolean: Callable[[object, dict], object]) -> ("np.ndarray", "np.ndarray"):
+        """
+        Vectorized version of the int2boolean transform function.
+        :param column: The column.
+        :type column: np.ndarray
+        :param int2boolean: The int2boolean transform function, used when the column is not numeric.
+        :type int2boolean: Callable[[object, dict], object]
+        :return: The transformed column and a mask with the values that can not be transformed.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        if column.dtype.kind in "biu":
+            return column > 0, np.zeros(len(column), dtype=bool)
+        elif column.dtype.kind == "f" and np.isfinite(column).all():
+            # int(value) truncates the value
+            return np.trunc(column) > 0, np.zeros(len(column), dtype=bool)
+        return ColumnarTransformer._apply_elementwise(column.tolist(), lambda value: int2boolean(value, None),
+                                                      len(column))
+
+    def _get_casted_column(self, key: str, column: "np.ndarray") -> ("np.ndarray", "np.ndarray"):
+        """
+        Casts a column to the type of its field. The cast is vectorized if the type of the column allows it.
+        :param key: The field name.
+        :type key: str
+        :param column: The column.
+        :type column: np.ndarray
+        :return: The casted column and a mask with the values that can not be cast.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        _, cast_type = self.cast_types_dict.get(key, (True, None))
+        cast_function = self.avro_transformer.cast_functions_dict[key]
+        kind = column.dtype.kind
+        no_errors = np.zeros(len(column), dtype=bool)
+
+        if cast_type == "int" and kind in "biu":
+            return column.astype(np.int64), no_errors
+        elif cast_type == "int" and kind == "f":
+            invalid = ~np.isfinite(column)
+            if not invalid.any():
+                return column.astype(np.int64), no_errors
+        elif cast_type == "int" and kind == "U":
+            return ColumnarTransformer._cast_strings(column, np.int64, column, cast_function)
+        elif cast_type == "double" and kind in "biuf":
+            return column.astype(np.float64), no_errors
+        elif cast_type == "double" and kind == "U":
+            # Str value can contains "comma" instead of "dot"
+            return ColumnarTransformer._cast_strings(column, np.float64, np.char.replace(column, ",", "."),
+                                                     cast_function)
+        elif cast_type == "boolean" and kind == "b":
+            return column, no_errors
+        elif cast_type == "boolean" and kind in "iuf":
+            return column != 0, no_errors
+        elif cast_type == "boolean" and kind == "U":
+            return np.char.str_len(column) > 0, no_errors
+        elif cast_type == "string" and kind == "U":
+            return column, no_errors
+        elif cast_type == "string" and kind in "biuf":
+            return column.astype(str), no_errors
+
+        return ColumnarTransformer._apply_elementwise(column.tolist(), cast_function, len(column))
+
+    def _set_null_values(self,
+                         key: str,
+                         column: "np.ndarray",
+                         invalid: "np.ndarray",
+                         null_mask: "np.ndarray") -> ("np.ndarray", "np.ndarray"):
+        """
+        Sets the null values of a casted column to the casted None, as the cast function does.
+        :param key: The field name.
+        :type key: str
+        :param column: The casted column.
+        :type column: np.ndarray
+        :param invalid: The mask with the values that can not be cast.
+        :type invalid: np.ndarray
+        :param null_mask: The null mask of the column.
+        :type null_mask: np.ndarray
+        :return: The casted column and a mask with the values that can not be cast.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        column = column.astype(object)
+        try:
+            column[null_mask] = self.avro_transformer.cast_functions_dict[key](None)
+        except Exception:
+            # The field is not nullable
+            column[null_mask] = None
+            invalid = invalid | null_mask
+        return column, invalid
+
+    @staticmethod
+    def _cast_strings(column: "np.ndarray",
+                      dtype: type,
+                      cleaned_column: "np.ndarray",
+                      cast_function: Callable[[object], object]) -> ("np.ndarray", "np.ndarray"):
+        """
+        Casts a column of strings to a numeric type. Empty strings are casted to None.
+        :param column: The original column.
+        :type column: np.ndarray
+        :param dtype: The numeric type.
+        :type dtype: type
+        :param cleaned_column: The column prepared to be cast by numpy.
+        :type cleaned_column: np.ndarray
+        :param cast_function: The cast function of the field, used if numpy can not cast some values.
+        :type cast_function: Callable[[object], object]
+        :return: The casted column and a mask with the values that can not be cast.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        empty = np.char.str_len(column) == 0
+        no_errors = np.zeros(len(column), dtype=bool)
+        try:
+            if not empty.any():
+                return cleaned_column.astype(dtype), no_errors
+            casted_column = np.full(len(column), None, dtype=object)
+            casted_column[~empty] = cleaned_column[~empty].astype(dtype)
+            return casted_column, no_errors
+        except (ValueError, OverflowError):
+            # Some values are invalid, so they are cast one by one to find them.
+            return ColumnarTransformer._apply_elementwise(column.tolist(), cast_function, len(column))
+
+    @staticmethod
+    def _apply_elementwise(values: Iterable,
+                           function: Callable[[object], object],
+                           num_rows: int) -> ("np.ndarray", "np.ndarray"):
+        """
+        Applies a function to each value of a column. The values that raise an exception
+        are replaced with None and marked as invalid.
+        :param values: The values of the column.
+        :type values: Iterable
+        :param function: The function to apply.
+        :type function: Callable[[object], object]
+        :param num_rows: The number of values.
+        :type num_rows: int
+        :return: The new column (with dtype object) and a mask with the values that raise an exception.
+        :rtype: (np.ndarray, np.ndarray)
+        """
+        new_column = np.empty(num_rows, dtype=object)
+        invalid = np.zeros(num_rows, dtype=bool)
+        for index, value in enumerate(values):
+            try:
+                new_column[index] = function(value)
+            except Exception:
+                invalid[index] = True
+        return new_column, invalid
+
+    def _get_defaults_column(self, key: str, defaults_value: object, num_rows: int) -> "np.ndarray":
+        """
+        Creates a column with the casted default value of a field.
+        :param key: The field name.
+        :type key: str
+        :param defaults_value: The default value.
+        :type defaults_value: object
+        :param num_rows: The number of rows.
+        :type num_rows: int
+        :return: The column, or None if the default value can not be cast.
+        :rtype: np.ndarray
+        """
+        try:
+            casted_value = self.avro_transformer.cast_functions_dict[key](defaults_value)
+        except Exception:
+            return None
+        if casted_value is None or isinstance(casted_value, str):
+            return np.full(num_rows, casted_value, dtype=object)
+        return np.full(num_rows, casted_value)
@@ -0,0 +1,136 @@
+import csv
+import io
+from itertools import chain, islice
+from typing import Callable, List, Union
+
+from SwissKnife.avro.AvroTransformer import AvroTransformer, ErrorPolicy, TransformError
+from SwissKnife.avro.OutputFormat import OutputFormat, create_writer
+from SwissKnife.avro.StreamUtils import open_input_stream, open_output_stream
+from SwissKnife.avro.types import Record
+
+
+class CsvToAvroConverter(object):
+    """
+    Converts CSV files to avro files in a streaming way: the CSV rows are read, transformed
+    (using an AvroTransformer) and written in chunks, so the used memory doesn't depend on the file size.
+    The CSV header is mapped to the fields of the schema with the aliases of the AvroTransformer, and the
+    columns that are not in the schema are ignored.
+    """
+
+    def __init__(self,
+                 avro_transformer: Union[AvroTransformer, dict],
+                 chunk_size: int = 10000,
+                 delimiter: str = ",",
+                 encoding: str = "utf-8",
+                 on_error: ErrorPolicy = ErrorPolicy.RAISE,
+                 dead_letter_sink: Callable[[TransformError], None] = None,
+                 output_format: OutputFormat = OutputFormat.AVRO,
+                 writer_options: dict = None):
+        """CsvToAvroConverter constructor
+
+        :param avro_transformer: The AvroTransformer (or the avro schema) used to transform the rows.
+        :type avro_transformer: Union[AvroTransformer, dict]
+        :param chunk_size: The number of rows read, transformed and written at once, defaults to 10000
+        :type chunk_size: int, optional
+        :param delimiter: The CSV delimiter, defaults to ","
+        :type delimiter: str, optional
+        :param encoding: The encoding of the CSV file, defaults to "utf-8"
+        :type encoding: str, optional
+        :param on_error: What to do with the rows that can not be transformed, defaults to ErrorPolicy.RAISE
+        :type on_error: ErrorPolicy, optional
+        :param dead_letter_sink: A function that receives a TransformError for each invalid row.
+        Required with the ErrorPolicy.DEAD_LETTER policy.
+        :type dead_letter_sink: Callable[[TransformError], None], optional
+        :param output_format: The format of the output files ("avro" or "parquet"), defaults to OutputFormat.AVRO
+        :type output_format: OutputFormat, optional
+        :param writer_options: Other arguments of the writer (see create_writer), defaults to None
+        :type writer_options: dict, optional
+        """
+        if isinstance(avro_transformer, dict):
+            avro_transformer = AvroTransformer(avro_transformer)
+        self.avro_transformer = avro_transformer
+        self.chunk_size = chunk_size
+        self.delimiter = delimiter
+        self.encoding = encoding
+        self.on_error = ErrorPolicy(on_error)
+        self.dead_letter_sink = dead_letter_sink
+        self.output_format = OutputFormat(output_format)
+        self.writer_options = writer_options or {}
+
+    def convert(self, source, output) -> dict:
+        """Converts a CSV file to an avro file (or a file of the output format).
+
+        :param source: The CSV file: a local path, a file-like object (binary or text) or a Google Storage blob.
+        :param output: The output file: a local path or a binary file-like object (for example, GCloudStreaming).
+        :raises AvroTransformException: With the ErrorPolicy.RAISE policy, when a row is invalid.
+        :return: The counters of the conversion ("read", "transformed", "failed", "skipped", "dead_lettered").
+        :rtype: dict
+        """
+        counters_before = self.avro_transformer.counters.to_dict()
+
+        input_stream, close_input = open_input_stream(source)
+        output_stream, close_output = open_output_stream(output)
+        text_stream = input_stream if isinstance(input_stream, io.TextIOBase) else \
+            io.TextIOWrapper(input_stream, encoding=self.encoding, newline="")
+        try:
+            avro_writer = create_writer(output_stream, self.avro_transformer.get_original_schema(),
+                                        self.output_format, **self.writer_options)
+
+            records = chain.from_iterable(self.read_chunks(text_stream))
+            avro_writer.write_many(self.avro_transformer.transform_iter(records, self.on_error, self.dead_letter_sink))
+            avro_writer.close()
+        finally:
+            if close_input:
+                text_stream.close()
+            elif text_stream is not input_stream:
+                # The wrapper must not close a stream provided by the caller
+                text_stream.detach()
+            if close_output:
+                output_stream.close()
+
+        counters_after = self.avro_transformer.counters.to_dict()
+        return {name: value - counters_before[name] for name, value in counters_after.items()}
+
+    def read_chunks(self, text_stream: io.TextIOBase):
+        """Reads the rows of a CSV stream in chunks. Each row is a record with the fields of the schema
+        (already renamed) that are in the CSV header.
+
+        :param text_stream: A text stream with CSV data. The first line is the header.
+        :type text_stream: io.TextIOBase
+        :return: An iterator of lists of records, with chunk_size records at most.
+        :rtype: Iterator[List[Record]]
+        """
+        csv_reader = csv.reader(text_stream, delimiter=self.delimiter)
+        header = next(csv_reader, None)
+        if header is None:
+            return
+
+        # Pairs of (column position, field name), in header order. Columns not in the schema are ignored.
+        rename_dict = self.avro_transformer.rename_dict
+        selected_columns = [(position, rename_dict[name]) for position, name in enumerate(header)
+                            if name in rename_dict]
+        num_columns = len(header)
+
+        while True:
+            chunk = [CsvToAvroConverter._create_record(row, selected_columns, num_columns)
+                     for row in islice(csv_reader, self.chunk_size)]
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def _create_record(row: List[str], selected_columns: list, num_columns: int) -> Record:
+        """Creates a record from a CSV row.
+
+        :param row: The CSV row.
+        :type row: List[str]
+        :param selected_columns: Pairs of (column position, field name).
+        :type selected_columns: list
+        :param num_columns: The number of columns of the header.
+        :type num_columns: int
+        :return: A record. Missing columns (short rows) are not included.
+        :rtype: Record
+        """
+        if len(row) >= num_columns:
+            return {name: row[position] for position, name in selected_columns}
+        return {name: row[position] for position, name in selected_columns if position < len(row)}
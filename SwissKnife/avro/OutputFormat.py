@@ -0,0 +1,35 @@
+from enum import Enum
+from typing import BinaryIO, Union
+
+from SwissKnife.avro.AvroWriter import AvroWriter
+from SwissKnife.avro.ParquetWriter import ParquetWriter
+
+
+class OutputFormat(str, Enum):
+    """
+    The formats of the output files. All of them are written from the same avro schema.
+    """
+    AVRO: str = "avro"
+    PARQUET: str = "parquet"
+
+
+def create_writer(output_stream: BinaryIO,
+                  avro_schema: dict,
+                  output_format: OutputFormat = OutputFormat.AVRO,
+                  **writer_options) -> Union[AvroWriter, ParquetWriter]:
+    """Creates the writer of an output format. The writers have the same write, write_many and close methods.
+
+    :param output_stream: The file-like object where data will be writed.
+    :type output_stream: file
+    :param avro_schema: A valid avro schema as a dict.
+    :type avro_schema: dict
+    :param output_format: The format ("avro" or "parquet"), defaults to OutputFormat.AVRO
+    :type output_format: OutputFormat, optional
+    :param writer_options: Other arguments of the writer (e.g. codec for AvroWriter or compression for ParquetWriter)
+    :raises ValueError: If the format doesn't exist.
+    :return: An AvroWriter or a ParquetWriter.
+    :rtype: Union[AvroWriter, ParquetWriter]
+    """
+    if OutputFormat(output_format) is OutputFormat.PARQUET:
+        return ParquetWriter(output_stream, avro_schema, **writer_options)
+    return AvroWriter(output_stream, avro_schema, **writer_options)
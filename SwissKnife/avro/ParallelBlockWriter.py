@@ -0,0 +1,187 @@
+import bz2
+import lzma
+import os
+import struct
+import zlib
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import BinaryIO, Callable
+
+from SwissKnife.avro.AvroContainer import encode_long
+
+try:
+    from snappy import compress as _snappy_compress
+except ImportError:
+    try:
+        from cramjam import snappy as _cramjam_snappy
+
+        def _snappy_compress(data: bytes) -> bytes:
+            return bytes(_cramjam_snappy.compress_raw(data))
+    except ImportError:
+        _snappy_compress = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.block
+except ImportError:
+    lz4 = None
+
+
+def _compress_null(data: bytes, compression_level: int = None) -> bytes:
+    return data
+
+
+def _compress_deflate(data: bytes, compression_level: int = None) -> bytes:
+    # Avro uses raw deflate data, without zlib header and checksum
+    compressor = zlib.compressobj(-1 if compression_level is None else compression_level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush()
+
+
+def _compress_bzip2(data: bytes, compression_level: int = None) -> bytes:
+    return bz2.compress(data, 9 if compression_level is None else compression_level)
+
+
+def _compress_xz(data: bytes, compression_level: int = None) -> bytes:
+    return lzma.compress(data, preset=compression_level)
+
+
+def _compress_snappy(data: bytes, compression_level: int = None) -> bytes:
+    # Avro adds the big-endian CRC32 of the uncompressed data
+    return _snappy_compress(data) + struct.pack(">I", zlib.crc32(data) & 0xFFFFFFFF)
+
+
+def _compress_zstandard(data: bytes, compression_level: int = None) -> bytes:
+    compressor = zstandard.ZstdCompressor() if compression_level is None else \
+        zstandard.ZstdCompressor(level=compression_level)
+    return compressor.compress(data)
+
+
+def _compress_lz4(data: bytes, compression_level: int = None) -> bytes:
+    if compression_level is None:
+        return lz4.block.compress(data)
+    # The levels of lz4 are the levels of its high compression mode
+    return lz4.block.compress(data, mode="high_compression", compression=compression_level)
+
+
+# The functions that compress the data of a block, for each available codec
+BLOCK_COMPRESSORS = {
+    "null": _compress_null,
+    "deflate": _compress_deflate,
+    "bzip2": _compress_bzip2,
+    "xz": _compress_xz,
+}
+if _snappy_compress is not None:
+    BLOCK_COMPRESSORS["snappy"] = _compress_snappy
+if zstandard is not None:
+    BLOCK_COMPRESSORS["zstandard"] = _compress_zstandard
+if lz4 is not None:
+    BLOCK_COMPRESSORS["lz4"] = _compress_lz4
+
+
+def compress_block(data: bytes, codec: str, compression_level: int = None) -> bytes:
+    """Compresses the data of a block. It's a module function, so it can be sent to a process pool.
+
+    :param data: The serialized records of the block.
+    :type data: bytes
+    :param codec: The name of the codec.
+    :type codec: str
+    :param compression_level: The compression level, defaults to the level of the codec library
+    :type compression_level: int, optional
+    :return: The compressed data.
+    :rtype: bytes
+    """
+    return BLOCK_COMPRESSORS[codec](data, compression_level)
+
+
+class ParallelBlockWriter(object):
+    """
+    Writes the blocks of an avro file, compressing them in a pool of threads or processes.
+    The blocks are written to the output stream in the same order they are received,
+    and only max_pending_blocks blocks are kept in memory while they are compressed.
+    """
+
+    def __init__(self,
+                 output_stream: BinaryIO,
+                 sync_marker: bytes,
+                 codec: str,
+                 compression_level: int = None,
+                 workers: int = None,
+                 executor: Executor = None,
+                 max_pending_blocks: int = None,
+                 block_callback: Callable[[int, int], None] = None):
+        """ParallelBlockWriter constructor
+
+        :param output_stream: The stream where the blocks are written (after the header of the file).
+        :type output_stream: BinaryIO
+        :param sync_marker: The sync marker of the file.
+        :type sync_marker: bytes
+        :param codec: The name of the codec.
+        :type codec: str
+        :param compression_level: The compression level, defaults to the level of the codec library
+        :type compression_level: int, optional
+        :param workers: The number of threads of the pool, if an executor is not provided.
+        Defaults to the number of CPUs.
+        :type workers: int, optional
+        :param executor: A pool of threads or processes, that is not shut down by this object. Defaults to None
+        :type executor: Executor, optional
+        :param max_pending_blocks: The maximum number of blocks that are being compressed or waiting to be written,
+        defaults to twice the number of workers
+        :type max_pending_blocks: int, optional
+        :param block_callback: A function that receives the number of records and bytes
+        of each written block, defaults to None
+        :type block_callback: Callable[[int, int], None], optional
+        :raises ValueError: If the codec is not available.
+        """
+        if codec not in BLOCK_COMPRESSORS:
+            raise ValueError(f"The codec '{codec}' is not available for parallel compression")
+        self.output_stream = output_stream
+        self.sync_marker = sync_marker
+        self.codec = codec
+        self.compression_level = compression_level
+        workers = workers or os.cpu_count() or 1
+        self._shutdown_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=workers)
+        self.max_pending_blocks = max_pending_blocks or 2 * workers
+        self.block_callback = block_callback
+        # Pairs of (number of records, future of the compressed data), in the order of the file
+        self._pending_blocks = deque()
+
+    def write_block(self, num_records: int, data: bytes):
+        """Sends a block to be compressed. The already compressed blocks are written, and if there are
+        too many pending blocks, it waits for the oldest one.
+
+        :param num_records: The number of records of the block.
+        :type num_records: int
+        :param data: The serialized records.
+        :type data: bytes
+        """
+        future = self.executor.submit(compress_block, data, self.codec, self.compression_level)
+        self._pending_blocks.append((num_records, future))
+        while self._pending_blocks and \
+                (len(self._pending_blocks) > self.max_pending_blocks or self._pending_blocks[0][1].done()):
+            self._write_next_block()
+
+    def _write_next_block(self):
+        """Waits for the oldest pending block and writes it.
+        """
+        num_records, future = self._pending_blocks.popleft()
+        compressed_data = future.result()
+        encoded_block = encode_long(num_records) + encode_long(len(compressed_data)) + compressed_data + \
+            self.sync_marker
+        self.output_stream.write(encoded_block)
+        if self.block_callback is not None:
+            self.block_callback(num_records, len(encoded_block))
+
+    def close(self):
+        """Writes all the pending blocks and shuts down the pool (if it was created by this object).
+        """
+        try:
+            while self._pending_blocks:
+                self._write_next_block()
+        finally:
+            if self._shutdown_executor:
+                self.executor.shutdown(wait=True)
@@ -0,0 +1,259 @@
+from enum import Enum
+from typing import BinaryIO, Iterable
+
+from SwissKnife.avro.AvroWriter import AvroMatchingException, WriterCounters, _CountingStream
+from SwissKnife.avro.SchemaCache import DEFAULT_SCHEMA_CACHE, SchemaCache
+from SwissKnife.avro.SchemaUtils import get_full_name
+from SwissKnife.avro.types import Variables
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ModuleNotFoundError:
+    pyarrow = None
+
+
+class ParquetCompression(str, Enum):
+    """
+    The compression codecs of the parquet files.
+    """
+    NONE: str = "none"
+    SNAPPY: str = "snappy"
+    GZIP: str = "gzip"
+    BROTLI: str = "brotli"
+    ZSTD: str = "zstd"
+    LZ4: str = "lz4"
+
+
+# The arrow type of each primitive avro type
+PRIMITIVE_ARROW_TYPES = {
+    "null": lambda: pyarrow.null(),
+    "boolean": lambda: pyarrow.bool_(),
+    "int": lambda: pyarrow.int32(),
+    "long": lambda: pyarrow.int64(),
+    "float": lambda: pyarrow.float32(),
+    "double": lambda: pyarrow.float64(),
+    "string": lambda: pyarrow.string(),
+    "bytes": lambda: pyarrow.binary(),
+}
+
+# The arrow type of each logical type (the decimal type is built with its precision and scale)
+LOGICAL_ARROW_TYPES = {
+    "timestamp-millis": lambda: pyarrow.timestamp("ms", tz="UTC"),
+    "timestamp-micros": lambda: pyarrow.timestamp("us", tz="UTC"),
+    "local-timestamp-millis": lambda: pyarrow.timestamp("ms"),
+    "local-timestamp-micros": lambda: pyarrow.timestamp("us"),
+    "date": lambda: pyarrow.date32(),
+    "time-millis": lambda: pyarrow.time32("ms"),
+    "time-micros": lambda: pyarrow.time64("us"),
+    "uuid": lambda: pyarrow.string(),
+}
+
+
+def get_arrow_type(avro_type: object, named_types: dict = None, namespace: str = None) -> (object, bool):
+    """Gets the arrow type of an avro type. The unions of null and another type are nullable types,
+    the enums are strings and the records are structs.
+
+    :param avro_type: The avro type: a primitive name, a union (list) or a complex type (dict).
+    :type avro_type: object
+    :param named_types: A dict that maps a name with its arrow type. New named types are added to it.
+    :type named_types: dict, optional
+    :param namespace: The namespace of the enclosing type, defaults to None
+    :type namespace: str, optional
+    :raises ValueError: If the type is not supported (unions of several types, recursive records).
+    :return: The arrow type, and True if it is nullable.
+    :rtype: (pyarrow.DataType, bool)
+    """
+    named_types = {} if named_types is None else named_types
+    if isinstance(avro_type, list):
+        branches = [branch for branch in avro_type if branch != "null"]
+        if len(branches) != 1:
+            raise ValueError(f"The union {avro_type} is not supported in parquet. "
+                             f"Only unions of null and another type are supported")
+        arrow_type, _ = get_arrow_type(branches[0], named_types, namespace)
+        return arrow_type, len(branches) < len(avro_type)
+    if isinstance(avro_type, str):
+        if avro_type in PRIMITIVE_ARROW_TYPES:
+            return PRIMITIVE_ARROW_TYPES[avro_type](), avro_type == "null"
+        if namespace and f"{namespace}.{avro_type}" in named_types:
+            return named_types[f"{namespace}.{avro_type}"], False
+        if avro_type in named_types:
+            return named_types[avro_type], False
+        raise ValueError(f"Unknown avro type: {avro_type}")
+
+    type_name = avro_type[Variables.TYPE]
+    logical_type = avro_type.get(Variables.LOGICAL_TYPE)
+    if logical_type in LOGICAL_ARROW_TYPES:
+        return LOGICAL_ARROW_TYPES[logical_type](), False
+    if logical_type == "decimal":
+        return pyarrow.decimal128(avro_type["precision"], avro_type.get(Variables.SCALE, 0)), False
+    if type_name in ("record", "error"):
+        fields_namespace = get_full_name(avro_type, namespace).rpartition(".")[0] or None
+        arrow_type = pyarrow.struct(_get_arrow_fields(avro_type, named_types, fields_namespace))
+        return _register_named_type(avro_type, named_types, namespace, arrow_type), False
+    if type_name == "enum":
+        return _register_named_type(avro_type, named_types, namespace, pyarrow.string()), False
+    if type_name == "fixed":
+        arrow_type = pyarrow.binary(avro_type[Variables.SIZE])
+        return _register_named_type(avro_type, named_types, namespace, arrow_type), False
+    if type_name == "array":
+        items_type, _ = get_arrow_type(avro_type[Variables.ITEMS], named_types, namespace)
+        return pyarrow.list_(items_type), False
+    if type_name == "map":
+        values_type, _ = get_arrow_type(avro_type[Variables.VALUES], named_types, namespace)
+        return pyarrow.map_(pyarrow.string(), values_type), False
+    # A type written as a dict, like {"type": "string"}
+    return get_arrow_type(type_name, named_types, namespace)
+
+
+def _register_named_type(avro_type: dict, named_types: dict, namespace: str, arrow_type: object) -> object:
+    named_types[avro_type[Variables.NAME]] = arrow_type
+    named_types[get_full_name(avro_type, namespace)] = arrow_type
+    return arrow_type
+
+
+def _get_arrow_fields(avro_schema: dict, named_types: dict, namespace: str = None) -> list:
+    arrow_fields = []
+    for field in avro_schema[Variables.FIELDS]:
+        arrow_type, nullable = get_arrow_type(field[Variables.TYPE], named_types, namespace)
+        arrow_fields.append(pyarrow.field(field[Variables.NAME], arrow_type, nullable=nullable))
+    return arrow_fields
+
+
+def get_arrow_schema(avro_schema: dict) -> "pyarrow.Schema":
+    """Gets the arrow (and parquet) schema of an avro record schema.
+
+    :param avro_schema: A valid avro schema of a record as a dict.
+    :type avro_schema: dict
+    :raises RuntimeError: If pyarrow is not installed.
+    :raises ValueError: If a type of the schema is not supported (see get_arrow_type).
+    :return: The arrow schema, with a field for each field of the record.
+    :rtype: pyarrow.Schema
+    """
+    if pyarrow is None:
+        raise RuntimeError("You need install SwissKnife with 'parquet' tag to use ParquetWriter.")
+    return pyarrow.schema(_get_arrow_fields(avro_schema, {}, get_full_name(avro_schema).rpartition(".")[0] or None))
+
+
+class ParquetWriter(object):
+    """This object create a writer that writes parquet data into a file-like object, with the
+    same interface as AvroWriter. The parquet schema is derived from the avro schema (see get_arrow_schema).
+    The rows are kept in a buffer, that is written as a row group when it has row_group_records rows.
+    The missing fields are filled with their default value, like in the avro files.
+    """
+
+    def __init__(self,
+                 output_stream: BinaryIO,
+                 avro_schema: dict,
+                 schema_cache: SchemaCache = DEFAULT_SCHEMA_CACHE,
+                 compression: str = ParquetCompression.SNAPPY,
+                 compression_level: int = None,
+                 row_group_records: int = 100000):
+        """ParquetWriter constructor
+
+        :param output_stream: The file-like object where data will be writed.
+        :type output_stream: file
+        :param avro_schema: A valid avro schema of a record as a dict.
+        :type avro_schema: dict
+        :param schema_cache: The cache of the arrow schemas. If None, the schema is always built.
+        Defaults to DEFAULT_SCHEMA_CACHE.
+        :type schema_cache: SchemaCache, optional
+        :param compression: The compression codec ("none", "snappy", "gzip", "brotli", "zstd", "lz4"),
+        defaults to ParquetCompression.SNAPPY
+        :type compression: str, optional
+        :param compression_level: The compression level of the codec, defaults to the level of the codec library
+        :type compression_level: int, optional
+        :param row_group_records: The number of rows of each row group, defaults to 100000
+        :type row_group_records: int, optional
+        :raises RuntimeError: If pyarrow is not installed.
+        :raises ValueError: If the compression codec doesn't exist or a type of the schema is not supported.
+        """
+        if pyarrow is None:
+            raise RuntimeError("You need install SwissKnife with 'parquet' tag to use ParquetWriter.")
+        if row_group_records < 1:
+            raise ValueError(f"The number of rows of a row group must be positive: {row_group_records}")
+
+        if schema_cache is None:
+            self.arrow_schema = get_arrow_schema(avro_schema)
+        else:
+            self.arrow_schema = schema_cache.get_or_create(("arrow",) + schema_cache.get_schema_key(avro_schema),
+                                                           lambda: get_arrow_schema(avro_schema))
+        self.avro_schema = avro_schema
+        self.compression = ParquetCompression(compression)
+        self.row_group_records = row_group_records
+        # Pairs of (field name, default value) used to build the columns
+        self._fields = [(field[Variables.NAME], field.get(Variables.DEFAULT))
+                        for field in avro_schema[Variables.FIELDS]]
+        self._rows = []
+        self.counters = WriterCounters()
+        self.output_stream = _CountingStream(output_stream)
+        self.writer = pyarrow.parquet.ParquetWriter(self.output_stream, self.arrow_schema,
+                                                    compression=self.compression.value,
+                                                    compression_level=compression_level)
+
+    def write(self, row: dict):
+        """A method to write a row to the output_stream. It is written with its row group.
+
+        :param row: A row of data that matchs with the current schema.
+        :type row: dict
+        :raises AvroMatchingException: When a row of the row group doesn't match with the current schema.
+        """
+
+        self._rows.append(row)
+        if len(self._rows) >= self.row_group_records:
+            self._write_row_group()
+
+    def write_many(self, rows: Iterable[dict]) -> int:
+        """Writes several rows to the output_stream.
+
+        :param rows: The rows. They must match with the current schema.
+        :type rows: Iterable[dict]
+        :raises AvroMatchingException: When a row doesn't match with the current schema.
+        The previous row groups are already written.
+        :return: The number of written rows.
+        :rtype: int
+        """
+
+        buffer = self._rows
+        row_group_records = self.row_group_records
+        num_rows = 0
+        for row in rows:
+            buffer.append(row)
+            num_rows += 1
+            if len(buffer) >= row_group_records:
+                self._write_row_group()
+                buffer = self._rows
+        return num_rows
+
+    def _write_row_group(self):
+        """Writes the rows of the buffer as a row group.
+        """
+
+        rows = self._rows
+        self._rows = []
+        columns = [[row.get(name, default) for row in rows] for name, default in self._fields]
+        arrays = []
+        for column, field in zip(columns, self.arrow_schema):
+            try:
+                array = pyarrow.array(column, type=field.type)
+            except (pyarrow.ArrowException, TypeError, ValueError, OverflowError) as ex:
+                raise AvroMatchingException(f"Exception: {ex} for field {field.name} "
+                                            f"in row group {self.counters.blocks}")
+            if array.null_count > 0 and not field.nullable:
+                raise AvroMatchingException(f"Exception: null value for the not nullable field {field.name} "
+                                            f"in row group {self.counters.blocks}")
+            arrays.append(array)
+        table = pyarrow.Table.from_arrays(arrays, schema=self.arrow_schema)
+        self.writer.write_table(table, row_group_size=len(rows))
+        self.counters.records += len(rows)
+        self.counters.blocks += 1
+        self.counters.bytes = self.output_stream.bytes_written
+
+    def close(self):
+        """Writes the remaining rows and the parquet footer. The output stream is not closed.
+        """
+
+        if self._rows:
+            self._write_row_group()
+        self.writer.close()
+        self.counters.bytes = self.output_stream.bytes_written
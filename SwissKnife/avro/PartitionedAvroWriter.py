@@ -0,0 +1,196 @@
+import os
+from collections import OrderedDict
+from typing import Callable, Iterable, NamedTuple
+
+from SwissKnife.avro.AvroWriter import AvroWriter
+from SwissKnife.avro.types import Record
+from SwissKnife.calendar.WeekUtils import get_week_format_from_timestamp
+
+
+class FinishedFile(NamedTuple):
+    """
+    A file of a partition that has been closed:
+        - partition: The partition key.
+        - part: The number of the file in the partition (starting at 0).
+        - path: The local path of the file.
+        - records: The number of records.
+        - bytes: The size of the file.
+    """
+    partition: str
+    part: int
+    path: str
+    records: int
+    bytes: int
+
+
+def week_partitioner(timestamp_field: str) -> Callable[[Record], str]:
+    """Gets a partitioner that uses the week (in the format of get_week_format_from_timestamp, e.g. "2020W01")
+    of a timestamp field in milliseconds.
+
+    :param timestamp_field: The name of the field with the timestamp.
+    :type timestamp_field: str
+    :return: A function that returns the week of a record.
+    :rtype: Callable[[Record], str]
+    """
+    return lambda record: get_week_format_from_timestamp(record[timestamp_field])
+
+
+class _PartitionFile(object):
+    """
+    An open file of a partition.
+    """
+
+    def __init__(self, partition: str, part: int, path: str, avro_writer: AvroWriter, output_file):
+        self.partition = partition
+        self.part = part
+        self.path = path
+        self.avro_writer = avro_writer
+        self.output_file = output_file
+
+
+class PartitionedAvroWriter(object):
+    """
+    Writes records to several avro files in a local directory. Each record is written to the file of its
+    partition (see partitioner). The files are rolled over when they reach a number of records or bytes,
+    and only max_open_writers files are open at the same time: the least recently used one is closed when
+    a new one is needed (and the next records of its partition are written to a new file).
+    Each closed file is sent to a callback, for example to upload it with GCloudStorage.save_file.
+    """
+
+    DEFAULT_FILE_NAME_TEMPLATE = "{partition}/part-{part:05d}.avro"
+
+    def __init__(self,
+                 output_dir: str,
+                 avro_schema: dict,
+                 partitioner: Callable[[Record], str],
+                 max_records_per_file: int = None,
+                 max_bytes_per_file: int = None,
+                 max_open_writers: int = 16,
+                 file_name_template: str = DEFAULT_FILE_NAME_TEMPLATE,
+                 file_callback: Callable[[FinishedFile], None] = None,
+                 writer_options: dict = None):
+        """PartitionedAvroWriter constructor
+
+        :param output_dir: The local directory of the files.
+        :type output_dir: str
+        :param avro_schema: The avro schema of the records.
+        :type avro_schema: dict
+        :param partitioner: A function that returns the partition key of a record (see week_partitioner).
+        :type partitioner: Callable[[Record], str]
+        :param max_records_per_file: The maximum number of records of a file, defaults to None (no limit)
+        :type max_records_per_file: int, optional
+        :param max_bytes_per_file: The size that makes a file to be rolled over, defaults to None (no limit).
+        The size is checked when a block is written, so the files can be a bit bigger.
+        :type max_bytes_per_file: int, optional
+        :param max_open_writers: The maximum number of open files, defaults to 16
+        :type max_open_writers: int, optional
+        :param file_name_template: The path of each file, relative to output_dir. It can use the
+        "partition" and "part" variables. Defaults to DEFAULT_FILE_NAME_TEMPLATE
+        :type file_name_template: str, optional
+        :param file_callback: A function that receives a FinishedFile when a file is closed, defaults to None
+        :type file_callback: Callable[[FinishedFile], None], optional
+        :param writer_options: Other arguments of the AvroWriter of each file (codec, block_bytes...),
+        defaults to None
+        :type writer_options: dict, optional
+        """
+        if max_open_writers < 1:
+            raise ValueError(f"The maximum number of open writers must be positive: {max_open_writers}")
+        self.output_dir = output_dir
+        self.avro_schema = avro_schema
+        self.partitioner = partitioner
+        self.max_records_per_file = max_records_per_file
+        self.max_bytes_per_file = max_bytes_per_file
+        self.max_open_writers = max_open_writers
+        self.file_name_template = file_name_template
+        self.file_callback = file_callback
+        self.writer_options = writer_options or {}
+        # The open files, from the least to the most recently used
+        self._open_files = OrderedDict()
+        # The number of the next file of each partition
+        self._next_parts = {}
+        self.num_finished_files = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def write(self, record: Record):
+        """Writes a record to the file of its partition.
+
+        :param record: A record that matches with the schema.
+        :type record: Record
+        :raises AvroMatchingException: When the record doesn't match with the schema.
+        """
+        partition_file = self._get_partition_file(str(self.partitioner(record)))
+        partition_file.avro_writer.write(record)
+        self._roll_over_if_full(partition_file)
+
+    def write_many(self, records: Iterable[Record]) -> int:
+        """Writes several records to the files of their partitions.
+
+        :param records: Records that match with the schema.
+        :type records: Iterable[Record]
+        :return: The number of written records.
+        :rtype: int
+        """
+        num_records = 0
+        for record in records:
+            self.write(record)
+            num_records += 1
+        return num_records
+
+    def _get_partition_file(self, partition: str) -> _PartitionFile:
+        """Gets the open file of a partition, opening a new one if it's needed.
+        """
+        partition_file = self._open_files.get(partition)
+        if partition_file is not None:
+            self._open_files.move_to_end(partition)
+            return partition_file
+
+        if len(self._open_files) >= self.max_open_writers:
+            # The least recently used file is closed
+            self._finish_file(next(iter(self._open_files.values())))
+
+        part = self._next_parts.get(partition, 0)
+        self._next_parts[partition] = part + 1
+        path = os.path.join(self.output_dir, self.file_name_template.format(partition=partition, part=part))
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        output_file = open(path, "wb")
+        try:
+            avro_writer = AvroWriter(output_file, self.avro_schema, **self.writer_options)
+        except Exception:
+            output_file.close()
+            raise
+        partition_file = _PartitionFile(partition, part, path, avro_writer, output_file)
+        self._open_files[partition] = partition_file
+        return partition_file
+
+    def _roll_over_if_full(self, partition_file: _PartitionFile):
+        """Closes the file of a partition if it has reached the limits.
+        """
+        counters = partition_file.avro_writer.counters
+        if (self.max_records_per_file is not None and counters.records >= self.max_records_per_file) or \
+                (self.max_bytes_per_file is not None and counters.bytes >= self.max_bytes_per_file):
+            self._finish_file(partition_file)
+
+    def _finish_file(self, partition_file: _PartitionFile):
+        """Closes a file and sends it to the callback.
+        """
+        del self._open_files[partition_file.partition]
+        try:
+            partition_file.avro_writer.close()
+        finally:
+            partition_file.output_file.close()
+        self.num_finished_files += 1
+        if self.file_callback is not None:
+            counters = partition_file.avro_writer.counters
+            self.file_callback(FinishedFile(partition_file.partition, partition_file.part, partition_file.path,
+                                            counters.records, counters.bytes))
+
+    def close(self):
+        """Closes all the open files (they are sent to the callback).
+        """
+        while self._open_files:
+            self._finish_file(next(iter(self._open_files.values())))
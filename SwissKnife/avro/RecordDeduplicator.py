@@ -0,0 +1,321 @@
+import hashlib
+import heapq
+import math
+import mmap
+import os
+import tempfile
+from enum import Enum
+from typing import Callable, Iterable, Iterator, List, Union
+
+from SwissKnife.avro.types import Record
+
+# The size of the digest of each key
+KEY_DIGEST_SIZE = 16
+
+
+class DedupMode(str, Enum):
+    """
+    How the seen keys are stored:
+        - EXACT: The digests of the keys are kept in memory, and spilled to sorted files on disk when there
+          are max_memory_keys. A Bloom filter avoids reading the files for most of the new keys.
+        - APPROXIMATE: Only a Bloom filter is kept, with a fixed size. A small fraction of the unique
+          records (the false positive rate) is considered duplicated.
+    """
+    EXACT: str = "exact"
+    APPROXIMATE: str = "approximate"
+
+
+def create_key_digest(key_fields: Union[str, List[str]]) -> Callable[[Record], bytes]:
+    """Creates a function that returns the digest of the key of a record. Two records have the same
+    digest when the values of the key fields are equal (the probability of a collision is negligible).
+
+    :param key_fields: The field (or the fields) of the key.
+    :type key_fields: Union[str, List[str]]
+    :return: A function that returns a digest of KEY_DIGEST_SIZE bytes.
+    :rtype: Callable[[Record], bytes]
+    """
+    blake2b = hashlib.blake2b
+    if isinstance(key_fields, str):
+        field = key_fields
+
+        def get_field_digest(record: Record) -> bytes:
+            return blake2b(repr(record.get(field)).encode("utf-8"), digest_size=KEY_DIGEST_SIZE).digest()
+        return get_field_digest
+
+    fields = tuple(key_fields)
+
+    def get_fields_digest(record: Record) -> bytes:
+        key = tuple(map(record.get, fields))
+        return blake2b(repr(key).encode("utf-8"), digest_size=KEY_DIGEST_SIZE).digest()
+    return get_fields_digest
+
+
+class BloomFilter(object):
+    """
+    A Bloom filter of key digests, sized for a number of keys and a false positive rate.
+    It uses about 1.44 * log2(1 / false_positive_rate) bits per key.
+    """
+
+    def __init__(self, capacity: int, false_positive_rate: float):
+        """BloomFilter constructor
+
+        :param capacity: The expected number of keys.
+        :type capacity: int
+        :param false_positive_rate: The probability that a new key is reported as seen when the filter
+        has capacity keys (between 0 and 1).
+        :type false_positive_rate: float
+        """
+        if capacity < 1:
+            raise ValueError(f"The capacity must be positive: {capacity}")
+        if not 0 < false_positive_rate < 1:
+            raise ValueError(f"The false positive rate must be between 0 and 1: {false_positive_rate}")
+        self.capacity = capacity
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * math.log(2))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self._hash_indexes = range(self.num_hashes)
+        self.num_keys = 0
+
+    def _get_positions(self, digest: bytes) -> List[int]:
+        # Double hashing with the two halves of the digest
+        first_hash = int.from_bytes(digest[:8], "little")
+        second_hash = int.from_bytes(digest[8:16], "little") | 1
+        num_bits = self.num_bits
+        return [(first_hash + i * second_hash) % num_bits for i in self._hash_indexes]
+
+    def add(self, digest: bytes) -> bool:
+        """Adds a key digest.
+
+        :param digest: A digest of at least 16 bytes.
+        :type digest: bytes
+        :return: True if the key was (probably) already in the filter.
+        :rtype: bool
+        """
+        bits = self.bits
+        seen = True
+        for position in self._get_positions(digest):
+            byte_index = position >> 3
+            mask = 1 << (position & 7)
+            byte = bits[byte_index]
+            if not byte & mask:
+                seen = False
+                bits[byte_index] = byte | mask
+        if not seen:
+            self.num_keys += 1
+        return seen
+
+    def __contains__(self, digest: bytes) -> bool:
+        bits = self.bits
+        for position in self._get_positions(digest):
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    @property
+    def false_positive_rate(self) -> float:
+        """The estimated false positive rate with the current number of keys."""
+        return (1 - math.exp(-self.num_hashes * self.num_keys / self.num_bits)) ** self.num_hashes
+
+
+class _KeyRun(object):
+    """
+    A file with sorted key digests, searched through a memory map.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.num_keys = os.path.getsize(path) // KEY_DIGEST_SIZE
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.num_keys else b""
+
+    def __contains__(self, digest: bytes) -> bool:
+        data = self._mmap
+        low, high = 0, self.num_keys
+        while low < high:
+            middle = (low + high) // 2
+            start = middle * KEY_DIGEST_SIZE
+            key = data[start:start + KEY_DIGEST_SIZE]
+            if key < digest:
+                low = middle + 1
+            elif key > digest:
+                high = middle
+            else:
+                return True
+        return False
+
+    def __iter__(self) -> Iterator[bytes]:
+        data = self._mmap
+        for start in range(0, self.num_keys * KEY_DIGEST_SIZE, KEY_DIGEST_SIZE):
+            yield data[start:start + KEY_DIGEST_SIZE]
+
+    def close(self):
+        if self.num_keys:
+            self._mmap.close()
+        self._file.close()
+        os.remove(self.path)
+
+
+class DedupMetrics(object):
+    """
+    Metrics of a RecordDeduplicator:
+        - records: The number of checked records.
+        - duplicates: The number of duplicated records.
+        - spilled_keys: In exact mode, the number of keys written to disk.
+        - disk_lookups: In exact mode, the number of keys searched in the files on disk.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.duplicates = 0
+        self.spilled_keys = 0
+        self.disk_lookups = 0
+
+    def to_dict(self) -> dict:
+        """Returns the metrics as a dict.
+        :return: A dict that maps a metric name with its value.
+        :rtype: dict
+        """
+        return dict(self.__dict__)
+
+
+class RecordDeduplicator(object):
+    """
+    Removes the records whose key (the values of some fields) has already been seen, with a bounded memory.
+    It can be used as a generator between the transformation and the writer:
+
+        avro_writer.write_many(deduplicator.deduplicate(avro_transformer.transform_iter(records)))
+
+    The first record of each key is kept. See DedupMode for the exact and approximate modes.
+    """
+
+    def __init__(self,
+                 key_fields: Union[str, List[str]],
+                 mode: DedupMode = DedupMode.EXACT,
+                 max_memory_keys: int = 1000000,
+                 expected_records: int = 10000000,
+                 false_positive_rate: float = 0.001,
+                 max_runs: int = 8,
+                 temp_dir: str = None):
+        """RecordDeduplicator constructor
+
+        :param key_fields: The field (or the fields) of the key.
+        :type key_fields: Union[str, List[str]]
+        :param mode: How the keys are stored (see DedupMode), defaults to DedupMode.EXACT
+        :type mode: DedupMode, optional
+        :param max_memory_keys: In exact mode, the maximum number of keys in memory. When it is reached,
+        they are written to a sorted file. Defaults to 1000000
+        :type max_memory_keys: int, optional
+        :param expected_records: The expected number of unique records, to size the Bloom filter,
+        defaults to 10000000
+        :type expected_records: int, optional
+        :param false_positive_rate: The false positive rate of the Bloom filter with expected_records keys.
+        In exact mode, it is the fraction of the new keys that are searched on disk. Defaults to 0.001
+        :type false_positive_rate: float, optional
+        :param max_runs: In exact mode, the maximum number of files on disk. When there are more,
+        they are merged into one. Defaults to 8
+        :type max_runs: int, optional
+        :param temp_dir: The directory of the temporary files, defaults to None (the default temporary directory)
+        :type temp_dir: str, optional
+        """
+        if max_memory_keys < 1:
+            raise ValueError(f"The maximum number of keys in memory must be positive: {max_memory_keys}")
+        self.mode = DedupMode(mode)
+        self.key_digest = create_key_digest(key_fields)
+        self.max_memory_keys = max_memory_keys
+        self.max_runs = max_runs
+        self.metrics = DedupMetrics()
+        self.bloom_filter = BloomFilter(expected_records, false_positive_rate)
+        self._temp_dir_path = temp_dir
+        self._temp_dir = None
+        self._memory_keys = set()
+        self._runs = []
+        self._num_run_files = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def is_duplicate(self, record: Record) -> bool:
+        """Checks if the key of a record has already been seen, and adds it.
+
+        :param record: The record.
+        :type record: Record
+        :return: True if it is a duplicate.
+        :rtype: bool
+        """
+        digest = self.key_digest(record)
+        self.metrics.records += 1
+        if self.mode is DedupMode.APPROXIMATE:
+            duplicate = self.bloom_filter.add(digest)
+        else:
+            duplicate = self._add_exact(digest)
+        if duplicate:
+            self.metrics.duplicates += 1
+        return duplicate
+
+    def deduplicate(self, records: Iterable[Record]) -> Iterator[Record]:
+        """Filters the duplicated records.
+
+        :param records: The records.
+        :type records: Iterable[Record]
+        :return: An iterator of the records whose key has not been seen before.
+        :rtype: Iterator[Record]
+        """
+        is_duplicate = self.is_duplicate
+        for record in records:
+            if not is_duplicate(record):
+                yield record
+
+    def close(self):
+        """Removes the temporary files.
+        """
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._memory_keys = set()
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+            self._temp_dir = None
+
+    def _add_exact(self, digest: bytes) -> bool:
+        """Adds a key in exact mode. The keys on disk are only searched if they can be in the Bloom filter
+        of the spilled keys.
+        """
+        memory_keys = self._memory_keys
+        if digest in memory_keys:
+            return True
+        if self._runs and digest in self.bloom_filter:
+            self.metrics.disk_lookups += 1
+            if any(digest in run for run in self._runs):
+                return True
+        memory_keys.add(digest)
+        if len(memory_keys) >= self.max_memory_keys:
+            self._spill_keys()
+        return False
+
+    def _spill_keys(self):
+        """Writes the keys in memory to a new sorted file.
+        """
+        keys = sorted(self._memory_keys)
+        self._memory_keys = set()
+        for digest in keys:
+            self.bloom_filter.add(digest)
+        self._runs.append(self._write_run(keys))
+        self.metrics.spilled_keys += len(keys)
+        if len(self._runs) > self.max_runs:
+            runs = self._runs
+            self._runs = [self._write_run(heapq.merge(*runs))]
+            for run in runs:
+                run.close()
+
+    def _write_run(self, keys: Iterable[bytes]) -> _KeyRun:
+        if self._temp_dir is None:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="dedup-", dir=self._temp_dir_path)
+        path = os.path.join(self._temp_dir.name, f"keys-{self._num_run_files:06d}.bin")
+        self._num_run_files += 1
+        with open(path, "wb") as run_file:
+            for digest in keys:
+                run_file.write(digest)
+        return _KeyRun(path)
@@ -0,0 +1,138 @@
+import json
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import fastavro
+
+from SwissKnife.avro.SchemaUtils import get_fingerprint
+
+
+class SchemaCache(object):
+    """
+    A thread-safe LRU cache of the objects built from avro schemas (parsed schemas and transformer plans),
+    so writers and transformers of already known schemas are created without parsing the schema again.
+    The entries are identified by the fingerprint of the canonical form of the schema and by the
+    entire schema, because the canonical form doesn't include attributes like aliases, defaults or transforms.
+    The schema is serialized each time its key is needed, so a schema modified after it is used gets a new key.
+    """
+
+    DEFAULT_MAX_SIZE = 256
+
+    def __init__(self, max_size: int = DEFAULT_MAX_SIZE):
+        """SchemaCache constructor
+
+        :param max_size: The maximum number of entries. The least recently used entries are evicted first.
+        Defaults to DEFAULT_MAX_SIZE
+        :type max_size: int, optional
+        """
+        if max_size < 1:
+            raise ValueError(f"The max size must be positive: {max_size}")
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        # Fingerprints of the serialized schemas
+        self._fingerprints = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_parsed_schema(self, schema: dict) -> dict:
+        """Gets the schema parsed by fastavro.
+
+        :param schema: An avro schema.
+        :type schema: dict
+        :return: The parsed schema. It must not be modified.
+        :rtype: dict
+        """
+        return self.get_or_create(("parsed_schema",) + self.get_schema_key(schema),
+                                  lambda: fastavro.parse_schema(schema))
+
+    def get_transformer_plan(self, schema: dict, transform_registry: object, create_plan: Callable[[], object]):
+        """Gets the plan of an AvroTransformer (the objects built from the schema).
+        The plan depends on the version of the transform registry too, so it is rebuilt
+        when a new function is registered.
+
+        :param schema: An avro schema.
+        :type schema: dict
+        :param transform_registry: The transform registry of the transformer.
+        :type transform_registry: TransformRegistry
+        :param create_plan: The function that creates the plan when it is not in the cache.
+        :type create_plan: Callable[[], object]
+        :return: The plan.
+        :rtype: object
+        """
+        key = ("transformer_plan",) + self.get_schema_key(schema) + \
+            (transform_registry, transform_registry.version)
+        return self.get_or_create(key, create_plan)
+
+    def get_or_create(self, key: tuple, create_value: Callable[[], object]) -> object:
+        """Gets the value of a key, creating and caching it if it is not in the cache.
+
+        :param key: The key of the entry.
+        :type key: tuple
+        :param create_value: The function that creates the value.
+        :type create_value: Callable[[], object]
+        :return: The value.
+        :rtype: object
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # The value is created without the lock, so other schemas are not blocked meanwhile
+        value = create_value()
+
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def get_schema_key(self, schema: dict) -> tuple:
+        """Gets the key of a schema: its fingerprint and its entire content.
+
+        :param schema: An avro schema.
+        :type schema: dict
+        :return: A (fingerprint, serialized schema) tuple.
+        :rtype: tuple
+        """
+        serialized_schema = json.dumps(schema, default=repr)
+        fingerprint = self._fingerprints.get(serialized_schema)
+        if fingerprint is None:
+            fingerprint = get_fingerprint(schema)
+        with self._lock:
+            self._fingerprints[serialized_schema] = fingerprint
+            self._fingerprints.move_to_end(serialized_schema)
+            while len(self._fingerprints) > self.max_size:
+                self._fingerprints.popitem(last=False)
+        return fingerprint, serialized_schema
+
+    def stats(self) -> dict:
+        """Returns the statistics of the cache.
+
+        :return: A dict with the number of "hits", "misses", "evictions" and the current "size".
+        :rtype: dict
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "size": len(self._entries)}
+
+    def clear(self):
+        """Removes all the entries and resets the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._fingerprints.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+# The cache shared by all the writers and transformers of the process
+DEFAULT_SCHEMA_CACHE = SchemaCache()
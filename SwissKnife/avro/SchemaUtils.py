@@ -0,0 +1,210 @@
+import json
+from typing import List
+
+from SwissKnife.avro.types import Variables
+
+NAMED_TYPES = ("record", "error", "enum", "fixed")
+PRIMITIVE_TYPES = ("null", "boolean", "int", "long", "float", "double", "bytes", "string")
+
+# The attributes kept by the Parsing Canonical Form, in order
+CANONICAL_ATTRIBUTES = (Variables.NAME, Variables.TYPE, Variables.FIELDS, Variables.SYMBOLS,
+                        Variables.ITEMS, Variables.VALUES, Variables.SIZE)
+
+# CRC-64-AVRO, the fingerprint algorithm of the avro specification
+FINGERPRINT_EMPTY = 0xc15d213aa4d7a795
+
+
+def _create_fingerprint_table() -> List[int]:
+    table = []
+    for byte in range(256):
+        fingerprint = byte
+        for _ in range(8):
+            fingerprint = (fingerprint >> 1) ^ (FINGERPRINT_EMPTY & -(fingerprint & 1))
+        table.append(fingerprint)
+    return table
+
+
+_FINGERPRINT_TABLE = _create_fingerprint_table()
+
+
+def get_full_name(schema: dict, namespace: str = None) -> str:
+    """Gets the full name (with namespace) of a named type.
+
+    :param schema: The schema of the named type.
+    :type schema: dict
+    :param namespace: The namespace of the enclosing type, defaults to None
+    :type namespace: str, optional
+    :return: The full name.
+    :rtype: str
+    """
+    name = schema[Variables.NAME]
+    namespace = schema.get(Variables.NAMESPACE, namespace)
+    if "." in name or not namespace:
+        return name
+    return f"{namespace}.{name}"
+
+
+def to_canonical_form(schema: object) -> str:
+    """Gets the Parsing Canonical Form of a schema, as defined in the avro specification:
+    full names, only the attributes that affect the binary encoding and no whitespaces.
+    Two schemas with the same canonical form encode the data in the same way.
+
+    :param schema: An avro schema.
+    :type schema: object
+    :return: The canonical form.
+    :rtype: str
+    """
+    return _to_canonical_form(schema, None, set())
+
+
+def _to_canonical_form(avro_type: object, namespace: str, defined_names: set) -> str:
+    if isinstance(avro_type, str):
+        if avro_type in PRIMITIVE_TYPES or "." in avro_type or not namespace:
+            return json.dumps(avro_type)
+        return json.dumps(f"{namespace}.{avro_type}")
+    elif isinstance(avro_type, list):
+        return "[" + ",".join(_to_canonical_form(branch, namespace, defined_names) for branch in avro_type) + "]"
+
+    type_name = avro_type[Variables.TYPE]
+    if not isinstance(type_name, str) or (type_name in PRIMITIVE_TYPES and Variables.NAME not in avro_type):
+        # A primitive type with attributes (for example, a logical type) or a nested type definition
+        return _to_canonical_form(type_name, namespace, defined_names)
+
+    attributes = []
+    if type_name in NAMED_TYPES:
+        full_name = get_full_name(avro_type, namespace)
+        if full_name in defined_names:
+            return json.dumps(full_name)
+        defined_names.add(full_name)
+        namespace = full_name.rpartition(".")[0] or None
+        attributes.append(f'"name":{json.dumps(full_name)}')
+    attributes.append(f'"type":{json.dumps("record" if type_name == "error" else type_name)}')
+    if Variables.FIELDS in avro_type:
+        fields = ",".join(
+            f'{{"name":{json.dumps(field[Variables.NAME])},'
+            f'"type":{_to_canonical_form(field[Variables.TYPE], namespace, defined_names)}}}'
+            for field in avro_type[Variables.FIELDS])
+        attributes.append(f'"fields":[{fields}]')
+    if Variables.SYMBOLS in avro_type:
+        attributes.append(f'"symbols":{json.dumps(avro_type[Variables.SYMBOLS], separators=(",", ":"))}')
+    for key in (Variables.ITEMS, Variables.VALUES):
+        if key in avro_type:
+            attributes.append(f'"{key}":{_to_canonical_form(avro_type[key], namespace, defined_names)}')
+    if Variables.SIZE in avro_type:
+        attributes.append(f'"size":{int(avro_type[Variables.SIZE])}')
+    return "{" + ",".join(attributes) + "}"
+
+
+def fingerprint64(data: bytes) -> int:
+    """Computes the CRC-64-AVRO fingerprint of some data.
+
+    :param data: The data (usually, a canonical form encoded as UTF-8).
+    :type data: bytes
+    :return: The fingerprint, as an unsigned 64 bits integer.
+    :rtype: int
+    """
+    fingerprint = FINGERPRINT_EMPTY
+    table = _FINGERPRINT_TABLE
+    for byte in data:
+        fingerprint = (fingerprint >> 8) ^ table[(fingerprint ^ byte) & 0xFF]
+    return fingerprint
+
+
+def get_fingerprint(schema: object) -> str:
+    """Gets the fingerprint of a schema: the CRC-64-AVRO of its canonical form,
+    as the hexadecimal string of its little-endian bytes (like other avro libraries).
+
+    :param schema: An avro schema.
+    :type schema: object
+    :return: The fingerprint.
+    :rtype: str
+    """
+    return fingerprint64(to_canonical_form(schema).encode("utf-8")).to_bytes(8, "little").hex()
+
+
+def project_schema(schema: dict, field_names: List[str]) -> dict:
+    """Creates a record schema with only some fields of another one, in the provided order.
+    It can be used as a reader schema to skip the other fields when a file is decoded.
+    The named types used by the selected fields but defined in other fields are copied to the new schema.
+
+    :param schema: A record schema.
+    :type schema: dict
+    :param field_names: The names of the selected fields.
+    :type field_names: List[str]
+    :raises ValueError: If a field is not in the schema.
+    :return: The projected schema.
+    :rtype: dict
+    """
+    fields = {field[Variables.NAME]: field for field in schema[Variables.FIELDS]}
+    missing_fields = [field_name for field_name in field_names if field_name not in fields]
+    if missing_fields:
+        raise ValueError(f"Fields not in the schema: {missing_fields}")
+
+    namespace = schema.get(Variables.NAMESPACE)
+    definitions = {}
+    for field in schema[Variables.FIELDS]:
+        _collect_named_types(field[Variables.TYPE], namespace, definitions)
+
+    defined_names = {get_full_name(schema, namespace), schema[Variables.NAME]}
+    projected_fields = []
+    for field_name in field_names:
+        field = dict(fields[field_name])
+        field[Variables.TYPE] = _inline_named_types(field[Variables.TYPE], namespace, definitions, defined_names)
+        projected_fields.append(field)
+
+    projected_schema = dict(schema)
+    projected_schema[Variables.FIELDS] = projected_fields
+    return projected_schema
+
+
+def _collect_named_types(avro_type: object, namespace: str, definitions: dict):
+    """Collects the definitions of the named types of an avro type (by name and by full name).
+    """
+    if isinstance(avro_type, list):
+        for branch in avro_type:
+            _collect_named_types(branch, namespace, definitions)
+    elif isinstance(avro_type, dict):
+        type_name = avro_type.get(Variables.TYPE)
+        if type_name in NAMED_TYPES:
+            full_name = get_full_name(avro_type, namespace)
+            definitions[full_name] = avro_type
+            definitions[avro_type[Variables.NAME]] = avro_type
+            namespace = avro_type.get(Variables.NAMESPACE, namespace)
+        for field in avro_type.get(Variables.FIELDS, []):
+            _collect_named_types(field[Variables.TYPE], namespace, definitions)
+        for key in (Variables.ITEMS, Variables.VALUES):
+            if key in avro_type:
+                _collect_named_types(avro_type[key], namespace, definitions)
+        if isinstance(type_name, (dict, list)):
+            _collect_named_types(type_name, namespace, definitions)
+
+
+def _inline_named_types(avro_type: object, namespace: str, definitions: dict, defined_names: set) -> object:
+    """Replaces the first reference to each named type not defined yet with its definition.
+    """
+    if isinstance(avro_type, list):
+        return [_inline_named_types(branch, namespace, definitions, defined_names) for branch in avro_type]
+    elif isinstance(avro_type, str):
+        if avro_type in definitions and avro_type not in defined_names:
+            return _inline_named_types(definitions[avro_type], namespace, definitions, defined_names)
+        return avro_type
+    elif isinstance(avro_type, dict):
+        avro_type = dict(avro_type)
+        type_name = avro_type.get(Variables.TYPE)
+        if type_name in NAMED_TYPES:
+            defined_names.add(get_full_name(avro_type, namespace))
+            defined_names.add(avro_type[Variables.NAME])
+            namespace = avro_type.get(Variables.NAMESPACE, namespace)
+        if Variables.FIELDS in avro_type:
+            avro_type[Variables.FIELDS] = [
+                dict(field, **{Variables.TYPE: _inline_named_types(field[Variables.TYPE], namespace,
+                                                                   definitions, defined_names)})
+                for field in avro_type[Variables.FIELDS]
+            ]
+        for key in (Variables.ITEMS, Variables.VALUES):
+            if key in avro_type:
+                avro_type[key] = _inline_named_types(avro_type[key], namespace, definitions, defined_names)
+        if isinstance(type_name, (dict, list)):
+            avro_type[Variables.TYPE] = _inline_named_types(type_name, namespace, definitions, defined_names)
+        return avro_type
+    return avro_type
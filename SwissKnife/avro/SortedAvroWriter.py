@@ -0,0 +1,265 @@
+import heapq
+import os
+import sys
+import tempfile
+from typing import BinaryIO, Callable, Iterable, Iterator, List, Union
+
+import fastavro
+
+from SwissKnife.avro.AvroWriter import AvroWriter
+from SwissKnife.avro.types import Record
+
+# A sort key: a field name, a list of field names or a function that returns the key of a record
+SortKey = Union[str, List[str], Callable[[Record], object]]
+
+
+def create_sort_key(sort_key: SortKey) -> Callable[[Record], object]:
+    """Creates the key function of a sort key. The None values (and missing fields) go before the other values.
+
+    :param sort_key: A field name, a list of field names or a function that returns the key of a record.
+    :type sort_key: SortKey
+    :return: A function that returns the key of a record.
+    :rtype: Callable[[Record], object]
+    """
+    if callable(sort_key):
+        return sort_key
+    if isinstance(sort_key, str):
+        field = sort_key
+
+        def get_field_key(record: Record) -> tuple:
+            value = record.get(field)
+            return value is not None, value
+        return get_field_key
+
+    fields = tuple(sort_key)
+
+    def get_fields_key(record: Record) -> tuple:
+        return tuple((value is not None, value) for value in map(record.get, fields))
+    return get_fields_key
+
+
+def _estimate_size(record: Record) -> int:
+    """Estimates the memory used by a record: the dict and its values (not the content of nested values).
+    """
+    return sys.getsizeof(record) + sum(map(sys.getsizeof, record.values()))
+
+
+class SortMetrics(object):
+    """
+    Metrics of a SortedAvroWriter:
+        - records: The number of sorted records.
+        - runs: The number of sorted runs written to temporary files, including the intermediate merges.
+        - merge_passes: The number of merge passes (0 if the records were sorted in memory).
+        - spilled_bytes: The size of the temporary files.
+    """
+
+    def __init__(self):
+        self.records = 0
+        self.runs = 0
+        self.merge_passes = 0
+        self.spilled_bytes = 0
+
+    def to_dict(self) -> dict:
+        """Returns the metrics as a dict.
+        :return: A dict that maps a metric name with its value.
+        :rtype: dict
+        """
+        return dict(self.__dict__)
+
+
+class SortedAvroWriter(object):
+    """
+    Writes an avro file with the records sorted by a key (external merge sort). The records are kept in memory
+    until they reach max_run_records or max_run_bytes, and then they are sorted and written to a temporary
+    avro file (a run). When the writer is closed, the runs are merged (at most merge_fan_in runs at the same
+    time, with intermediate merges if there are more runs) and written to the output stream.
+    The used memory depends on the run size and the fan-in, not on the number of records.
+    The sort is stable: the records with the same key keep the order in which they were written.
+    """
+
+    def __init__(self,
+                 output_stream: BinaryIO,
+                 avro_schema: dict,
+                 sort_key: SortKey,
+                 max_run_records: int = 100000,
+                 max_run_bytes: int = None,
+                 merge_fan_in: int = 16,
+                 temp_dir: str = None,
+                 run_codec: str = "null",
+                 writer_options: dict = None):
+        """SortedAvroWriter constructor
+
+        :param output_stream: The file-like object where data will be writed.
+        :type output_stream: file
+        :param avro_schema: A valid avro schema as a dict.
+        :type avro_schema: dict
+        :param sort_key: A field name, a list of field names or a function that returns the key of a record
+        (see create_sort_key). The records of the runs are decoded by fastavro before they are merged, so a
+        function must also accept the python values of the logical types (e.g. datetime for timestamps).
+        :type sort_key: SortKey
+        :param max_run_records: The maximum number of records of a run, defaults to 100000
+        :type max_run_records: int, optional
+        :param max_run_bytes: The maximum memory used by the records of a run. It is estimated with the size
+        of the dicts and their values. Defaults to None (no limit)
+        :type max_run_bytes: int, optional
+        :param merge_fan_in: The maximum number of runs merged at the same time, defaults to 16
+        :type merge_fan_in: int, optional
+        :param temp_dir: The directory of the temporary files, defaults to None (the default temporary directory)
+        :type temp_dir: str, optional
+        :param run_codec: The compression codec of the temporary files, defaults to "null"
+        :type run_codec: str, optional
+        :param writer_options: Other arguments of the AvroWriter of the output (codec, block_bytes...),
+        defaults to None
+        :type writer_options: dict, optional
+        """
+        if max_run_records < 1:
+            raise ValueError(f"The maximum number of records of a run must be positive: {max_run_records}")
+        if merge_fan_in < 2:
+            raise ValueError(f"The merge fan-in must be at least 2: {merge_fan_in}")
+        self.avro_schema = avro_schema
+        self.sort_key = create_sort_key(sort_key)
+        self.max_run_records = max_run_records
+        self.max_run_bytes = max_run_bytes
+        self.merge_fan_in = merge_fan_in
+        self.run_codec = run_codec
+        self.metrics = SortMetrics()
+        self.avro_writer = AvroWriter(output_stream, avro_schema, **(writer_options or {}))
+        self._temp_dir = tempfile.TemporaryDirectory(prefix="sorted-avro-", dir=temp_dir)
+        self._run_paths = []
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._temp_dir.cleanup()
+
+    def write(self, record: Record):
+        """Adds a record. It is written to a run when the buffer is full.
+
+        :param record: A record that matchs with the current schema.
+        :type record: Record
+        :raises AvroMatchingException: When a record of the run doesn't match with the current schema.
+        :raises ValueError: If the writer is closed.
+        """
+        if self._closed:
+            raise ValueError("The writer is closed")
+        self._buffer.append(record)
+        self.metrics.records += 1
+        if self.max_run_bytes is not None:
+            self._buffer_bytes += _estimate_size(record)
+            if self._buffer_bytes >= self.max_run_bytes:
+                self._spill_run()
+                return
+        if len(self._buffer) >= self.max_run_records:
+            self._spill_run()
+
+    def write_many(self, records: Iterable[Record]) -> int:
+        """Adds several records.
+
+        :param records: The records. They must match with the current schema.
+        :type records: Iterable[Record]
+        :return: The number of records.
+        :rtype: int
+        """
+        num_records = 0
+        for record in records:
+            self.write(record)
+            num_records += 1
+        return num_records
+
+    def close(self):
+        """Merges the runs, writes the sorted records to the output stream and removes the temporary files.
+
+        :raises AvroMatchingException: When a record doesn't match with the current schema.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            if not self._run_paths:
+                # All the records fit in memory
+                self._buffer.sort(key=self.sort_key)
+                self.avro_writer.write_many(self._buffer)
+                self._buffer = []
+            else:
+                if self._buffer:
+                    self._spill_run()
+                self._merge_runs()
+            self.avro_writer.close()
+        finally:
+            self._temp_dir.cleanup()
+
+    def _spill_run(self):
+        """Sorts the buffer and writes it to a new run.
+        """
+        self._buffer.sort(key=self.sort_key)
+        path = self._write_run(self._buffer)
+        self._run_paths.append(path)
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def _write_run(self, records: Iterable[Record]) -> str:
+        """Writes sorted records to a new temporary file.
+
+        :return: The path of the file.
+        :rtype: str
+        """
+        path = os.path.join(self._temp_dir.name, f"run-{self.metrics.runs:06d}.avro")
+        with open(path, "wb") as run_file:
+            run_writer = AvroWriter(run_file, self.avro_schema, codec=self.run_codec)
+            run_writer.write_many(records)
+            run_writer.close()
+        self.metrics.runs += 1
+        self.metrics.spilled_bytes += run_writer.counters.bytes
+        return path
+
+    def _merge_runs(self):
+        """Merges the runs in groups of merge_fan_in runs until they can be merged into the output.
+        """
+        run_paths = self._run_paths
+        while len(run_paths) > self.merge_fan_in:
+            merged_paths = []
+            for start in range(0, len(run_paths), self.merge_fan_in):
+                group = run_paths[start:start + self.merge_fan_in]
+                if len(group) == 1:
+                    merged_paths.append(group[0])
+                    continue
+                with _RunReaders(group) as runs:
+                    merged_paths.append(self._write_run(heapq.merge(*runs, key=self.sort_key)))
+            self.metrics.merge_passes += 1
+            run_paths = merged_paths
+
+        with _RunReaders(run_paths) as runs:
+            self.avro_writer.write_many(heapq.merge(*runs, key=self.sort_key))
+        self.metrics.merge_passes += 1
+        self._run_paths = []
+
+
+class _RunReaders(object):
+    """
+    Opens the readers of some runs, and removes the files when they are closed.
+    """
+
+    def __init__(self, paths: List[str]):
+        self.paths = paths
+        self.files = []
+
+    def __enter__(self) -> List[Iterator[Record]]:
+        readers = []
+        for path in self.paths:
+            run_file = open(path, "rb")
+            self.files.append(run_file)
+            readers.append(iter(fastavro.reader(run_file)))
+        return readers
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        for run_file in self.files:
+            run_file.close()
+        for path in self.paths:
+            os.remove(path)
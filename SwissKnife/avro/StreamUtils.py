@@ -0,0 +1,45 @@
+import io
+from typing import BinaryIO
+
+
+def open_input_stream(source, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> (BinaryIO, bool):
+    """Opens a binary stream to read the data of a source. The source can be:
+        - A local path.
+        - A file-like object (it is returned as is).
+        - A Google Storage blob. It is read by ranges of buffer_size bytes, without downloading it entirely.
+
+    :param source: A local path, a file-like object or a Google Storage blob.
+    :param buffer_size: The size of the read buffer, defaults to io.DEFAULT_BUFFER_SIZE
+    :type buffer_size: int, optional
+    :raises TypeError: If the source is not supported.
+    :return: The stream and a flag that indicates if the caller must close it (it was opened by this function).
+    :rtype: (BinaryIO, bool)
+    """
+    if isinstance(source, str):
+        return open(source, "rb", buffering=buffer_size), True
+    elif hasattr(source, "read"):
+        return source, False
+    elif hasattr(source, "download_as_string"):
+        # Imported here because the 'gcloud' tag is optional
+        from SwissKnife.gcloud.GCloudBlobReader import GCloudBlobReader
+        buffer_size = max(buffer_size, GCloudBlobReader.DEFAULT_CHUNK_SIZE)
+        return io.BufferedReader(GCloudBlobReader(source), buffer_size=buffer_size), True
+    raise TypeError(f"Unsupported input source: {source}")
+
+
+def open_output_stream(sink, buffer_size: int = io.DEFAULT_BUFFER_SIZE) -> (BinaryIO, bool):
+    """Opens a stream to write data. The sink can be a local path or a file-like object
+    (for example, a GCloudStreaming object), that is returned as is.
+
+    :param sink: A local path or a file-like object.
+    :param buffer_size: The size of the write buffer of local files, defaults to io.DEFAULT_BUFFER_SIZE
+    :type buffer_size: int, optional
+    :raises TypeError: If the sink is not supported.
+    :return: The stream and a flag that indicates if the caller must close it (it was opened by this function).
+    :rtype: (BinaryIO, bool)
+    """
+    if isinstance(sink, str):
+        return open(sink, "wb", buffering=buffer_size), True
+    elif hasattr(sink, "write"):
+        return sink, False
+    raise TypeError(f"Unsupported output sink: {sink}")
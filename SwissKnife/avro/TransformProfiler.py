@@ -0,0 +1,183 @@
+import time
+from typing import Callable
+
+from SwissKnife.avro.AvroTransformer import AvroTransformer
+from SwissKnife.avro.types import Record, Variables
+
+# The profiled steps of each field
+STEPS = ("rename", "transform", "default", "cast")
+
+# The union branches that a python type can come from, in order of preference
+BRANCHES_BY_PYTHON_TYPE = {
+    type(None): ("null",),
+    bool: ("boolean",),
+    int: ("int", "long"),
+    float: ("double", "float"),
+    str: ("string", "enum"),
+    bytes: ("bytes", "fixed"),
+    dict: ("record", "map"),
+    list: ("array",),
+}
+
+
+class TransformProfiler(object):
+    """
+    Counters of the calls and the time spent by each field of an AvroTransformer in each step
+    (rename, transform, default and cast), and of the union branches that the casted values resolve to.
+    The profiled transformation is a different function, so transformers without profiler have no overhead.
+    """
+
+    def __init__(self,
+                 reporter: Callable[[dict], None] = None,
+                 report_every: int = 10000):
+        """TransformProfiler constructor
+
+        :param reporter: A function that receives a snapshot of the counters every report_every records,
+        defaults to None
+        :type reporter: Callable[[dict], None], optional
+        :param report_every: The number of records between two reports, defaults to 10000
+        :type report_every: int, optional
+        """
+        self.reporter = reporter
+        self.report_every = report_every
+        self.num_records = 0
+        # Per field: [calls, time] of each step, in STEPS order
+        self.step_counters = {}
+        # Per field: number of casted values of each python type
+        self.type_counters = {}
+        self.field_types = {}
+
+    def create_profiled_function(self, avro_transformer: AvroTransformer) -> Callable[[Record], Record]:
+        """
+        Creates a function that works like the compiled function of an AvroTransformer (it is built from
+        the same fields plan), but its steps update the counters of this profiler.
+        :param avro_transformer: The profiled transformer.
+        :type avro_transformer: AvroTransformer
+        :return: A function that transforms a record.
+        :rtype: Callable[[Record], Record]
+        """
+        for field_name, types_list in avro_transformer.cast_dict.items():
+            self.step_counters[field_name] = [0, 0.0] * len(STEPS)
+            self.type_counters[field_name] = {}
+            self.field_types[field_name] = types_list
+
+        fields_plan = tuple(
+            field_plan._replace(
+                transform_function=None if field_plan.transform_function is None else
+                self._profile_transform(field_plan.transform_function, self.step_counters[field_plan.name]),
+                cast_function=self._profile_cast(field_plan.cast_function, self.step_counters[field_plan.name],
+                                                 self.type_counters[field_plan.name]))
+            for field_plan in avro_transformer.get_fields_plan()
+        )
+        record_function = AvroTransformer.create_record_function(
+            fields_plan, self._profile_rename(avro_transformer.rename_dict.get),
+            count_default=self._count_default)
+
+        def profiled_function(record: Record) -> Record:
+            new_record = record_function(record)
+            self.num_records += 1
+            if self.reporter is not None and self.num_records % self.report_every == 0:
+                self.report()
+            return new_record
+
+        return profiled_function
+
+    def _profile_rename(self, get_new_key: Callable[[str], str]) -> Callable[[str], str]:
+        step_counters = self.step_counters
+        perf_counter = time.perf_counter
+
+        def profiled_get_new_key(key: str) -> str:
+            start = perf_counter()
+            new_key = get_new_key(key)
+            if new_key is not None:
+                counters = step_counters[new_key]
+                counters[0] += 1
+                counters[1] += perf_counter() - start
+            return new_key
+        return profiled_get_new_key
+
+    def _count_default(self, field_name: str):
+        self.step_counters[field_name][4] += 1
+
+    @staticmethod
+    def _profile_transform(transform_function: Callable[[object, dict], object],
+                           counters: list) -> Callable[[object, dict], object]:
+        perf_counter = time.perf_counter
+
+        def profiled_transform(value: object, record: dict) -> object:
+            start = perf_counter()
+            value = transform_function(value, record)
+            counters[2] += 1
+            counters[3] += perf_counter() - start
+            return value
+        return profiled_transform
+
+    @staticmethod
+    def _profile_cast(cast_function: Callable[[object], object], counters: list,
+                      type_counters: dict) -> Callable[[object], object]:
+        perf_counter = time.perf_counter
+
+        def profiled_cast(value: object) -> object:
+            start = perf_counter()
+            casted_value = cast_function(value)
+            counters[6] += 1
+            counters[7] += perf_counter() - start
+            value_type = type(casted_value)
+            type_counters[value_type] = type_counters.get(value_type, 0) + 1
+            return casted_value
+        return profiled_cast
+
+    def snapshot(self) -> dict:
+        """Returns the current values of the counters.
+
+        :return: A dict with the number of transformed "records" and the counters of the "fields".
+        Each field has the "calls" and the "time" (in seconds) of each step, and the number of
+        values of each union branch ("branches").
+        :rtype: dict
+        """
+        fields = {}
+        for field_name, counters in self.step_counters.items():
+            field_profile = {step: {"calls": counters[2 * position], "time": counters[2 * position + 1]}
+                             for position, step in enumerate(STEPS)}
+            branches = {}
+            for value_type, count in list(self.type_counters[field_name].items()):
+                branch = TransformProfiler._get_branch_name(value_type, self.field_types[field_name])
+                branches[branch] = branches.get(branch, 0) + count
+            field_profile["branches"] = branches
+            fields[field_name] = field_profile
+        return {"records": self.num_records, "fields": fields}
+
+    def report(self):
+        """Sends a snapshot of the counters to the reporter.
+        """
+        if self.reporter is not None:
+            self.reporter(self.snapshot())
+
+    def reset(self):
+        """Sets all the counters to zero.
+        """
+        self.num_records = 0
+        for field_name, counters in self.step_counters.items():
+            counters[:] = [0, 0.0] * len(STEPS)
+            self.type_counters[field_name].clear()
+
+    @staticmethod
+    def _get_branch_name(value_type: type, types_list: list) -> str:
+        """
+        Gets the name of the union branch of a casted value from its python type.
+        :param value_type: The python type of the casted value.
+        :type value_type: type
+        :param types_list: The types of the field.
+        :type types_list: list
+        :return: The branch name (or the name of the python type if there is not a matching branch).
+        :rtype: str
+        """
+        candidates = BRANCHES_BY_PYTHON_TYPE.get(value_type, ())
+        for avro_type in types_list if isinstance(types_list, list) else [types_list]:
+            if isinstance(avro_type, dict):
+                branch = avro_type.get(Variables.LOGICAL_TYPE) or avro_type.get(Variables.TYPE)
+                if avro_type.get(Variables.TYPE) in candidates:
+                    return branch
+            elif avro_type in candidates:
+                return avro_type
+        return candidates[0] if candidates else value_type.__name__
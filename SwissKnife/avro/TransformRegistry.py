@@ -0,0 +1,342 @@
+import itertools
+import re
+from typing import Callable, List, Tuple
+
+from SwissKnife.calendar.WeekUtils import get_week_format_from_timestamp
+
+# A transform function receives the current value of a field and the entire record.
+TransformFunction = Callable[[object, dict], object]
+# A transform factory receives the arguments of the expression and returns a transform function.
+TransformFactory = Callable[..., TransformFunction]
+
+_TOKEN_REGEX = re.compile(r"""\s*(?:
+    (?P<number>-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?) |
+    (?P<string>'[^']*'|"[^"]*") |
+    (?P<name>[A-Za-z_]\w*) |
+    (?P<symbol>[(),|])
+)""", re.VERBOSE)
+
+_CONSTANTS = {"true": True, "false": False, "null": None}
+
+# The versions of the registries. They are unique among all the registries, so a copy never has
+# the version of the original registry
+_VERSIONS = itertools.count()
+
+
+class TransformRegistry(object):
+    """
+    A registry of transform functions that can be used in the "transform" field of an avro schema.
+    A transform is an expression with one or more function calls chained with "|". For example:
+
+        "copyFrom(date) | epochToWeek"
+        "strip | lower | defaultIfEmpty('unknown')"
+        "scale(0.01) | clamp(0, 100)"
+
+    The arguments can be numbers, quoted strings, true, false, null or names (passed as strings).
+    Expressions are parsed only once, when the schema is loaded, into a single transform function.
+    """
+
+    def __init__(self):
+        self._factories = {}
+        # It changes every time a function is registered, so compiled transforms can be invalidated
+        self.version = next(_VERSIONS)
+
+    def register(self, name: str, factory: TransformFactory = None):
+        """
+        Registers a transform factory: a function that receives the arguments of the expression
+        and returns a transform function (value, record) -> new value. It can be used as a decorator.
+        :param name: The name of the transform in the expressions.
+        :type name: str
+        :param factory: The transform factory. If it is None, a decorator is returned.
+        :type factory: TransformFactory, optional
+        :return: The factory (or a decorator that registers it).
+        """
+        if factory is None:
+            return lambda decorated_factory: self.register(name, decorated_factory)
+        self._factories[name] = factory
+        self.version = next(_VERSIONS)
+        return factory
+
+    def copy(self) -> "TransformRegistry":
+        """
+        Creates a new registry with the same transforms. New transforms can be registered in it
+        without modifying this one. The new registry has its own version.
+        :return: A new registry.
+        :rtype: TransformRegistry
+        """
+        new_registry = TransformRegistry()
+        new_registry._factories = dict(self._factories)
+        return new_registry
+
+    def get_factory(self, name: str) -> TransformFactory:
+        """
+        Returns the factory of a registered transform.
+        :param name: The name of the transform.
+        :type name: str
+        :return: The transform factory, or None if it is not registered.
+        :rtype: TransformFactory
+        """
+        return self._factories.get(name)
+
+    def get_names(self) -> List[str]:
+        """
+        Returns the names of the registered transforms.
+        :return: A list of names.
+        :rtype: List[str]
+        """
+        return list(self._factories.keys())
+
+    def compile(self, transform_name: str) -> TransformFunction:
+        """
+        Parses a transform expression and returns a transform function.
+        :param transform_name: The transform expression.
+        :type transform_name: str
+        :raises RuntimeError: If the expression is invalid or it uses a not registered function.
+        :return: A transform function.
+        :rtype: TransformFunction
+        """
+        transform_functions = []
+        for name, args in TransformRegistry._parse(transform_name):
+            if name not in self._factories:
+                raise RuntimeError(f"Invalid or unsupported name for a transform function: '{transform_name}'")
+            try:
+                transform_functions.append(self._factories[name](*args))
+            except (TypeError, ValueError, re.error) as ex:
+                raise RuntimeError(f"Invalid arguments for transform function '{name}' in '{transform_name}': {ex}")
+
+        if len(transform_functions) == 1:
+            return transform_functions[0]
+
+        transform_functions = tuple(transform_functions)
+
+        def chained_transform(value: object, record: dict) -> object:
+            for transform_function in transform_functions:
+                value = transform_function(value, record)
+            return value
+        return chained_transform
+
+    @staticmethod
+    def _parse(transform_name: str) -> List[Tuple[str, list]]:
+        """
+        Parses a transform expression.
+        :param transform_name: The transform expression.
+        :type transform_name: str
+        :raises RuntimeError: If the expression is invalid.
+        :return: A list with the name and the arguments of each function call.
+        :rtype: List[Tuple[str, list]]
+        """
+        tokens = TransformRegistry._tokenize(transform_name)
+        calls = []
+        position = 0
+
+        def next_token(expected_kind: str = None, expected_text: str = None) -> Tuple[str, str]:
+            nonlocal position
+            if position >= len(tokens):
+                raise RuntimeError(f"Unexpected end of transform expression: '{transform_name}'")
+            kind, text = tokens[position]
+            if (expected_kind and kind != expected_kind) or (expected_text and text != expected_text):
+                raise RuntimeError(f"Unexpected '{text}' in transform expression: '{transform_name}'")
+            position += 1
+            return kind, text
+
+        while True:
+            _, name = next_token("name")
+            args = []
+            if position < len(tokens) and tokens[position][1] == "(":
+                next_token("symbol", "(")
+                if tokens[position:position + 1] == [("symbol", ")")]:
+                    next_token("symbol", ")")
+                else:
+                    while True:
+                        args.append(TransformRegistry._get_argument(*next_token()))
+                        _, text = next_token("symbol")
+                        if text == ")":
+                            break
+                        elif text != ",":
+                            raise RuntimeError(f"Unexpected '{text}' in transform expression: '{transform_name}'")
+            calls.append((name, args))
+            if position == len(tokens):
+                return calls
+            next_token("symbol", "|")
+
+    @staticmethod
+    def _tokenize(transform_name: str) -> List[Tuple[str, str]]:
+        """
+        Splits a transform expression into (kind, text) tokens.
+        :param transform_name: The transform expression.
+        :type transform_name: str
+        :raises RuntimeError: If the expression has invalid characters.
+        :return: A list of tokens.
+        :rtype: List[Tuple[str, str]]
+        """
+        expression = transform_name.strip()
+        tokens = []
+        position = 0
+        while position < len(expression):
+            match = _TOKEN_REGEX.match(expression, position)
+            if match is None:
+                raise RuntimeError(f"Invalid transform expression: '{transform_name}'")
+            tokens.append((match.lastgroup, match.group(match.lastgroup)))
+            position = match.end()
+        return tokens
+
+    @staticmethod
+    def _get_argument(kind: str, text: str) -> object:
+        """
+        Converts an argument token to its value.
+        :param kind: The kind of the token.
+        :type kind: str
+        :param text: The text of the token.
+        :type text: str
+        :raises RuntimeError: If the token is not a valid argument.
+        :return: The value of the argument.
+        :rtype: object
+        """
+        if kind == "number":
+            return float(text) if any(char in text for char in ".eE") else int(text)
+        elif kind == "string":
+            return text[1:-1]
+        elif kind == "name":
+            return _CONSTANTS.get(text, text)
+        raise RuntimeError(f"Unexpected '{text}' in transform expression")
+
+
+DEFAULT_TRANSFORM_REGISTRY = TransformRegistry()
+
+
+def register_transform(name: str, factory: TransformFactory = None):
+    """
+    Registers a transform factory in the default registry. It can be used as a decorator:
+
+        @register_transform("double")
+        def double_factory():
+            return lambda value, record: None if value is None else value * 2
+
+    :param name: The name of the transform in the expressions.
+    :type name: str
+    :param factory: The transform factory. If it is None, a decorator is returned.
+    :type factory: TransformFactory, optional
+    :return: The factory (or a decorator that registers it).
+    """
+    return DEFAULT_TRANSFORM_REGISTRY.register(name, factory)
+
+
+def _to_number(value: object) -> object:
+    if type(value) is str:
+        # Str value can contains "comma" instead of "dot"
+        return float(value.replace(",", "."))
+    return value
+
+
+@register_transform("int2boolean")
+def _int2boolean_factory() -> TransformFunction:
+    """int2boolean: Transform an int to a boolean. True if x > 0, otherwise False."""
+    def int2boolean(value: int, record: dict) -> bool:
+        if value is None:
+            return None
+        else:
+            return int(value) > 0
+    return int2boolean
+
+
+@register_transform("copyFrom")
+def _copy_from_factory(copied_field: str) -> TransformFunction:
+    """copyFrom(y): Return the value of field Y. The current value of the target field is ignored."""
+    copied_field = str(copied_field)
+
+    def copyFrom(value: object, record: dict) -> object:
+        if copied_field in record:
+            return record[copied_field]
+        else:
+            raise RuntimeError("Invalid field in copyFrom")
+    return copyFrom
+
+
+@register_transform("scale")
+def _scale_factory(factor: float) -> TransformFunction:
+    """scale(f): Multiply the value by f."""
+    if type(factor) not in (int, float):
+        # A quoted factor, like scale('2')
+        factor = float(factor)
+        if factor.is_integer():
+            factor = int(factor)
+
+    def scale(value: object, record: dict) -> object:
+        if value is None:
+            return None
+        return _to_number(value) * factor
+    return scale
+
+
+@register_transform("clamp")
+def _clamp_factory(min_value: float, max_value: float) -> TransformFunction:
+    """clamp(min, max): Limit the value to the range [min, max]. null means no limit."""
+    def clamp(value: object, record: dict) -> object:
+        if value is None:
+            return None
+        value = _to_number(value)
+        if min_value is not None and value < min_value:
+            return min_value
+        if max_value is not None and value > max_value:
+            return max_value
+        return value
+    return clamp
+
+
+@register_transform("defaultIfEmpty")
+def _default_if_empty_factory(default_value: object) -> TransformFunction:
+    """defaultIfEmpty(x): Return x if the value is null or an empty string."""
+    def defaultIfEmpty(value: object, record: dict) -> object:
+        if value is None or value == "":
+            return default_value
+        return value
+    return defaultIfEmpty
+
+
+@register_transform("lower")
+def _lower_factory() -> TransformFunction:
+    """lower: Convert the value to a lowercase string."""
+    def lower(value: object, record: dict) -> str:
+        return None if value is None else str(value).lower()
+    return lower
+
+
+@register_transform("upper")
+def _upper_factory() -> TransformFunction:
+    """upper: Convert the value to an uppercase string."""
+    def upper(value: object, record: dict) -> str:
+        return None if value is None else str(value).upper()
+    return upper
+
+
+@register_transform("strip")
+def _strip_factory() -> TransformFunction:
+    """strip: Remove the leading and trailing whitespaces of the value."""
+    def strip(value: object, record: dict) -> str:
+        return None if value is None else str(value).strip()
+    return strip
+
+
+@register_transform("regexExtract")
+def _regex_extract_factory(pattern: str, group: int = 1) -> TransformFunction:
+    """regexExtract(pattern, group=1): Return a group of the first match of the pattern, or null."""
+    compiled_pattern = re.compile(pattern)
+    if compiled_pattern.groups == 0:
+        group = 0
+
+    def regexExtract(value: object, record: dict) -> str:
+        if value is None:
+            return None
+        match = compiled_pattern.search(str(value))
+        return match.group(group) if match else None
+    return regexExtract
+
+
+@register_transform("epochToWeek")
+def _epoch_to_week_factory() -> TransformFunction:
+    """epochToWeek: Convert a timestamp in milliseconds to the week format, e.g: 2020W01."""
+    def epochToWeek(value: object, record: dict) -> str:
+        if value is None or value == "":
+            return None
+        return get_week_format_from_timestamp(value)
+    return epochToWeek
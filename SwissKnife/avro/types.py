@@ -14,3 +14,11 @@ class Variables:
     TRANSFORM = "transform"
     TYPE = "type"
     DEFAULT = "default"
+    NAMESPACE = "namespace"
+    SYMBOLS = "symbols"
+    ITEMS = "items"
+    VALUES = "values"
+    SIZE = "size"
+    LOGICAL_TYPE = "logicalType"
+    SCALE = "scale"
+    MEMOIZE = "memoize"
@@ -0,0 +1,79 @@
+import io
+import logging
+
+from google.cloud.storage.blob import Blob
+
+
+class GCloudBlobReader(io.RawIOBase):
+    """
+    A read-only, seekable file-like object over a Google Storage blob. The data is downloaded
+    by ranges when it is read, so a blob can be read in a streaming way without downloading it entirely.
+    Wrap it in an io.BufferedReader to download the data in chunks:
+
+        stream = io.BufferedReader(GCloudBlobReader(blob), buffer_size=GCloudBlobReader.DEFAULT_CHUNK_SIZE)
+    """
+
+    DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024  # 8 Mb
+
+    def __init__(self, blob: Blob, logger: logging.Logger = logging.getLogger("GCloudBlobReader")):
+        """The constructor of a GCloudBlobReader object
+
+        :param blob: The blob to read.
+        :type blob: Blob
+        :param logger: A custom logger.
+        :type logger: logging.Logger
+        """
+        super().__init__()
+        self.blob = blob
+        if self.blob.size is None:
+            self.blob.reload()
+        self.size = self.blob.size
+        self.position = 0
+        self.logger = logger
+        self.logger.info(f"Reading blob {self.blob.name} ({self.size} bytes)")
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        """Changes the position of the stream.
+
+        :param offset: The offset relative to whence.
+        :type offset: int
+        :param whence: io.SEEK_SET, io.SEEK_CUR or io.SEEK_END, defaults to io.SEEK_SET
+        :type whence: int, optional
+        :return: The new position.
+        :rtype: int
+        """
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = self.size + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        """Downloads the next range of the blob into the buffer.
+
+        :param buffer: A writable buffer.
+        :return: The number of bytes read (0 at the end of the blob).
+        :rtype: int
+        """
+        if self.position >= self.size or len(buffer) == 0:
+            return 0
+        end = min(self.position + len(buffer), self.size) - 1
+        # download_as_bytes is not available in old versions of google-cloud-storage
+        download = getattr(self.blob, "download_as_bytes", None) or self.blob.download_as_string
+        data = download(start=self.position, end=end)
+        buffer[:len(data)] = data
+        self.position += len(data)
+        return len(data)
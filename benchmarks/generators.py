@@ -0,0 +1,133 @@
+"""
+Generators of synthetic avro schemas and records for the benchmarks.
+The records are "raw" records, like the ones read from a CSV file: strings, numbers as strings,
+missing fields and aliases instead of field names.
+"""
+import random
+from typing import List, NamedTuple
+
+from SwissKnife.avro.types import Record
+
+# Types of the generated fields: (avro type, transform)
+FIELD_TYPES = [
+    (["null", "string"], None),
+    (["null", "int"], None),
+    (["null", "double"], None),
+    ("boolean", "int2boolean"),
+    (["null", "string"], "strip | lower"),
+]
+
+# Union types with several castable branches, for the heavy union profile
+UNION_TYPES = [
+    ["null", "int", "double", "string"],
+    ["null", "double", "int", "boolean", "string"],
+    ["null", "string", "int"],
+]
+
+
+class SchemaProfile(NamedTuple):
+    """
+    The shape of a synthetic schema:
+        - num_fields: The number of fields.
+        - num_aliases: The number of aliases of each field.
+        - union_types: If the fields use union types with several castable branches.
+        - alias_ratio: The ratio of fields named with an alias in the records.
+        - missing_ratio: The ratio of fields that are not in the records (their default value is used).
+    """
+    name: str
+    num_fields: int
+    num_aliases: int = 0
+    union_types: bool = False
+    alias_ratio: float = 0.0
+    missing_ratio: float = 0.1
+
+
+PROFILES = [
+    SchemaProfile("narrow", num_fields=10),
+    SchemaProfile("wide", num_fields=300),
+    SchemaProfile("aliases", num_fields=50, num_aliases=5, alias_ratio=0.8),
+    SchemaProfile("unions", num_fields=50, union_types=True),
+]
+
+
+def generate_schema(profile: SchemaProfile, seed: int = 0) -> dict:
+    """Generates an avro schema with the shape of a profile.
+
+    :param profile: The shape of the schema.
+    :type profile: SchemaProfile
+    :param seed: The seed of the random generator, defaults to 0
+    :type seed: int, optional
+    :return: An avro schema.
+    :rtype: dict
+    """
+    rand = random.Random(seed)
+    fields = []
+    for position in range(profile.num_fields):
+        field = {"name": f"field_{position}"}
+        if profile.num_aliases > 0:
+            field["aliases"] = [f"alias_{position}_{alias}" for alias in range(profile.num_aliases)]
+        if profile.union_types:
+            field["type"] = rand.choice(UNION_TYPES)
+            field["default"] = None
+        else:
+            field["type"], transform = FIELD_TYPES[position % len(FIELD_TYPES)]
+            if transform is not None:
+                field["transform"] = transform
+            field["default"] = False if field["type"] == "boolean" else None
+        fields.append(field)
+    return {"type": "record", "name": f"{profile.name}_record", "fields": fields}
+
+
+def generate_value(avro_type: object, rand: random.Random) -> str:
+    """Generates a raw value (a string, as it is read from a CSV file) for a type.
+
+    :param avro_type: The avro type of the field.
+    :type avro_type: object
+    :param rand: The random generator.
+    :type rand: random.Random
+    :return: The raw value.
+    :rtype: str
+    """
+    castable_types = [branch for branch in (avro_type if isinstance(avro_type, list) else [avro_type])
+                      if branch != "null"]
+    castable_type = castable_types[0]
+    if castable_type == "int":
+        return str(rand.randint(-100000, 100000))
+    elif castable_type == "double":
+        # Some values use a comma as decimal separator
+        value = f"{rand.uniform(-1000, 1000):.2f}"
+        return value.replace(".", ",") if rand.random() < 0.3 else value
+    elif castable_type == "boolean":
+        return rand.choice(["0", "1"])
+    return "".join(rand.choice("abcdefghijklmnopqrstuvwxyz ") for _ in range(rand.randint(3, 30)))
+
+
+def generate_records(schema: dict, profile: SchemaProfile, num_records: int, seed: int = 0) -> List[Record]:
+    """Generates raw records for a schema.
+
+    :param schema: The schema generated with the profile.
+    :type schema: dict
+    :param profile: The profile of the schema.
+    :type profile: SchemaProfile
+    :param num_records: The number of records.
+    :type num_records: int
+    :param seed: The seed of the random generator, defaults to 0
+    :type seed: int, optional
+    :return: The records.
+    :rtype: List[Record]
+    """
+    rand = random.Random(seed)
+    records = []
+    for _ in range(num_records):
+        record = {}
+        for field in schema["fields"]:
+            if rand.random() < profile.missing_ratio:
+                continue
+            name = field["name"]
+            if field.get("aliases") and rand.random() < profile.alias_ratio:
+                name = rand.choice(field["aliases"])
+            record[name] = generate_value(field["type"], rand)
+        # Unknown columns are removed by the transformer
+        record["unknown_column"] = "x"
+        records.append(record)
+    return records
@@ -0,0 +1,319 @@
+"""
+Benchmarks of the hot paths of the avro package. They run offline, with synthetic data.
+
+Usage:
+    python benchmarks/run_benchmarks.py                              # Print the results
+    python benchmarks/run_benchmarks.py --save baseline.json         # Save the results as a baseline
+    python benchmarks/run_benchmarks.py --compare baseline.json      # Fail if a benchmark is slower than the baseline
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple
+
+# The benchmarks are not part of the package, so the repo root is added to the path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fastavro  # noqa: E402
+
+from SwissKnife.avro.AvroReader import AvroReader  # noqa: E402
+from SwissKnife.avro.AvroTransformer import AvroTransformer  # noqa: E402
+from SwissKnife.avro.AvroWriter import AvroWriter, WriteMode, encode_records, get_available_codecs  # noqa: E402
+from generators import PROFILES, generate_records, generate_schema  # noqa: E402
+
+# Values of each type for the _get_casted_value benchmarks: (name, types list, values)
+CAST_CASES = [
+    ("int", ["int"], ["1", "-25", "100000", "7"]),
+    ("double", ["double"], ["1.5", "2,75", "-3", "1000.25"]),
+    ("boolean", ["boolean"], [True, False, 1, 0]),
+    ("string", ["string"], ["a", "abc", "a longer string", ""]),
+    ("nullable_int", ["null", "int"], ["1", None, "", "7"]),
+    ("union", ["null", "double", "int", "boolean", "string"], ["1.5", None, "2,5", "3"]),
+]
+
+
+class BenchmarkResult(NamedTuple):
+    """
+    The result of a benchmark: the best throughput of all the repetitions.
+    """
+    name: str
+    records_per_second: float
+    bytes_per_second: float = None
+
+
+def measure(function: Callable[[], int], num_records: int, repeat: int) -> (float, float):
+    """Runs a function several times and returns the best throughput.
+
+    :param function: The benchmarked function. It returns the number of processed bytes (or None).
+    :type function: Callable[[], int]
+    :param num_records: The number of records processed by the function.
+    :type num_records: int
+    :param repeat: The number of repetitions.
+    :type repeat: int
+    :return: The records per second and the bytes per second (None if the function doesn't return bytes).
+    :rtype: (float, float)
+    """
+    best_time = None
+    num_bytes = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        num_bytes = function()
+        elapsed = time.perf_counter() - start
+        best_time = elapsed if best_time is None else min(best_time, elapsed)
+    best_time = max(best_time, 1e-9)
+    return num_records / best_time, None if num_bytes is None else num_bytes / best_time
+
+
+def benchmark_transformer(num_records: int, repeat: int) -> List[BenchmarkResult]:
+    """Benchmarks apply_all_transforms (default and compiled modes) and each one of its steps."""
+    results = []
+    for profile in PROFILES:
+        schema = generate_schema(profile)
+        records = generate_records(schema, profile, num_records)
+        transformer = AvroTransformer(schema)
+        compiled_transformer = AvroTransformer(schema, compiled=True)
+
+        # The input of each step is the output of the previous one
+        renamed_records = [transformer.get_renamed_record_and_remove_invalid_fields(record) for record in records]
+        transformed_records = [transformer.get_transformed_record(record) for record in renamed_records]
+        records_with_defaults = [transformer.get_record_with_defaults(record) for record in transformed_records]
+
+        cases = {
+            "apply_all_transforms": (transformer.apply_all_transforms, records),
+            "apply_all_transforms_compiled": (compiled_transformer.apply_all_transforms, records),
+            "rename": (transformer.get_renamed_record_and_remove_invalid_fields, records),
+            "transform": (transformer.get_transformed_record, renamed_records),
+            "defaults": (transformer.get_record_with_defaults, transformed_records),
+            "cast": (transformer.get_record_with_casted_values, records_with_defaults),
+        }
+        for case_name, (function, inputs) in cases.items():
+            def run(function=function, inputs=inputs):
+                for record in inputs:
+                    function(record)
+            records_per_second, _ = measure(run, len(inputs), repeat)
+            results.append(BenchmarkResult(f"transformer.{profile.name}.{case_name}", records_per_second))
+    return results
+
+
+def benchmark_casts(num_records: int, repeat: int) -> List[BenchmarkResult]:
+    """Benchmarks _get_casted_value for each type (the results are values per second)."""
+    results = []
+    for case_name, types_list, values in CAST_CASES:
+        inputs = values * (num_records // len(values))
+
+        def run(types_list=types_list, inputs=inputs):
+            get_casted_value = AvroTransformer._get_casted_value
+            for value in inputs:
+                get_casted_value(value, types_list)
+        records_per_second, _ = measure(run, len(inputs), repeat)
+        results.append(BenchmarkResult(f"cast.{case_name}", records_per_second))
+    return results
+
+
+def benchmark_writer(num_records: int, repeat: int) -> List[BenchmarkResult]:
+    """Benchmarks the writing of the transformed records with each available codec."""
+    results = []
+    for profile in PROFILES:
+        schema = generate_schema(profile)
+        transformer = AvroTransformer(schema, compiled=True)
+        records = [transformer.apply_all_transforms(record)
+                   for record in generate_records(schema, profile, num_records)]
+
+        for codec in get_available_codecs():
+            def run_writer(codec=codec, schema=schema, records=records):
+                output = io.BytesIO()
+                avro_writer = AvroWriter(output, schema, codec=codec)
+                for record in records:
+                    avro_writer.write(record)
+                avro_writer.close()
+                return output.tell()
+            records_per_second, bytes_per_second = measure(run_writer, len(records), repeat)
+            results.append(BenchmarkResult(f"writer.{profile.name}.{codec.value}",
+                                           records_per_second, bytes_per_second))
+
+        def run_parallel_writer(schema=schema, records=records):
+            output = io.BytesIO()
+            avro_writer = AvroWriter(output, schema, codec="deflate", compression_workers=os.cpu_count())
+            avro_writer.write_many(records)
+            avro_writer.close()
+            return output.tell()
+        records_per_second, bytes_per_second = measure(run_parallel_writer, len(records), repeat)
+        results.append(BenchmarkResult(f"writer.{profile.name}.deflate_parallel",
+                                       records_per_second, bytes_per_second))
+
+        def run_write_many(schema=schema, records=records):
+            output = io.BytesIO()
+            avro_writer = AvroWriter(output, schema)
+            avro_writer.write_many(records)
+            avro_writer.close()
+            return output.tell()
+        records_per_second, bytes_per_second = measure(run_write_many, len(records), repeat)
+        results.append(BenchmarkResult(f"writer.{profile.name}.write_many", records_per_second, bytes_per_second))
+
+        for write_mode in WriteMode:
+            def run_write_mode(schema=schema, records=records, write_mode=write_mode):
+                output = io.BytesIO()
+                avro_writer = AvroWriter(output, schema, write_mode=write_mode)
+                avro_writer.write_many(records)
+                avro_writer.close()
+                return output.tell()
+            records_per_second, bytes_per_second = measure(run_write_mode, len(records), repeat)
+            results.append(BenchmarkResult(f"writer.{profile.name}.mode_{write_mode.value}",
+                                           records_per_second, bytes_per_second))
+
+        # The records encoded by the workers of a pipeline, in batches of 1000 records
+        encoded_batches = [encode_records(schema, records[start:start + 1000])
+                           for start in range(0, len(records), 1000)]
+
+        def run_write_encoded(schema=schema, encoded_batches=encoded_batches):
+            output = io.BytesIO()
+            avro_writer = AvroWriter(output, schema)
+            for encoded_records in encoded_batches:
+                avro_writer.write_encoded(*encoded_records)
+            avro_writer.close()
+            return output.tell()
+        records_per_second, bytes_per_second = measure(run_write_encoded, len(records), repeat)
+        results.append(BenchmarkResult(f"writer.{profile.name}.write_encoded", records_per_second, bytes_per_second))
+    return results
+
+
+def benchmark_reader(num_records: int, repeat: int) -> List[BenchmarkResult]:
+    """Benchmarks the reading of a deflate file with AvroReader, with all the fields and with one field."""
+    results = []
+    for profile in PROFILES:
+        schema = generate_schema(profile)
+        transformer = AvroTransformer(schema, compiled=True)
+        records = [transformer.apply_all_transforms(record)
+                   for record in generate_records(schema, profile, num_records)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.avro")
+            with open(path, "wb") as output_file:
+                avro_writer = AvroWriter(output_file, schema, codec="deflate")
+                avro_writer.write_many(records)
+                avro_writer.close()
+
+            for case_name, fields in (("all_fields", None), ("one_field", [schema["fields"][0]["name"]])):
+                def run_reader(fields=fields):
+                    with AvroReader(path, fields=fields) as avro_reader:
+                        for _ in avro_reader:
+                            pass
+                    return os.path.getsize(path)
+                records_per_second, bytes_per_second = measure(run_reader, len(records), repeat)
+                results.append(BenchmarkResult(f"reader.{profile.name}.{case_name}",
+                                               records_per_second, bytes_per_second))
+    return results
+
+
+BENCHMARKS = {
+    "transformer": benchmark_transformer,
+    "cast": benchmark_casts,
+    "writer": benchmark_writer,
+    "reader": benchmark_reader,
+}
+
+
+def compare_results(results: List[BenchmarkResult], baseline: dict, tolerance: float) -> List[str]:
+    """Compares the results with a baseline.
+
+    :param results: The current results.
+    :type results: List[BenchmarkResult]
+    :param baseline: The content of a baseline file.
+    :type baseline: dict
+    :param tolerance: The allowed slowdown, as a ratio (0.2 means 20% slower).
+    :type tolerance: float
+    :return: A description of each regression.
+    :rtype: List[str]
+    """
+    baseline_results = baseline["results"]
+    regressions = []
+    for result in results:
+        if result.name not in baseline_results:
+            continue
+        baseline_value = baseline_results[result.name]["records_per_second"]
+        ratio = result.records_per_second / baseline_value
+        if ratio < 1 - tolerance:
+            regressions.append(f"{result.name}: {result.records_per_second:,.0f} records/s "
+                               f"({ratio:.0%} of the baseline, {baseline_value:,.0f} records/s)")
+    return regressions
+
+
+def get_report(results: List[BenchmarkResult], baseline: dict = None) -> str:
+    """Formats the results as a table."""
+    lines = [f"{'benchmark':<55} {'records/s':>14} {'MB/s':>10} {'vs baseline':>12}"]
+    baseline_results = baseline["results"] if baseline else {}
+    for result in results:
+        mb_per_second = "" if result.bytes_per_second is None else f"{result.bytes_per_second / 1e6:.2f}"
+        ratio = ""
+        if result.name in baseline_results:
+            ratio = f"{result.records_per_second / baseline_results[result.name]['records_per_second']:.2f}x"
+        lines.append(f"{result.name:<55} {result.records_per_second:>14,.0f} {mb_per_second:>10} {ratio:>12}")
+    return "\n".join(lines)
+
+
+def run_benchmarks(names: List[str], num_records: int, repeat: int) -> List[BenchmarkResult]:
+    results = []
+    for name in names:
+        results += BENCHMARKS[name](num_records, repeat)
+    return results
+
+
+def to_baseline(results: List[BenchmarkResult], num_records: int) -> Dict[str, object]:
+    return {
+        "metadata": {
+            "python": platform.python_version(),
+            "fastavro": fastavro.__version__,
+            "platform": platform.platform(),
+            "num_records": num_records,
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": {result.name: {"records_per_second": result.records_per_second,
+                                  "bytes_per_second": result.bytes_per_second}
+                    for result in results}
+    }
+
+
+def main(arguments: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks of the avro package")
+    parser.add_argument("benchmarks", nargs="*",
+                        help=f"The benchmarks to run: {', '.join(BENCHMARKS)} (all by default)")
+    parser.add_argument("--records", type=int, default=5000, help="The number of records of each benchmark")
+    parser.add_argument("--repeat", type=int, default=3, help="The number of repetitions (the best one is used)")
+    parser.add_argument("--save", help="Save the results in a JSON file, to use them as a baseline")
+    parser.add_argument("--compare", help="Compare the results with a baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="The allowed slowdown compared with the baseline, defaults to 0.2 (20%%)")
+    args = parser.parse_args(arguments)
+    unknown_benchmarks = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown_benchmarks:
+        parser.error(f"Unknown benchmarks: {unknown_benchmarks}")
+
+    results = run_benchmarks(args.benchmarks or list(BENCHMARKS), args.records, args.repeat)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    print(get_report(results, baseline))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as baseline_file:
+            json.dump(to_baseline(results, args.records), baseline_file, indent=2)
+        print(f"Results saved in {args.save}")
+
+    if baseline is not None:
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regressions (tolerance {args.tolerance:.0%}):")
+            print("\n".join(regressions))
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,7 +8,9 @@ DEPENDENCIES = [
 EXTRA_DEPENDENCIES = {
     "avro": ["fastavro==0.22.7"],
     "gcloud": ["google-cloud-storage==1.23.0", "backoff==1.10.0"],
-    "all": ["fastavro==0.22.7", "google-cloud-storage==1.23.0", "backoff==1.10.0"]
+    "columnar": ["numpy==1.19.5"],
+    "parquet": ["pyarrow==2.0.0"],
+    "all": ["fastavro==0.22.7", "google-cloud-storage==1.23.0", "backoff==1.10.0", "numpy==1.19.5", "pyarrow==2.0.0"]
 }
 
 with open('README.md', encoding='utf-8') as f:
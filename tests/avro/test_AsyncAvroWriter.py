@@ -0,0 +1,91 @@
+import io
+import threading
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.AsyncAvroWriter import AsyncAvroWriter
+from SwissKnife.avro.AvroWriter import AvroMatchingException
+
+
+class SlowStream(io.BytesIO):
+    """A stream that blocks the writes until it is released."""
+
+    def __init__(self):
+        super().__init__()
+        self.released = threading.Event()
+
+    def write(self, data: bytes) -> int:
+        self.released.wait()
+        return super().write(data)
+
+
+class AsyncAvroWriterTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "Employee",
+        "fields": [
+            {"name": "Name", "type": "string"},
+            {"name": "Age", "type": "int"}
+        ]
+    }
+
+    example_records = [{"Name": f"Employee {number}", "Age": number} for number in range(100)]
+
+    def test_write_records(self):
+        output = io.BytesIO()
+        with AsyncAvroWriter(output, self.example_schema, max_queue_size=10,
+                             writer_options={"codec": "deflate", "block_records": 7}) as async_writer:
+            self.assertEqual(async_writer.write_many(self.example_records), 100)
+
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), self.example_records)
+        self.assertEqual(async_writer.metrics.records, 100)
+        self.assertLessEqual(async_writer.metrics.max_queue_depth, 10)
+        self.assertEqual(async_writer.avro_writer.counters.records, 100)
+
+    def test_backpressure(self):
+        output = SlowStream()
+        # The header is written by the constructor
+        output.released.set()
+        async_writer = AsyncAvroWriter(output, self.example_schema, max_queue_size=2,
+                                       writer_options={"block_records": 1})
+        output.released.clear()
+
+        timer = threading.Timer(0.05, output.released.set)
+        timer.start()
+        async_writer.write_many(self.example_records[:10])
+        async_writer.close()
+        timer.join()
+
+        self.assertGreater(async_writer.metrics.stalls, 0)
+        self.assertGreater(async_writer.metrics.stall_time, 0)
+        self.assertEqual(async_writer.queue_depth, 0)
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), self.example_records[:10])
+
+    def test_error_raised_on_close(self):
+        async_writer = AsyncAvroWriter(io.BytesIO(), self.example_schema)
+        async_writer.write({"Age": 21})
+        with self.assertRaises(AvroMatchingException):
+            async_writer.close()
+
+    def test_error_raised_on_write(self):
+        async_writer = AsyncAvroWriter(io.BytesIO(), self.example_schema, max_queue_size=1)
+        async_writer.write({"Age": 21})
+        with self.assertRaises(AvroMatchingException):
+            for _ in range(1000):
+                async_writer.write(self.example_records[0])
+        with self.assertRaises(AvroMatchingException):
+            async_writer.close()
+
+    def test_write_after_close(self):
+        async_writer = AsyncAvroWriter(io.BytesIO(), self.example_schema)
+        async_writer.close()
+        with self.assertRaises(ValueError):
+            async_writer.write(self.example_records[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
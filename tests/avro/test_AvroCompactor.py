@@ -0,0 +1,131 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+
+import fastavro
+
+from SwissKnife.avro.AvroCompactor import AvroCompactor
+
+
+class AvroCompactorTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "listing",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {"name": "city", "type": ["null", "string"], "default": None}
+        ]
+    }
+
+    # The same schema with a new field: the files are decoded with the output schema
+    new_schema = {
+        "type": "record",
+        "name": "listing",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {"name": "city", "type": ["null", "string"], "default": None},
+            {"name": "rooms", "type": ["null", "int"], "default": None}
+        ]
+    }
+
+    def create_file(self, start: int, num_records: int, codec: str = "deflate", schema: dict = None) -> bytes:
+        output = io.BytesIO()
+        records = [{"id": i, "city": f"city {i % 7}"} for i in range(start, start + num_records)]
+        fastavro.writer(output, schema or self.example_schema, records, codec=codec, sync_interval=200)
+        return output.getvalue()
+
+    def read_files(self, compacted_files: list) -> list:
+        records = []
+        for compacted_file in compacted_files:
+            with open(compacted_file.path, "rb") as avro_file:
+                records += list(fastavro.reader(avro_file))
+        return records
+
+    def test_copy_blocks(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            finished_files = []
+            compactor = AvroCompactor(output_dir, target_bytes=2000, file_callback=finished_files.append)
+            sources = [io.BytesIO(self.create_file(start, 50)) for start in range(0, 1000, 50)]
+
+            compacted_files = compactor.compact(sources)
+
+            self.assertListEqual(finished_files, compacted_files)
+            self.assertGreater(len(compacted_files), 2)
+            self.assertLess(len(compacted_files), 20)
+            self.assertEqual(compacted_files[0].path, os.path.join(output_dir, "part-00000.avro"))
+            self.assertEqual(sum(compacted_file.records for compacted_file in compacted_files), 1000)
+            self.assertTrue(all(compacted_file.bytes == os.path.getsize(compacted_file.path)
+                                for compacted_file in compacted_files))
+            self.assertTrue(all(compacted_file.bytes >= 2000 for compacted_file in compacted_files[:-1]))
+            self.assertListEqual([record["id"] for record in self.read_files(compacted_files)], list(range(1000)))
+            with open(compacted_files[0].path, "rb") as avro_file:
+                self.assertEqual(fastavro.reader(avro_file).codec, "deflate")
+
+            metrics = compactor.metrics.to_dict()
+            self.assertEqual(metrics["files"], 20)
+            self.assertEqual(metrics["copied_files"], 20)
+            self.assertEqual(metrics["decoded_files"], 0)
+            self.assertGreater(metrics["copied_blocks"], 20)
+
+    def test_decode_different_files(self):
+        with tempfile.TemporaryDirectory() as output_dir:
+            compactor = AvroCompactor(output_dir, avro_schema=self.new_schema, codec="deflate")
+            sources = [io.BytesIO(self.create_file(0, 10, schema=self.new_schema)),
+                       io.BytesIO(self.create_file(10, 10)),
+                       io.BytesIO(self.create_file(20, 10, codec="null", schema=self.new_schema))]
+
+            compacted_files = compactor.compact(sources)
+
+            self.assertEqual(len(compacted_files), 1)
+            self.assertEqual(compacted_files[0].sources, 3)
+            records = self.read_files(compacted_files)
+            self.assertListEqual([record["id"] for record in records], list(range(30)))
+            self.assertIsNone(records[15]["rooms"])
+            self.assertEqual(compactor.metrics.copied_files, 1)
+            self.assertEqual(compactor.metrics.decoded_files, 2)
+
+    def test_local_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            paths = []
+            for start in (0, 5):
+                paths.append(os.path.join(directory, f"input-{start}.avro"))
+                with open(paths[-1], "wb") as avro_file:
+                    avro_file.write(self.create_file(start, 5))
+
+            compacted_files = AvroCompactor(os.path.join(directory, "output"),
+                                            file_name_template="compacted/{part}.avro").compact(paths)
+
+            self.assertEqual(compacted_files[0].path, os.path.join(directory, "output", "compacted", "0.avro"))
+            self.assertListEqual([record["id"] for record in self.read_files(compacted_files)], list(range(10)))
+
+    def test_compact_prefix(self):
+        blobs = []
+        for name, data in (("prefix/a.avro", self.create_file(0, 20)), ("prefix/_SUCCESS", b""),
+                           ("prefix/b.avro", self.create_file(20, 20))):
+            blob = MagicMock(spec=["name", "size", "reload", "download_as_bytes", "download_as_string"])
+            blob.name = name
+            blob.size = len(data)
+            blob.download_as_bytes.side_effect = lambda start, end, data=data: data[start:end + 1]
+            blobs.append(blob)
+        storage = MagicMock()
+        storage.list_blobs.return_value = blobs
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            compacted_files = AvroCompactor(output_dir).compact_prefix(storage, "prefix")
+
+            storage.list_blobs.assert_called_once_with("prefix", with_prefix=True)
+            self.assertEqual(compacted_files[0].sources, 2)
+            self.assertListEqual([record["id"] for record in self.read_files(compacted_files)], list(range(40)))
+
+    def test_corrupted_file(self):
+        data = bytearray(self.create_file(0, 50))
+        data[-1] ^= 0xFF
+        finished_files = []
+
+        with tempfile.TemporaryDirectory() as output_dir:
+            compactor = AvroCompactor(output_dir, file_callback=finished_files.append)
+            self.assertRaises(ValueError, compactor.compact, [io.BytesIO(self.create_file(0, 5)), io.BytesIO(data)])
+            self.assertListEqual(finished_files, [])
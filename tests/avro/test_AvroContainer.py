@@ -0,0 +1,48 @@
+import io
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.AvroContainer import PrefixedStream, encode_header, encode_long, read_header, read_long
+
+
+class AvroContainerTest(unittest.TestCase):
+
+    example_avro_schema = {
+        "type": "record",
+        "name": "example_record",
+        "fields": [{"name": "code", "type": "string"}]
+    }
+
+    def test_long_encoding(self):
+        for number in [0, -1, 1, 63, -64, 64, 1 << 40, -(1 << 62)]:
+            encoded = encode_long(number)
+            self.assertEqual(read_long(io.BytesIO(encoded)), number)
+        self.assertEqual(encode_long(-1), b"\x01")
+        self.assertEqual(encode_long(64), b"\x80\x01")
+
+    def test_read_header(self):
+        avro_file = io.BytesIO()
+        fastavro.writer(avro_file, self.example_avro_schema, [{"code": "A1"}], codec="deflate")
+        avro_file.seek(0)
+
+        header = read_header(avro_file)
+
+        self.assertEqual(header.schema["name"], "example_record")
+        self.assertEqual(header.codec, "deflate")
+        self.assertEqual(len(header.sync_marker), 16)
+        self.assertEqual(avro_file.getvalue()[:len(header.raw)], header.raw)
+        self.assertEqual(avro_file.tell(), len(header.raw))
+        self.assertEqual(encode_header(header.metadata, header.sync_marker), header.raw)
+
+        # The rest of the file can be decoded after the header
+        records = list(fastavro.reader(io.BufferedReader(PrefixedStream(header.raw, avro_file))))
+        self.assertListEqual(records, [{"code": "A1"}])
+
+    def test_read_header_invalid_file(self):
+        with self.assertRaises(ValueError):
+            read_header(io.BytesIO(b"code\nA1\n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
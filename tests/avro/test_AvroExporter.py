@@ -0,0 +1,97 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.AvroExporter import AvroExporter, ExportFormat
+
+
+class AvroExporterTest(unittest.TestCase):
+
+    example_avro_schema = {
+        "type": "record",
+        "name": "example_record",
+        "fields": [
+            {"name": "code", "type": "string"},
+            {"name": "price", "type": ["null", "double"]},
+            {"name": "address", "type": {"type": "record", "name": "address_record",
+                                         "fields": [{"name": "street", "type": "string"}]}},
+            {"name": "previous_address", "type": ["null", "address_record"]},
+            {"name": "photo", "type": ["null", "bytes"]}
+        ]
+    }
+
+    example_records = [
+        {"code": "A1", "price": 100.5, "address": {"street": "Main"}, "previous_address": None,
+         "photo": b"\x00\x01"},
+        {"code": "A2, B", "price": None, "address": {"street": "Second"},
+         "previous_address": {"street": "Main"}, "photo": None},
+        {"code": "A3", "price": 7.0, "address": {"street": "Third"}, "previous_address": None, "photo": None}
+    ]
+
+    def get_avro_file(self) -> io.BytesIO:
+        avro_file = io.BytesIO()
+        fastavro.writer(avro_file, self.example_avro_schema, self.example_records, sync_interval=1)
+        avro_file.seek(0)
+        return avro_file
+
+    def test_export_csv(self):
+        output = io.BytesIO()
+        num_rows = AvroExporter(chunk_size=2).export(self.get_avro_file(), output)
+
+        self.assertEqual(num_rows, 3)
+        self.assertEqual(output.getvalue().decode("utf-8").splitlines(), [
+            "code,price,address,previous_address,photo",
+            'A1,100.5,"{""street"": ""Main""}",,AAE=',
+            '"A2, B",,"{""street"": ""Second""}","{""street"": ""Main""}",',
+            'A3,7.0,"{""street"": ""Third""}",,'
+        ])
+
+    def test_export_csv_projection(self):
+        # previous_address uses a named type defined in a field that is not exported
+        output = io.StringIO()
+        exporter = AvroExporter(fields=["previous_address", "code"], delimiter=";", chunk_size=1)
+        num_rows = exporter.export(self.get_avro_file(), output)
+
+        self.assertEqual(num_rows, 3)
+        self.assertEqual(output.getvalue().splitlines(), [
+            "previous_address;code",
+            ";A1",
+            '"{""street"": ""Main""}";A2, B',
+            ";A3"
+        ])
+
+    def test_export_jsonl(self):
+        output = io.BytesIO()
+        exporter = AvroExporter(fields=["code", "price"], export_format=ExportFormat.JSONL)
+        exporter.export(self.get_avro_file(), output)
+
+        rows = [json.loads(line) for line in output.getvalue().decode("utf-8").splitlines()]
+        self.assertListEqual(rows, [{"code": "A1", "price": 100.5},
+                                    {"code": "A2, B", "price": None},
+                                    {"code": "A3", "price": 7.0}])
+
+    def test_export_local_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            avro_path = os.path.join(directory, "input.avro")
+            jsonl_path = os.path.join(directory, "output.jsonl")
+            with open(avro_path, "wb") as avro_file:
+                avro_file.write(self.get_avro_file().getvalue())
+
+            AvroExporter(export_format="jsonl").export(avro_path, jsonl_path)
+
+            with open(jsonl_path, encoding="utf-8") as jsonl_file:
+                rows = [json.loads(line) for line in jsonl_file]
+        self.assertEqual(rows[0]["photo"], "AAE=")
+        self.assertEqual(rows[1]["previous_address"], {"street": "Main"})
+
+    def test_export_invalid_field(self):
+        with self.assertRaises(ValueError):
+            AvroExporter(fields=["code", "unknown"]).export(self.get_avro_file(), io.BytesIO())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from SwissKnife.avro.AvroReader import AvroReader, AvroSplit
+from SwissKnife.avro.AvroTransformer import AvroTransformer
+from SwissKnife.avro.AvroWriter import AvroWriter
+
+
+def count_records(records) -> int:
+    return sum(1 for _ in records)
+
+
+class AvroReaderTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "Employee",
+        "fields": [
+            {"name": "Name", "type": "string"},
+            {"name": "Age", "type": "int"},
+            {"name": "Address", "type": ["null", {
+                "type": "record", "name": "Address", "fields": [{"name": "City", "type": "string"}]
+            }]}
+        ]
+    }
+
+    example_records = [{"Name": f"Employee {number}", "Age": number, "Address": {"City": "Madrid"}}
+                       for number in range(1000)]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "employees.avro")
+        with open(self.path, "wb") as output_file:
+            avro_writer = AvroWriter(output_file, self.example_schema, codec="deflate", block_records=37)
+            avro_writer.write_many(self.example_records)
+            avro_writer.close()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_read_all(self):
+        with AvroReader(self.path) as avro_reader:
+            self.assertListEqual(list(avro_reader), self.example_records)
+            self.assertEqual(avro_reader.header.codec, "deflate")
+
+    def test_splits_cover_all_blocks(self):
+        with AvroReader(self.path) as avro_reader:
+            blocks = list(avro_reader.iter_blocks())
+            self.assertEqual(sum(block.records for block in blocks), 1000)
+            for num_splits in (1, 3, 7, 100, 1000):
+                with self.subTest(num_splits=num_splits):
+                    splits = avro_reader.get_splits(num_splits)
+                    self.assertEqual(splits[0].start, avro_reader.data_start)
+                    self.assertEqual(splits[-1].end, avro_reader.size)
+                    split_blocks = [block for split in splits for block in avro_reader.iter_blocks(split)]
+                    self.assertListEqual(split_blocks, blocks)
+                    records = [record for split in splits for record in avro_reader.read_split(split)]
+                    self.assertListEqual(records, self.example_records)
+
+    def test_empty_split(self):
+        with AvroReader(self.path) as avro_reader:
+            # A split inside a block, without the start of a block
+            first_block = next(avro_reader.iter_blocks())
+            split = AvroSplit(self.path, first_block.offset + 1, first_block.offset + 10)
+            self.assertListEqual(list(avro_reader.read_split(split)), [])
+
+    def test_projection_and_transformer(self):
+        transformer = AvroTransformer({
+            "type": "record",
+            "name": "Person",
+            "fields": [
+                {"name": "name", "type": "string", "aliases": ["Name"]},
+                {"name": "age", "type": "double", "aliases": ["Age"]}
+            ]
+        })
+        with AvroReader(self.path, fields=["Name", "Age"], avro_transformer=transformer) as avro_reader:
+            records = list(avro_reader.read_split(avro_reader.get_splits(2)[1]))
+        self.assertGreater(len(records), 0)
+        self.assertEqual(records[-1], {"name": "Employee 999", "age": 999.0})
+
+    def test_map_splits(self):
+        with AvroReader(self.path, fields=["Age"]) as avro_reader:
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                counts = list(avro_reader.map_splits(count_records, num_splits=5, executor=executor))
+                records = list(avro_reader.read_parallel(num_splits=3, executor=executor))
+        self.assertEqual(len(counts), 5)
+        self.assertEqual(sum(counts), 1000)
+        self.assertListEqual(records, [{"Age": number} for number in range(1000)])
+
+    def test_read_parallel_processes(self):
+        with AvroReader(self.path) as avro_reader:
+            self.assertListEqual(list(avro_reader.read_parallel(num_splits=4, workers=2)), self.example_records)
+
+    def test_invalid_file(self):
+        invalid_path = os.path.join(self.directory.name, "invalid.avro")
+        with open(invalid_path, "wb") as invalid_file:
+            invalid_file.write(b"not an avro file")
+        with self.assertRaises(ValueError):
+            AvroReader(invalid_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,10 @@
+import pickle
 import unittest
+from datetime import datetime
+from decimal import Decimal
 
-from SwissKnife.avro.AvroTransformer import AvroTransformer, NoDefault
+from SwissKnife.avro.AvroTransformer import AvroTransformer, NoDefault, AvroTransformException, ErrorPolicy
+from SwissKnife.avro.TransformRegistry import DEFAULT_TRANSFORM_REGISTRY
 
 
 class AvroTransformerTest(unittest.TestCase):
@@ -168,3 +172,324 @@ class AvroTransformerTest(unittest.TestCase):
                                  "isReady": False
                              }
                              )
+
+    def test_get_cast_function(self):
+        examples = [
+            ("", ["null", "int"]),
+            ("12", ["int"]),
+            (None, ["null", "long"]),
+            ("1,5", ["double"]),
+            ("", ["float", "null"]),
+            (3, ["string"]),
+            (0, ["boolean"]),
+            (None, ["null", "string"])
+        ]
+        for value, types_list in examples:
+            cast_function = AvroTransformer._get_cast_function(types_list)
+            self.assertEqual(cast_function(value), AvroTransformer._get_casted_value(value, types_list))
+        with self.assertRaises(ValueError):
+            AvroTransformer._get_cast_function(["null", "bytes"])("abc")
+        with self.assertRaises(TypeError):
+            AvroTransformer._get_cast_function(["int", "null"])(None)
+
+    def test_apply_all_transforms_compiled(self):
+        example_records = [
+            {
+                "url": "http://udarealestate.com",
+                "previous_url": "http://urbandataanalytics.com",
+                "id": "IdRealState",
+                "date": "1234567",
+                "startDate": None
+            },
+            {
+                "url": "http://udarealestate.com",
+                "lastupdate": "1234567",
+                "reg_date": "7654321",
+                "isReady": 3
+            },
+            {
+                "url": 1234,
+                "date": None,
+                "startDate": "ignored",
+                "isReady": 0
+            }
+        ]
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+        compiled_avro_transformer = AvroTransformer(self.example_avro_schema, compiled=True)
+        for example_record in example_records:
+            expected_record = avro_transformer.apply_all_transforms(example_record)
+            result_record = compiled_avro_transformer.apply_all_transforms(example_record)
+            self.assertDictEqual(result_record, expected_record)
+            self.assertListEqual(list(result_record.keys()), list(expected_record.keys()))
+
+    def test_apply_all_transforms_compiled_errors(self):
+        compiled_avro_transformer = AvroTransformer(self.example_avro_schema, compiled=True)
+        # The same exceptions as in the not compiled mode
+        with self.assertRaises(RuntimeError):
+            compiled_avro_transformer.apply_all_transforms({"url": "http://google.com"})
+        with self.assertRaises(ValueError):
+            compiled_avro_transformer.apply_all_transforms({"url": "http://google.com", "date": None, "isReady": "a"})
+
+    def test_apply_all_transforms_compiled_errors_no_replay(self):
+        calls = []
+
+        def create_checked_transform():
+            def checked_transform(value, record):
+                calls.append(value)
+                if value < 0:
+                    raise KeyError(value)
+                return value
+            return checked_transform
+
+        transform_registry = DEFAULT_TRANSFORM_REGISTRY.copy()
+        transform_registry.register("checked", create_checked_transform)
+        schema = {"type": "record", "name": "checked_record",
+                  "fields": [{"name": "count", "type": "int", "transform": "checked"},
+                             {"name": "rooms", "type": "int", "default": 0}]}
+        for profile in [False, True]:
+            avro_transformer = AvroTransformer(schema, compiled=True, transform_registry=transform_registry,
+                                               schema_cache=None, profile=profile)
+            calls.clear()
+            # The transform function is only executed once, and its exception is raised as in the default mode
+            with self.assertRaises(KeyError):
+                avro_transformer.apply_all_transforms({"count": -1})
+            with self.assertRaises(ValueError) as context:
+                avro_transformer.apply_all_transforms({"count": 1, "rooms": "two"})
+            self.assertIn("'rooms'", str(context.exception))
+            self.assertListEqual(calls, [-1, 1])
+
+    def test_apply_all_transforms_errors_order(self):
+        def create_checked_transform():
+            def checked_transform(value, record):
+                if value < 0:
+                    raise KeyError(value)
+                return value
+            return checked_transform
+
+        transform_registry = DEFAULT_TRANSFORM_REGISTRY.copy()
+        transform_registry.register("checked", create_checked_transform)
+        schema = {"type": "record", "name": "checked_record",
+                  "fields": [{"name": "a", "type": ["int"]},
+                             {"name": "b", "type": ["int"]},
+                             {"name": "c", "type": ["null", "int"], "transform": "checked", "default": None}]}
+        for compiled, profile in [(False, False), (True, False), (True, True)]:
+            with self.subTest(compiled=compiled, profile=profile):
+                avro_transformer = AvroTransformer(schema, compiled=compiled, transform_registry=transform_registry,
+                                                   schema_cache=None, profile=profile)
+                # A missing required field fails before the cast of a previous field
+                with self.assertRaises(RuntimeError):
+                    avro_transformer.apply_all_transforms({"a": "x"})
+                # And a transform function fails before both
+                with self.assertRaises(KeyError):
+                    avro_transformer.apply_all_transforms({"a": "x", "c": -1})
+                with self.assertRaises(ValueError):
+                    avro_transformer.apply_all_transforms({"a": "x", "b": 1, "c": 1})
+
+    invalid_records = [
+        {"url": "http://udarealestate.com", "date": "1234567"},
+        {"date": "1234567"},
+        {"url": "http://udarealestate.com", "date": "1234567", "isReady": "yes"},
+        {"url": "http://google.com", "lastupdate": "7654321", "isReady": 1}
+    ]
+
+    def test_transform_iter_raise(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+        records_iter = avro_transformer.transform_iter(self.invalid_records)
+        self.assertEqual(next(records_iter)["url"], "http://udarealestate.com")
+        with self.assertRaises(AvroTransformException) as context:
+            next(records_iter)
+        self.assertEqual(context.exception.field, "url")
+        self.assertEqual(context.exception.step, "default")
+
+    def test_transform_batch_skip(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+        result = avro_transformer.transform_batch(self.invalid_records, on_error=ErrorPolicy.SKIP)
+        self.assertListEqual([record["date"] for record in result], ["1234567", "7654321"])
+        self.assertDictEqual(avro_transformer.counters.to_dict(), {
+            "read": 4,
+            "transformed": 2,
+            "failed": 2,
+            "skipped": 2,
+            "dead_lettered": 0
+        })
+
+    def test_transform_batch_dead_letter(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+        dead_letters = []
+        result = avro_transformer.transform_batch(self.invalid_records, on_error="dead_letter",
+                                                  dead_letter_sink=dead_letters.append)
+        self.assertEqual(len(result), 2)
+        self.assertListEqual([error.record_index for error in dead_letters], [1, 2])
+        self.assertEqual(dead_letters[1].field, "isReady")
+        self.assertEqual(dead_letters[1].step, "transform")
+        self.assertEqual(dead_letters[1].value, "yes")
+        self.assertListEqual(dead_letters[1].types, ["boolean"])
+        self.assertEqual(avro_transformer.counters.dead_lettered, 2)
+        with self.assertRaises(ValueError):
+            avro_transformer.transform_iter(self.invalid_records, on_error=ErrorPolicy.DEAD_LETTER)
+
+    def test_transform_batch_cast_error(self):
+        avro_transformer = AvroTransformer({
+            "type": "record",
+            "name": "example_record",
+            "fields": [{"name": "price", "type": ["null", "double"]}]
+        })
+        dead_letters = []
+        result = avro_transformer.transform_batch([{"price": "1,5"}, {"price": "abc"}], on_error="dead_letter",
+                                                  dead_letter_sink=dead_letters.append)
+        self.assertListEqual(result, [{"price": 1.5}])
+        self.assertEqual(dead_letters[0].step, "cast")
+        self.assertEqual(dead_letters[0].value, "abc")
+
+    def test_pickle(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema, compiled=True)
+        unpickled_avro_transformer = pickle.loads(pickle.dumps(avro_transformer))
+        self.assertTrue(unpickled_avro_transformer.compiled)
+        self.assertDictEqual(unpickled_avro_transformer.apply_all_transforms({"url": "a", "date": "b"}),
+                             avro_transformer.apply_all_transforms({"url": "a", "date": "b"}))
+
+    def test_transform_parallel(self):
+        records = [{"url": f"http://{index}.com", "date": str(index), "isReady": index % 2}
+                   for index in range(250)]
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+        expected_records = avro_transformer.transform_batch(records)
+
+        result = list(avro_transformer.transform_parallel(records, workers=2, chunk_size=30))
+        self.assertListEqual(result, expected_records)
+
+        unordered_result = list(avro_transformer.transform_parallel(records, workers=2, chunk_size=30, ordered=False))
+        self.assertListEqual(sorted(unordered_result, key=lambda record: int(record["date"])), expected_records)
+
+    def test_transform_parallel_dead_letter(self):
+        records = self.invalid_records * 10
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+        dead_letters = []
+        result = list(avro_transformer.transform_parallel(records, workers=2, chunk_size=3, on_error="dead_letter",
+                                                          dead_letter_sink=dead_letters.append))
+        self.assertEqual(len(result), 20)
+        self.assertListEqual(sorted(error.record_index for error in dead_letters),
+                             [index for index in range(40) if index % 4 in (1, 2)])
+        self.assertEqual(avro_transformer.counters.read, 40)
+        self.assertEqual(avro_transformer.counters.dead_lettered, 20)
+        with self.assertRaises(AvroTransformException):
+            list(avro_transformer.transform_parallel(records, workers=2, chunk_size=3))
+
+    nested_avro_schema = {
+        "type": "record",
+        "name": "listing",
+        "namespace": "uda",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {
+                "name": "address",
+                "type": ["null", {
+                    "type": "record",
+                    "name": "Address",
+                    "fields": [
+                        {"name": "street", "aliases": ["calle"], "type": ["null", "string"], "default": None},
+                        {"name": "number", "type": ["null", "int"], "default": None}
+                    ]
+                }],
+                "default": None
+            },
+            {"name": "previousAddresses", "type": {"type": "array", "items": "Address"}, "default": []},
+            {"name": "prices", "type": ["null", {"type": "map", "values": "double"}], "default": None},
+            {"name": "status", "type": {"type": "enum", "name": "Status", "symbols": ["SALE", "RENT"]}},
+            {"name": "hash", "type": ["null", {"type": "fixed", "name": "Hash", "size": 2}], "default": None},
+            {"name": "date", "type": {"type": "int", "logicalType": "date"}},
+            {"name": "updated", "type": ["null", {"type": "long", "logicalType": "timestamp-millis"}]},
+            {"name": "area", "type": {"type": "bytes", "logicalType": "decimal", "precision": 8, "scale": 2}},
+            {"name": "next", "type": ["null", "listing"], "default": None}
+        ]
+    }
+
+    def test_apply_all_transforms_nested_types(self):
+        example_record = {
+            "id": "12",
+            "address": {"calle": "Gran Via", "number": "5", "invalidField": 0},
+            "previousAddresses": [{"street": "Alcala"}],
+            "prices": {"sale": "100,5", "rent": 3},
+            "status": "SALE",
+            "hash": b"ab",
+            "date": "2020-01-02",
+            "updated": datetime(2020, 1, 1, 0, 0, 1, 500000),
+            "area": "85,456",
+            "next": {"id": 13, "status": "RENT", "date": 1, "updated": None, "area": 7}
+        }
+        expected_record = {
+            "id": 12,
+            "address": {"street": "Gran Via", "number": 5},
+            "previousAddresses": [{"street": "Alcala", "number": None}],
+            "prices": {"sale": 100.5, "rent": 3.0},
+            "status": "SALE",
+            "hash": b"ab",
+            "date": 18263,
+            "updated": 1577836801500,
+            "area": Decimal("85.46"),
+            "next": {
+                "id": 13,
+                "address": None,
+                "previousAddresses": [],
+                "prices": None,
+                "status": "RENT",
+                "hash": None,
+                "date": 1,
+                "updated": None,
+                "area": Decimal("7.00"),
+                "next": None
+            }
+        }
+        for compiled in [False, True]:
+            avro_transformer = AvroTransformer(self.nested_avro_schema, compiled=compiled)
+            self.assertDictEqual(avro_transformer.apply_all_transforms(example_record), expected_record)
+
+    def test_apply_all_transforms_nested_types_errors(self):
+        avro_transformer = AvroTransformer(self.nested_avro_schema)
+        valid_record = {"id": 1, "status": "SALE", "date": 1, "updated": None, "area": 1}
+        invalid_records = [
+            dict(valid_record, status="SOLD"),
+            dict(valid_record, hash=b"abc"),
+            dict(valid_record, address={"number": "five"}),
+            dict(valid_record, previousAddresses="Alcala")
+        ]
+        for invalid_record in invalid_records:
+            with self.assertRaises(ValueError):
+                avro_transformer.apply_all_transforms(invalid_record)
+
+    memoized_avro_schema = {
+        "type": "record",
+        "name": "memoized_record",
+        "fields": [
+            {"name": "country", "type": ["null", "string"], "default": None, "memoize": True},
+            {"name": "rooms", "type": ["null", "int"], "default": None, "memoize": 3},
+            {"name": "price", "type": ["null", "double"], "default": None, "memoize": True}
+        ]
+    }
+
+    def test_memoized_fields(self):
+        records = [{"country": "E" + "S", "rooms": str(i % 5), "price": "1,5"} for i in range(20)]
+        records.append({"country": 34, "rooms": 2, "price": None})
+        for compiled in [False, True]:
+            avro_transformer = AvroTransformer(self.memoized_avro_schema, compiled=compiled, schema_cache=None)
+
+            transformed_records = [avro_transformer.apply_all_transforms(record) for record in records]
+
+            self.assertDictEqual(transformed_records[7], {"country": "ES", "rooms": 2, "price": 1.5})
+            self.assertDictEqual(transformed_records[-1], {"country": "34", "rooms": 2, "price": None})
+            # The cast results are shared by the records
+            self.assertIs(transformed_records[0]["country"], transformed_records[1]["country"])
+            memo_stats = avro_transformer.get_memo_stats()
+            self.assertDictEqual(memo_stats["country"], {"misses": 1, "size": 1, "enabled": True})
+            self.assertDictEqual(memo_stats["price"], {"misses": 1, "size": 1, "enabled": True})
+            # The rooms field has more distinct values than the maximum size
+            self.assertFalse(memo_stats["rooms"]["enabled"])
+            self.assertEqual(memo_stats["rooms"]["size"], 0)
+
+    def test_memoized_fields_errors(self):
+        avro_transformer = AvroTransformer(self.memoized_avro_schema, compiled=True, schema_cache=None)
+
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                avro_transformer.apply_all_transforms({"rooms": "two"})
+        self.assertEqual(avro_transformer.get_memo_stats()["rooms"]["size"], 0)
+        self.assertDictEqual(AvroTransformer(self.example_avro_schema).get_memo_stats(), {})
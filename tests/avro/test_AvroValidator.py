@@ -0,0 +1,91 @@
+import unittest
+from datetime import date, datetime
+from decimal import Decimal
+
+from SwissKnife.avro.AvroValidator import AvroValidator, get_validator
+
+
+class AvroValidatorTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "listing",
+        "namespace": "example",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {"name": "price", "type": ["null", "double"]},
+            {"name": "currency", "type": {"type": "enum", "name": "currency", "symbols": ["EUR", "USD"]},
+             "default": "EUR"},
+            {"name": "created", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+            {"name": "tags", "type": {"type": "array", "items": "string"}},
+            {"name": "address", "type": ["null", {
+                "type": "record",
+                "name": "address",
+                "fields": [
+                    {"name": "city", "type": "string"},
+                    {"name": "extra", "type": {"type": "map", "values": ["int", "string"]}}
+                ]
+            }]},
+            {"name": "previous_address", "type": ["null", "example.address"], "default": None}
+        ]
+    }
+
+    valid_record = {
+        "id": 1,
+        "price": 100000,
+        "created": datetime(2020, 1, 1),
+        "tags": ["new"],
+        "address": {"city": "Madrid", "extra": {"floor": 2, "door": "B"}},
+        "previous_address": None
+    }
+
+    def test_valid_record(self):
+        validator = AvroValidator(self.example_schema)
+        self.assertIsNone(validator.validate(self.valid_record))
+        self.assertTrue(validator.is_valid(dict(self.valid_record, created=1577836800000, currency="USD")))
+
+    def test_invalid_records(self):
+        validator = AvroValidator(self.example_schema, schema_cache=None)
+        cases = [
+            ({"id": "1"}, "id: expected long, got str"),
+            ({"id": 1 << 63}, f"id: {1 << 63} is out of the range of long"),
+            ({"id": True}, "id: expected long, got bool"),
+            ({"price": "12"}, "price: expected double, got str"),
+            ({"currency": "GBP"}, "currency: 'GBP' is not a symbol of currency"),
+            ({"created": "2020"}, "created: expected timestamp-millis, got str"),
+            ({"tags": ["new", 1]}, "tags[1]: expected string, got int"),
+            ({"tags": "new"}, "tags: expected array, got str"),
+            ({"address": {"city": "Madrid", "extra": {"floor": 2.5}}},
+             "address.extra['floor']: expected int or string, got float"),
+            ({"previous_address": {"extra": {}}}, "previous_address.city: expected string, got NoneType"),
+        ]
+        for changes, reason in cases:
+            with self.subTest(changes=changes):
+                self.assertEqual(validator.validate(dict(self.valid_record, **changes)), reason)
+
+        missing_field = dict(self.valid_record)
+        del missing_field["id"]
+        self.assertEqual(validator.validate(missing_field), "id: expected long, got NoneType")
+
+    def test_validate_batch(self):
+        validator = AvroValidator(self.example_schema)
+        invalid_record = dict(self.valid_record, id=None)
+        valid_rows, rejected_rows = validator.validate_batch([self.valid_record, invalid_record, self.valid_record])
+
+        self.assertEqual(len(valid_rows), 2)
+        self.assertEqual([(row.row_index, row.row) for row in rejected_rows], [(1, invalid_record)])
+        self.assertEqual(rejected_rows[0].reason, "id: expected long, got NoneType")
+
+    def test_logical_types(self):
+        self.assertIsNone(get_validator({"type": "int", "logicalType": "date"})(date(2020, 1, 1)))
+        self.assertIsNone(get_validator({"type": "bytes", "logicalType": "decimal", "precision": 5, "scale": 2})(
+            Decimal("1.25")))
+        self.assertIsNotNone(get_validator({"type": "bytes", "logicalType": "decimal", "precision": 5})(1.25))
+
+    def test_unknown_type(self):
+        with self.assertRaises(ValueError):
+            get_validator("unknown")
+
+
+if __name__ == '__main__':
+    unittest.main()
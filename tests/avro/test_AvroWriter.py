@@ -1,9 +1,18 @@
 import fastavro
 import unittest
 import io
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
 
 from SwissKnife.avro import AvroWriter
-from SwissKnife.avro.AvroWriter import AvroMatchingException
+from SwissKnife.avro.AvroContainer import read_header, read_long
+from SwissKnife.avro.BlockIndex import BlockIndex
+from SwissKnife.avro.AvroWriter import AvroCodec, AvroMatchingException, WriteMode, encode_records, \
+    get_available_codecs, get_codec
 
 
 # How to test this?
@@ -61,3 +70,336 @@ class test_AvroWriter(unittest.TestCase):
         # Act and assert
         with self.assertRaises(AvroMatchingException) as context:
             avro_writer.write({"Age": 21})
+
+
+class AvroWriterOptionsTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "Employee",
+        "fields": [
+            {"name": "Name", "type": "string"},
+            {"name": "Age", "type": "int"}
+        ]
+    }
+
+    example_records = [{"Name": f"Employee {position}", "Age": position} for position in range(100)]
+
+    def test_get_codec(self):
+        self.assertEqual(get_codec("zstd"), AvroCodec.ZSTANDARD)
+        self.assertEqual(get_codec("bz2"), AvroCodec.BZIP2)
+        self.assertEqual(get_codec("deflate"), AvroCodec.DEFLATE)
+        with self.assertRaises(ValueError):
+            get_codec("unknown")
+        self.assertIn(AvroCodec.NULL, get_available_codecs())
+        self.assertIn(AvroCodec.DEFLATE, get_available_codecs())
+
+    def test_write_many_with_codec(self):
+        for codec in get_available_codecs():
+            output = io.BytesIO()
+            avro_writer = AvroWriter(output, self.example_schema, codec=codec)
+
+            num_rows = avro_writer.write_many(iter(self.example_records))
+            avro_writer.close()
+
+            output.seek(0)
+            avro_reader = fastavro.reader(output)
+            self.assertEqual(num_rows, 100)
+            self.assertEqual(avro_reader.metadata["avro.codec"], codec.value)
+            self.assertListEqual(list(avro_reader), self.example_records)
+
+    def test_compression_level(self):
+        outputs = []
+        for compression_level in [1, 9]:
+            output = io.BytesIO()
+            avro_writer = AvroWriter(output, self.example_schema, codec="deflate", compression_level=compression_level)
+            avro_writer.write_many(self.example_records * 10)
+            avro_writer.close()
+            outputs.append(output.getvalue())
+
+        for output in outputs:
+            self.assertListEqual(list(fastavro.reader(io.BytesIO(output))), self.example_records * 10)
+
+    def test_block_records(self):
+        blocks = []
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, self.example_schema, block_records=30, block_callback=blocks.append)
+
+        avro_writer.write_many(self.example_records)
+        avro_writer.close()
+
+        self.assertEqual([block.records for block in blocks], [30, 30, 30, 10])
+        self.assertEqual([block.index for block in blocks], [0, 1, 2, 3])
+        self.assertDictEqual(avro_writer.counters.to_dict(),
+                             {"records": 100, "rejected": 0, "blocks": 4, "bytes": len(output.getvalue())})
+        output.seek(0)
+        self.assertEqual([block.num_records for block in fastavro.block_reader(output)], [30, 30, 30, 10])
+
+    def test_block_bytes(self):
+        blocks = []
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, self.example_schema, block_bytes=200, block_callback=blocks.append)
+
+        for record in self.example_records:
+            avro_writer.write(record)
+        avro_writer.close()
+
+        self.assertGreater(len(blocks), 5)
+        self.assertEqual(sum(block.records for block in blocks), 100)
+        header_size = len(output.getvalue()) - sum(block.bytes for block in blocks)
+        output.seek(0)
+        self.assertEqual(header_size, len(read_header(output).raw))
+
+    def test_write_many_invalid_row(self):
+        avro_writer = AvroWriter(io.BytesIO(), self.example_schema)
+
+        with self.assertRaises(AvroMatchingException) as context:
+            avro_writer.write_many([self.example_records[0], {"Age": 21}])
+        self.assertIn("{'Age': 21}", str(context.exception))
+
+    def test_parallel_compression(self):
+        for codec in get_available_codecs():
+            blocks = []
+            output = io.BytesIO()
+            avro_writer = AvroWriter(output, self.example_schema, codec=codec, compression_level=None,
+                                     block_records=7, block_callback=blocks.append,
+                                     compression_workers=3, max_pending_blocks=2)
+
+            avro_writer.write_many(self.example_records[:50])
+            for record in self.example_records[50:]:
+                avro_writer.write(record)
+            avro_writer.close()
+
+            output.seek(0)
+            avro_reader = fastavro.reader(output)
+            self.assertEqual(avro_reader.metadata["avro.codec"], codec.value)
+            self.assertListEqual(list(avro_reader), self.example_records)
+            self.assertEqual([block.records for block in blocks], [7] * 14 + [2])
+            self.assertEqual([block.index for block in blocks], list(range(15)))
+            self.assertEqual(avro_writer.counters.bytes, len(output.getvalue()))
+            output.seek(0)
+            self.assertEqual([block.num_records for block in fastavro.block_reader(output)], [7] * 14 + [2])
+
+    def test_parallel_compression_with_executor(self):
+        output = io.BytesIO()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            avro_writer = AvroWriter(output, self.example_schema, codec="deflate", compression_level=9,
+                                     block_bytes=100, executor=executor)
+            avro_writer.write_many(self.example_records)
+            avro_writer.close()
+
+            # The executor is not shut down by the writer
+            self.assertEqual(executor.submit(sum, [1, 2]).result(), 3)
+
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), self.example_records)
+
+
+class AvroWriterModesTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "Employee",
+        "fields": [
+            {"name": "Name", "type": "string"},
+            {"name": "Age", "type": "int"}
+        ]
+    }
+
+    example_records = [
+        {"Name": "John Doe", "Age": 22},
+        {"Name": "Invalid", "Age": None},
+        {"Name": "Jane Doe", "Age": 27},
+        {"Age": 30}
+    ]
+
+    def test_trusted_mode(self):
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, self.example_schema, write_mode=WriteMode.TRUSTED)
+        avro_writer.write(self.example_records[0])
+        avro_writer.write_many([self.example_records[2]])
+        avro_writer.close()
+
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), [self.example_records[0], self.example_records[2]])
+
+    def test_validate_mode(self):
+        rejected_rows = []
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, self.example_schema, write_mode="validate",
+                                 rejected_callback=rejected_rows.append)
+
+        self.assertEqual(avro_writer.write_many(self.example_records), 2)
+        avro_writer.close()
+
+        # The invalid rows don't leave partial data in the file
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), [self.example_records[0], self.example_records[2]])
+        self.assertEqual([(row.row_index, row.reason) for row in rejected_rows],
+                         [(1, "Age: expected int, got NoneType"), (3, "Name: expected string, got NoneType")])
+        self.assertEqual(avro_writer.counters.rejected, 2)
+
+    def test_write_batch(self):
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, self.example_schema, write_mode=WriteMode.VALIDATE)
+
+        rejected_rows = avro_writer.write_batch(self.example_records)
+        avro_writer.close()
+
+        self.assertEqual([row.row for row in rejected_rows], [self.example_records[1], self.example_records[3]])
+        output.seek(0)
+        self.assertEqual(len(list(fastavro.reader(output))), 2)
+
+        with self.assertRaises(ValueError):
+            AvroWriter(io.BytesIO(), self.example_schema).write_batch(self.example_records)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class AvroWriterColumnsTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "Employee",
+        "fields": [
+            {"name": "Name", "type": "string"},
+            {"name": "Age", "type": ["null", "int"]}
+        ]
+    }
+
+    example_columns = {
+        "Name": [f"Employee {position}" for position in range(1000)],
+        "Age": np.ma.masked_array(np.arange(1000), mask=np.arange(1000) % 7 == 0)
+    }
+
+    expected_records = [{"Name": f"Employee {position}", "Age": None if position % 7 == 0 else position}
+                        for position in range(1000)]
+
+    def test_write_columns(self):
+        for codec in ("null", "deflate"):
+            for parallel in (False, True):
+                with self.subTest(codec=codec, parallel=parallel):
+                    blocks = []
+                    output = io.BytesIO()
+                    avro_writer = AvroWriter(output, self.example_schema, codec=codec, block_bytes=2000,
+                                             block_callback=blocks.append,
+                                             compression_workers=2 if parallel else None)
+                    avro_writer.write(self.expected_records[0])
+                    self.assertEqual(avro_writer.write_columns(self.example_columns), 1000)
+                    avro_writer.write(self.expected_records[1])
+                    avro_writer.close()
+
+                    output.seek(0)
+                    records = list(fastavro.reader(output))
+                    self.assertListEqual(records, self.expected_records[:1] + self.expected_records +
+                                         self.expected_records[1:2])
+                    self.assertEqual(avro_writer.counters.records, 1002)
+                    self.assertEqual(sum(block.records for block in blocks), 1002)
+                    self.assertGreater(len(blocks), 5)
+
+    def test_write_columns_invalid_values(self):
+        for ages in ([1.0, np.nan], [np.inf, 2.0], [-np.inf, 2.0], [2.0 ** 31, 2.0], [1.5, 2.0]):
+            with self.subTest(ages=ages):
+                avro_writer = AvroWriter(io.BytesIO(), self.example_schema)
+                with self.assertRaises(AvroMatchingException):
+                    avro_writer.write_columns({"Name": ["a", "b"], "Age": np.array(ages)})
+
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, self.example_schema)
+        avro_writer.write_columns({"Name": ["a", "b"], "Age": np.array([1.0, -2.0])})
+        avro_writer.close()
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), [{"Name": "a", "Age": 1}, {"Name": "b", "Age": -2}])
+
+    def test_write_columns_block_records(self):
+        output = io.BytesIO()
+        block_index = BlockIndex(["Age"])
+        avro_writer = AvroWriter(output, self.example_schema, block_records=300, block_index=block_index)
+        avro_writer.write_columns(self.example_columns)
+        avro_writer.close()
+
+        self.assertEqual([entry.records for entry in block_index.entries], [300, 300, 300, 100])
+        self.assertEqual(block_index.entries[1].stats, {"Age": [300, 599]})
+        output.seek(0)
+        self.assertEqual([block.num_records for block in fastavro.block_reader(output)], [300, 300, 300, 100])
+
+
+class AvroWriterEncodedTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "Employee",
+        "fields": [
+            {"name": "Name", "type": "string"},
+            {"name": "Age", "type": ["null", "int"]}
+        ]
+    }
+
+    example_records = [{"Name": f"Employee {i}", "Age": i if i % 3 else None} for i in range(200)]
+
+    def test_encode_records(self):
+        encoded_records = encode_records(self.example_schema, self.example_records)
+
+        self.assertEqual(encoded_records.records, 200)
+        stream = io.BytesIO(encoded_records.data)
+        parsed_schema = fastavro.parse_schema(self.example_schema)
+        self.assertListEqual([fastavro.schemaless_reader(stream, parsed_schema) for _ in range(200)],
+                             self.example_records)
+        self.assertEqual(stream.tell(), len(encoded_records.data))
+        self.assertEqual(encode_records(self.example_schema, []), (b"", 0))
+        self.assertRaises(AvroMatchingException, encode_records, self.example_schema, [{"Age": 2}])
+
+    def test_write_encoded(self):
+        for codec in (AvroCodec.NULL, AvroCodec.DEFLATE):
+            for parallel in (False, True):
+                with self.subTest(codec=codec, parallel=parallel):
+                    blocks = []
+                    output = io.BytesIO()
+                    avro_writer = AvroWriter(output, self.example_schema, codec=codec, block_bytes=500,
+                                             block_callback=blocks.append,
+                                             compression_workers=2 if parallel else None)
+                    avro_writer.write(self.example_records[0])
+                    for start in range(1, 199, 9):
+                        encoded_records = encode_records(self.example_schema, self.example_records[start:start + 9])
+                        avro_writer.write_encoded(*encoded_records)
+                    avro_writer.write(self.example_records[199])
+                    avro_writer.close()
+
+                    output.seek(0)
+                    self.assertListEqual(list(fastavro.reader(output)), self.example_records)
+                    self.assertEqual(avro_writer.counters.records, 200)
+                    self.assertEqual(sum(block.records for block in blocks), 200)
+                    self.assertGreater(len(blocks), 3)
+
+    def test_write_encoded_block_records(self):
+        output = io.BytesIO()
+        block_index = BlockIndex()
+        avro_writer = AvroWriter(output, self.example_schema, block_records=50, block_index=block_index)
+        for start in range(0, 200, 25):
+            avro_writer.write_encoded(*encode_records(self.example_schema, self.example_records[start:start + 25]))
+        avro_writer.close()
+
+        self.assertEqual([entry.records for entry in block_index.entries], [50, 50, 50, 50])
+        output.seek(0)
+        self.assertEqual([block.num_records for block in fastavro.block_reader(output)], [50, 50, 50, 50])
+        self.assertRaises(ValueError, avro_writer.write_encoded, b"", -1)
+
+    def test_write_compressed_block(self):
+        source = io.BytesIO()
+        fastavro.writer(source, self.example_schema, self.example_records, codec="deflate")
+        source.seek(0)
+        header = read_header(source)
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, self.example_schema, codec="deflate")
+        avro_writer.write(self.example_records[0])
+        while source.tell() < len(source.getvalue()):
+            num_records = read_long(source)
+            avro_writer.write_compressed_block(num_records, source.read(read_long(source)))
+            self.assertEqual(source.read(16), header.sync_marker)
+        avro_writer.close()
+
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), self.example_records[:1] + self.example_records)
+        self.assertEqual(avro_writer.counters.records, 201)
+        parallel_writer = AvroWriter(io.BytesIO(), self.example_schema, codec="deflate", compression_workers=1)
+        self.assertRaises(ValueError, parallel_writer.write_compressed_block, 1, b"")
+        parallel_writer.close()
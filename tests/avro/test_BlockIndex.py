@@ -0,0 +1,169 @@
+import io
+import os
+import tempfile
+import unittest
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from SwissKnife.avro.AvroReader import AvroReader
+from SwissKnife.avro.AvroWriter import AvroWriter, encode_records
+from SwissKnife.avro.BlockIndex import BlockIndex, BlockIndexEntry, get_index_path
+
+
+class BlockIndexTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "Event",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {"name": "timestamp", "type": ["null", "long"]},
+            {"name": "name", "type": "string"}
+        ]
+    }
+
+    # The timestamps grow with the id, except some None values
+    example_records = [{"id": number, "timestamp": None if number % 10 == 0 else 1000 * number,
+                        "name": f"event {number}"} for number in range(500)]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "events.avro")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write_file(self, **writer_options) -> BlockIndex:
+        block_index = BlockIndex(["id", "timestamp"])
+        with open(self.path, "wb") as output_file:
+            avro_writer = AvroWriter(output_file, self.example_schema, codec="deflate", block_records=40,
+                                     block_index=block_index, **writer_options)
+            avro_writer.write_many(self.example_records)
+            avro_writer.close()
+        block_index.save(get_index_path(self.path))
+        return BlockIndex.load(get_index_path(self.path))
+
+    def test_index_entries(self):
+        block_index = self.write_file()
+
+        self.assertEqual(len(block_index), 13)
+        self.assertEqual(block_index.num_records, 500)
+        with AvroReader(self.path) as avro_reader:
+            blocks = list(avro_reader.iter_blocks())
+        self.assertEqual([(entry.offset, entry.records, entry.size) for entry in block_index.entries],
+                         [(block.offset, block.records, block.size) for block in blocks])
+        self.assertEqual(block_index.entries[1].first_record, 40)
+        self.assertEqual(block_index.entries[1].stats, {"id": [40, 79], "timestamp": [41000, 79000]})
+
+    def test_index_with_parallel_compression(self):
+        expected_entries = self.write_file().entries
+        block_index = self.write_file(compression_workers=2)
+
+        self.assertEqual([(entry.records, entry.first_record, entry.stats) for entry in block_index.entries],
+                         [(entry.records, entry.first_record, entry.stats) for entry in expected_entries])
+        with AvroReader(self.path) as avro_reader:
+            self.assertEqual([(entry.offset, entry.size) for entry in block_index.entries],
+                             [(block.offset, block.size) for block in avro_reader.iter_blocks()])
+
+    def test_read_record(self):
+        block_index = self.write_file()
+        with AvroReader(self.path) as avro_reader:
+            self.assertEqual(avro_reader.read_record(123, block_index), self.example_records[123])
+            self.assertEqual(avro_reader.read_record(0, block_index), self.example_records[0])
+            self.assertListEqual(list(avro_reader.read_from_record(495, block_index)), self.example_records[495:])
+            with self.assertRaises(IndexError):
+                avro_reader.read_record(500, block_index)
+
+    def test_read_range(self):
+        block_index = self.write_file()
+
+        self.assertEqual([entry.first_record for entry in block_index.filter_blocks("timestamp", 100000, 130000)],
+                         [80, 120])
+        with AvroReader(self.path, fields=["id", "timestamp"]) as avro_reader:
+            records = list(avro_reader.read_range(block_index, "timestamp", 100000, 130000))
+            self.assertEqual([record["id"] for record in records], [101, 102, 103, 104, 105, 106, 107, 108, 109,
+                                                                     111, 112, 113, 114, 115, 116, 117, 118, 119,
+                                                                     121, 122, 123, 124, 125, 126, 127, 128, 129])
+            self.assertEqual(len(list(avro_reader.read_range(block_index, "id", min_value=480))), 20)
+            with self.assertRaises(ValueError):
+                list(avro_reader.read_range(block_index, "name", "a"))
+
+    def test_read_range_encoded_blocks(self):
+        block_index = BlockIndex(["id"])
+        with open(self.path, "wb") as output_file:
+            avro_writer = AvroWriter(output_file, self.example_schema, block_records=40, block_index=block_index)
+            avro_writer.write_many(self.example_records[:100])
+            encoded_records = encode_records(self.example_schema, self.example_records[100:300])
+            avro_writer.write_encoded(encoded_records.data, encoded_records.records)
+            avro_writer.write_many(self.example_records[300:])
+            avro_writer.close()
+        block_index.save(get_index_path(self.path))
+        block_index = BlockIndex.load(get_index_path(self.path))
+
+        # The statistics of the encoded records are unknown, so their block is never discarded
+        self.assertListEqual([entry.stats is None for entry in block_index.entries],
+                             [False] * 3 + [True] + [False] * 5)
+        with AvroReader(self.path) as avro_reader:
+            records = list(avro_reader.read_range(block_index, "id", 150, 160))
+            self.assertListEqual([record["id"] for record in records], list(range(150, 161)))
+            records = list(avro_reader.read_range(block_index, "id", 390, 410))
+            self.assertListEqual([record["id"] for record in records], list(range(390, 411)))
+
+    def test_index_doesnt_match(self):
+        block_index = self.write_file()
+        with open(self.path, "wb") as output_file:
+            avro_writer = AvroWriter(output_file, self.example_schema)
+            avro_writer.write_many(self.example_records)
+            avro_writer.close()
+        with AvroReader(self.path) as avro_reader:
+            with self.assertRaises(ValueError):
+                avro_reader.read_record(200, block_index)
+
+    def test_stats_in_memory(self):
+        block_index = BlockIndex(["timestamp"])
+        avro_writer = AvroWriter(io.BytesIO(), self.example_schema, block_index=block_index)
+        avro_writer.write_many(self.example_records[:10])
+        avro_writer.close()
+        self.assertEqual(block_index.entries[0].stats, {"timestamp": [1000, 9000]})
+
+    def test_save_logical_type_stats(self):
+        schema = {
+            "type": "record",
+            "name": "Event",
+            "fields": [
+                {"name": "id", "type": "long"},
+                {"name": "created", "type": {"type": "long", "logicalType": "timestamp-millis"}}
+            ]
+        }
+        start = datetime(2020, 1, 1, tzinfo=timezone.utc)
+        records = [{"id": number, "created": start + timedelta(hours=number)} for number in range(100)]
+        block_index = BlockIndex(["created"])
+        with open(self.path, "wb") as output_file:
+            avro_writer = AvroWriter(output_file, schema, block_records=10, block_index=block_index)
+            avro_writer.write_many(records)
+            avro_writer.close()
+        block_index.save(get_index_path(self.path))
+        loaded_index = BlockIndex.load(get_index_path(self.path))
+
+        self.assertListEqual(loaded_index.entries, block_index.entries)
+        self.assertEqual(loaded_index.entries[1].stats["created"], [start + timedelta(hours=10),
+                                                                    start + timedelta(hours=19)])
+        blocks = loaded_index.filter_blocks("created", start + timedelta(hours=25), start + timedelta(hours=35))
+        self.assertListEqual([entry.first_record for entry in blocks], [20, 30])
+
+    def test_save_typed_stats(self):
+        stats = {"naive": [datetime(2020, 1, 1, 12), datetime(2020, 1, 2, 0, 0, 0, 5)],
+                 "day": [date(2019, 12, 31), date(2020, 1, 1)],
+                 "hour": [time(8, 30), time(23, 59, 59, 999999)],
+                 "price": [Decimal("1.50"), Decimal("10.25")],
+                 "hash": [b"\x00\xff", b"\x10"],
+                 "name": ["a", "b"]}
+        block_index = BlockIndex(list(stats), [BlockIndexEntry(4, 10, 0, 100, stats)])
+        block_index.save(self.path)
+        self.assertDictEqual(BlockIndex.load(self.path).entries[0].stats, stats)
+        with self.assertRaises(TypeError):
+            BlockIndex(["other"], [BlockIndexEntry(4, 10, 0, 100, {"other": [object(), object()]})]).save(self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()
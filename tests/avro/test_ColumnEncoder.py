@@ -0,0 +1,137 @@
+import io
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.ColumnEncoder import ColumnEncoder, encode_varints, split_blocks
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+try:
+    import pyarrow
+except ModuleNotFoundError:
+    pyarrow = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class ColumnEncoderTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "listing",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {"name": "url", "type": ["string"]},
+            {"name": "price", "type": ["null", "double"], "default": None},
+            {"name": "rooms", "type": ["int", "null"]},
+            {"name": "isReady", "type": "boolean", "default": False},
+            {"name": "operation", "type": {"type": "enum", "name": "operation", "symbols": ["SALE", "RENT"]}},
+            {"name": "created", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+            {"name": "hash", "type": ["null", {"type": "fixed", "name": "hash", "size": 2}], "default": None}
+        ]
+    }
+
+    def decode(self, encoded_rows) -> list:
+        parsed_schema = fastavro.parse_schema(self.example_schema)
+        stream = io.BytesIO(encoded_rows.data.tobytes())
+        records = []
+        for row_end in encoded_rows.row_ends:
+            records.append(fastavro.schemaless_reader(stream, parsed_schema))
+            self.assertEqual(stream.tell(), row_end)
+        return records
+
+    def test_encode_varints(self):
+        values = [0, -1, 1, 63, -64, 64, 1 << 40, -(1 << 63), (1 << 63) - 1]
+        data, lengths = encode_varints(np.array(values, dtype=np.int64))
+
+        stream = io.BytesIO(data.tobytes())
+        self.assertEqual([fastavro.schemaless_reader(stream, "long") for _ in values], values)
+        self.assertEqual(lengths.tolist(), [1, 1, 1, 1, 1, 2, 6, 10, 10])
+
+    def test_encode_columns(self):
+        columns = {
+            "id": np.arange(4),
+            "url": ["a", "ñ", "", "a longer url"],
+            "price": np.ma.masked_array([1.5, 0, 3.25, 4], mask=[False, True, False, False]),
+            "rooms": np.array([1, 2, 3, 4]),
+            "operation": np.array(["SALE", "RENT", "RENT", "SALE"], dtype=object),
+            "created": np.array(["2020-01-01T00:00:00.001"] * 4, dtype="datetime64[ms]"),
+            "hash": [b"ab", None, b"cd", None]
+        }
+        masks = {"rooms": np.array([True, True, False, True])}
+
+        records = self.decode(ColumnEncoder(self.example_schema).encode(ColumnEncoder.get_columns(columns, masks)))
+
+        self.assertEqual([record["price"] for record in records], [1.5, None, 3.25, 4.0])
+        self.assertEqual([record["rooms"] for record in records], [1, 2, None, 4])
+        self.assertEqual([record["isReady"] for record in records], [False] * 4)
+        self.assertEqual([record["hash"] for record in records], [b"ab", None, b"cd", None])
+        self.assertEqual(records[1]["url"], "ñ")
+        self.assertEqual(records[1]["operation"], "RENT")
+        self.assertEqual(records[0]["created"].timestamp(), 1577836800.001)
+
+    def test_encode_range(self):
+        columns = ColumnEncoder.get_columns({
+            "id": list(range(10)), "url": ["url"] * 10, "rooms": [None] * 10,
+            "operation": ["SALE"] * 10, "created": list(range(10))
+        })
+        records = self.decode(ColumnEncoder(self.example_schema).encode(columns, 3, 6))
+        self.assertEqual([record["id"] for record in records], [3, 4, 5])
+
+    def test_invalid_columns(self):
+        column_encoder = ColumnEncoder(self.example_schema)
+        valid_columns = {"id": [1], "url": ["url"], "rooms": [1], "operation": ["SALE"], "created": [1]}
+        invalid_cases = [
+            {"id": [None]},
+            {"operation": ["UNKNOWN"]},
+            {"rooms": [1 << 40]},
+            {"id": np.array([np.nan])},
+            {"id": np.array([np.inf])},
+            {"id": np.array([1.5])},
+            {"rooms": np.array([2.0 ** 31])},
+            {"id": np.array([2 ** 64 - 1], dtype=np.uint64)},
+            {"rooms": np.array([2 ** 31], dtype=np.uint32)},
+            {"url": [1]},
+            {"hash": [b"abc"]},
+        ]
+        for changes in invalid_cases:
+            with self.subTest(changes=changes):
+                with self.assertRaises(ValueError):
+                    column_encoder.encode(ColumnEncoder.get_columns(dict(valid_columns, **changes)))
+        with self.assertRaises(ValueError):
+            column_encoder.encode(ColumnEncoder.get_columns({"url": ["url"]}))
+        with self.assertRaises(ValueError):
+            ColumnEncoder.get_columns({"id": [1, 2], "url": ["url"]})
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_encode_nullable_pyarrow_integers(self):
+        schema = {"type": "record", "name": "r", "fields": [{"name": "value", "type": ["null", "long"]}]}
+        table = pyarrow.table({"value": pyarrow.array([2 ** 60 + 1, None, -(2 ** 62) - 3], pyarrow.int64())})
+
+        encoded_rows = ColumnEncoder(schema).encode(ColumnEncoder.get_columns(table))
+
+        stream = io.BytesIO(encoded_rows.data.tobytes())
+        parsed_schema = fastavro.parse_schema(schema)
+        values = [fastavro.schemaless_reader(stream, parsed_schema)["value"] for _ in range(3)]
+        self.assertListEqual(values, [2 ** 60 + 1, None, -(2 ** 62) - 3])
+
+    def test_unsupported_schema(self):
+        with self.assertRaises(ValueError):
+            ColumnEncoder({"type": "record", "name": "r", "fields": [{"name": "a", "type": ["int", "string"]}]})
+        with self.assertRaises(ValueError):
+            ColumnEncoder({"type": "record", "name": "r",
+                           "fields": [{"name": "a", "type": {"type": "array", "items": "int"}}]})
+
+    def test_split_blocks(self):
+        row_ends = np.array([10, 20, 30, 40, 50, 60, 70])
+        self.assertEqual(split_blocks(row_ends, 25), [3, 6, 7])
+        self.assertEqual(split_blocks(row_ends, 20), [2, 4, 6, 7])
+        self.assertEqual(split_blocks(row_ends, 1000, block_records=3), [3, 6, 7])
+        self.assertEqual(split_blocks(row_ends[:0], 20), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+import unittest
+
+from SwissKnife.avro.AvroTransformer import AvroTransformer
+from SwissKnife.avro.TransformRegistry import DEFAULT_TRANSFORM_REGISTRY
+
+try:
+    import numpy as np
+except ModuleNotFoundError:
+    np = None
+
+try:
+    import pyarrow
+except ModuleNotFoundError:
+    pyarrow = None
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class ColumnarTransformerTest(unittest.TestCase):
+
+    example_avro_schema = {
+        "type": "record",
+        "name": "example_record",
+        "fields": [
+            {"name": "url", "type": ["string"]},
+            {"name": "code", "aliases": ["id"], "type": ["null", "string"], "default": None},
+            {"name": "price", "type": ["null", "double"], "default": None},
+            {"name": "rooms", "type": ["null", "int"], "default": None},
+            {"name": "date", "type": ["null", "long"], "default": None},
+            {"name": "startDate", "type": ["null", "long"], "transform": "copyFrom(date)", "default": None},
+            {"name": "isReady", "type": ["boolean"], "transform": "int2boolean", "default": False}
+        ]
+    }
+
+    def assert_same_as_records(self, columns: dict, result, avro_transformer: AvroTransformer = None):
+        avro_transformer = avro_transformer or AvroTransformer(self.example_avro_schema)
+        num_rows = len(result.valid)
+        records = [{key: column[index] for key, column in columns.items()} for index in range(num_rows)]
+        for index, record in enumerate(records):
+            expected_record = avro_transformer.apply_all_transforms(record)
+            result_record = {key: column[index] for key, column in result.columns.items()}
+            self.assertTrue(result.valid[index])
+            self.assertDictEqual(result_record, expected_record)
+
+    def test_transform_columns_vectorized(self):
+        columns = {
+            "url": np.array(["http://a.com", "http://b.com", "http://c.com"]),
+            "id": np.array(["1", "2", "3"]),
+            "price": np.array(["1,5", "", "3.25"]),
+            "rooms": np.array([1.7, 2.0, -1.2]),
+            "date": np.array([100, 200, 300]),
+            "startDate": np.array([0, 0, 0]),
+            "isReady": np.array([0, 3, -1])
+        }
+        result = AvroTransformer(self.example_avro_schema).transform_columns(columns)
+        self.assertListEqual(list(result.columns.keys()), [field["name"] for field in self.example_avro_schema["fields"]])
+        self.assertListEqual(result.columns["price"].tolist(), [1.5, None, 3.25])
+        self.assertListEqual(result.columns["rooms"].tolist(), [1, 2, -1])
+        self.assertListEqual(result.columns["startDate"].tolist(), [100, 200, 300])
+        self.assertListEqual(result.columns["isReady"].tolist(), [False, True, False])
+        self.assertListEqual(result.columns["code"].tolist(), ["1", "2", "3"])
+        self.assert_same_as_records({key: column.tolist() for key, column in columns.items()}, result)
+
+    def test_transform_columns_custom_registry(self):
+        transform_registry = DEFAULT_TRANSFORM_REGISTRY.copy()
+        # Overridden built-in transforms are not vectorized
+        transform_registry.register("int2boolean", lambda: lambda value, record: value is not None and value < 0)
+        transform_registry.register("copyFrom", lambda field: lambda value, record: record[field] + 1)
+        avro_transformer = AvroTransformer(self.example_avro_schema, transform_registry=transform_registry)
+        columns = {
+            "url": np.array(["http://a.com", "http://b.com"]),
+            "date": np.array([100, 200]),
+            "startDate": np.array([0, 0]),
+            "isReady": np.array([3, -1])
+        }
+        result = avro_transformer.transform_columns(columns)
+        self.assertListEqual(result.columns["startDate"].tolist(), [101, 201])
+        self.assertListEqual(result.columns["isReady"].tolist(), [False, True])
+        self.assert_same_as_records({key: column.tolist() for key, column in columns.items()}, result,
+                                    avro_transformer)
+
+    def test_transform_columns_lists_and_defaults(self):
+        columns = {
+            "url": ["http://a.com", 12],
+            "price": [None, 4],
+            "isReady": [None, "7"]
+        }
+        result = AvroTransformer(self.example_avro_schema).transform_columns(columns)
+        self.assertListEqual(result.columns["code"].tolist(), [None, None])
+        self.assertListEqual(result.columns["isReady"].tolist(), [False, True])
+        self.assert_same_as_records(columns, result)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_transform_columns_pyarrow_nulls(self):
+        columns = {
+            "url": ["http://a.com", "http://b.com", None],
+            "id": ["1", None, "3"],
+            "price": [1.5, None, 3.25],
+            "rooms": [2 ** 53 + 1, None, 3],
+            "date": [100, None, 300],
+            "startDate": [0, 0, None],
+            "isReady": [None, 3, -1]
+        }
+        table = pyarrow.table({
+            "url": pyarrow.array(columns["url"]),
+            "id": pyarrow.array(columns["id"]),
+            "price": pyarrow.array(columns["price"], pyarrow.float64()),
+            "rooms": pyarrow.array(columns["rooms"], pyarrow.int64()),
+            "date": pyarrow.array(columns["date"], pyarrow.int32()),
+            "startDate": pyarrow.array(columns["startDate"], pyarrow.int64()),
+            "isReady": pyarrow.array(columns["isReady"], pyarrow.int64())
+        })
+        result = AvroTransformer(self.example_avro_schema).transform_columns(table)
+        # The null values are None (not NaN or invalid rows), as in apply_all_transforms
+        self.assertListEqual(result.columns["price"].tolist(), [1.5, None, 3.25])
+        self.assertListEqual(result.columns["rooms"].tolist(), [2 ** 53 + 1, None, 3])
+        self.assertListEqual(result.columns["startDate"].tolist(), [100, None, 300])
+        self.assertListEqual(result.columns["isReady"].tolist(), [False, True, False])
+        self.assertListEqual(result.columns["code"].tolist(), ["1", None, "3"])
+        self.assert_same_as_records(columns, result)
+
+    def test_transform_columns_invalid_values(self):
+        columns = {
+            "url": ["http://a.com", "http://b.com", "http://c.com"],
+            "rooms": ["1", "two", ""],
+            "price": ["1.5", "2,5", "abc"]
+        }
+        result = AvroTransformer(self.example_avro_schema).transform_columns(columns)
+        self.assertListEqual(result.valid.tolist(), [True, False, False])
+        self.assertListEqual(result.columns["rooms"].tolist(), [1, None, None])
+        self.assertListEqual(result.columns["price"].tolist(), [1.5, 2.5, None])
+
+    def test_transform_columns_errors(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+        with self.assertRaises(RuntimeError):
+            avro_transformer.transform_columns({"code": ["a"]})
+        with self.assertRaises(ValueError):
+            avro_transformer.transform_columns({"url": ["a"], "code": ["a", "b"]})
@@ -0,0 +1,68 @@
+import io
+import os
+import tempfile
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.AvroTransformer import ErrorPolicy
+from SwissKnife.avro.CsvToAvroConverter import CsvToAvroConverter
+
+
+class CsvToAvroConverterTest(unittest.TestCase):
+
+    example_avro_schema = {
+        "type": "record",
+        "name": "example_record",
+        "fields": [
+            {"name": "code", "aliases": ["id"], "type": ["null", "string"], "default": None},
+            {"name": "price", "type": ["null", "double"], "default": None},
+            {"name": "rooms", "type": ["null", "int"], "default": None},
+            {"name": "isReady", "type": ["boolean"], "transform": "int2boolean", "default": False}
+        ]
+    }
+
+    example_csv = (
+        "id;price;ignored;rooms;isReady\n"
+        "A1;100,5;x;3;1\n"
+        "A2;;x;;0\n"
+        "A3;7;x;four;1\n"
+        "A4;8\n"
+    )
+
+    expected_records = [
+        {"code": "A1", "price": 100.5, "rooms": 3, "isReady": True},
+        {"code": "A2", "price": None, "rooms": None, "isReady": False},
+        {"code": "A4", "price": 8.0, "rooms": None, "isReady": False}
+    ]
+
+    def test_convert_file_like(self):
+        dead_letters = []
+        converter = CsvToAvroConverter(self.example_avro_schema, chunk_size=2, delimiter=";",
+                                       on_error=ErrorPolicy.DEAD_LETTER, dead_letter_sink=dead_letters.append)
+        input_stream = io.BytesIO(self.example_csv.encode("utf-8"))
+        output_stream = io.BytesIO()
+
+        counters = converter.convert(input_stream, output_stream)
+
+        self.assertFalse(input_stream.closed)
+        output_stream.seek(0)
+        self.assertListEqual(list(fastavro.reader(output_stream)), self.expected_records)
+        self.assertEqual(counters["read"], 4)
+        self.assertEqual(counters["dead_lettered"], 1)
+        self.assertEqual(dead_letters[0].field, "rooms")
+        self.assertEqual(dead_letters[0].record_index, 2)
+
+    def test_convert_local_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            csv_path = os.path.join(directory, "input.csv")
+            avro_path = os.path.join(directory, "output.avro")
+            with open(csv_path, "w", encoding="latin-1") as csv_file:
+                csv_file.write("id,rooms\nÑ1,2\n")
+
+            converter = CsvToAvroConverter(self.example_avro_schema, encoding="latin-1")
+            converter.convert(csv_path, avro_path)
+
+            with open(avro_path, "rb") as avro_file:
+                self.assertListEqual(list(fastavro.reader(avro_file)),
+                                     [{"code": "Ñ1", "price": None, "rooms": 2, "isReady": False}])
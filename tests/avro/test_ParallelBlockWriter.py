@@ -0,0 +1,68 @@
+import bz2
+import io
+import lzma
+import unittest
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import fastavro
+
+from SwissKnife.avro.AvroContainer import CODEC_KEY, encode_header, read_header
+from SwissKnife.avro.AvroWriter import AvroWriter
+from SwissKnife.avro.ParallelBlockWriter import BLOCK_COMPRESSORS, ParallelBlockWriter, compress_block
+
+
+class ParallelBlockWriterTest(unittest.TestCase):
+
+    def test_compress_block(self):
+        data = b"some data " * 100
+
+        self.assertEqual(compress_block(data, "null"), data)
+        self.assertEqual(zlib.decompress(compress_block(data, "deflate", 9), -15), data)
+        self.assertEqual(bz2.decompress(compress_block(data, "bzip2")), data)
+        self.assertEqual(lzma.decompress(compress_block(data, "xz", 1)), data)
+
+    @unittest.skipIf("lz4" not in BLOCK_COMPRESSORS, "lz4 is not installed")
+    def test_lz4_compression_level(self):
+        import lz4.block
+        data = bytes(range(256)) * 10 + b"some data " * 100
+
+        self.assertEqual(lz4.block.decompress(compress_block(data, "lz4", 12)), data)
+        self.assertLessEqual(len(compress_block(data, "lz4", 12)), len(compress_block(data, "lz4")))
+        # fastavro ignores the level, so it is only accepted with the parallel compression
+        with self.assertRaises(ValueError):
+            AvroWriter(io.BytesIO(), {"type": "record", "name": "example", "fields": []}, codec="lz4",
+                       compression_level=9)
+
+    def test_unavailable_codec(self):
+        with self.assertRaises(ValueError):
+            ParallelBlockWriter(io.BytesIO(), b"0" * 16, "unknown")
+
+    def test_write_blocks_in_order(self):
+        # A file without compression, whose blocks are rewritten with deflate in a process pool
+        records = [{"value": position} for position in range(100)]
+        original_file = io.BytesIO()
+        fastavro.writer(original_file, {"type": "record", "name": "example", "fields": [
+            {"name": "value", "type": "int"}]}, records, sync_interval=20)
+        original_file.seek(0)
+        header = read_header(original_file)
+        original_file.seek(0)
+        blocks = [(block.num_records, block.bytes_.getvalue()) for block in fastavro.block_reader(original_file)]
+
+        output = io.BytesIO()
+        output.write(encode_header(dict(header.metadata, **{CODEC_KEY: b"deflate"}), header.sync_marker))
+        header_size = output.tell()
+        written_blocks = []
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            block_writer = ParallelBlockWriter(output, header.sync_marker, "deflate", executor=executor,
+                                               max_pending_blocks=3,
+                                               block_callback=lambda *block: written_blocks.append(block))
+            for num_records, data in blocks:
+                block_writer.write_block(num_records, data)
+            block_writer.close()
+
+        self.assertEqual([num_records for num_records, _ in written_blocks],
+                         [num_records for num_records, _ in blocks])
+        self.assertEqual(header_size + sum(num_bytes for _, num_bytes in written_blocks), len(output.getvalue()))
+        output.seek(0)
+        self.assertListEqual(list(fastavro.reader(output)), records)
@@ -0,0 +1,140 @@
+import io
+import unittest
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from SwissKnife.avro.AvroWriter import AvroMatchingException, AvroWriter
+from SwissKnife.avro.CsvToAvroConverter import CsvToAvroConverter
+from SwissKnife.avro.OutputFormat import OutputFormat, create_writer
+from SwissKnife.avro.ParquetWriter import ParquetWriter, get_arrow_schema
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ModuleNotFoundError:
+    pyarrow = None
+
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class ParquetWriterTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "listing",
+        "namespace": "example",
+        "fields": [
+            {"name": "id", "type": "long"},
+            {"name": "price", "type": ["null", "double"], "default": None},
+            {"name": "isReady", "type": ["boolean"], "default": False},
+            {"name": "operation", "type": {"type": "enum", "name": "operation", "symbols": ["SALE", "RENT"]}},
+            {"name": "created", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+            {"name": "tags", "type": {"type": "array", "items": "string"}, "default": []},
+            {"name": "address", "type": {"type": "record", "name": "address",
+                                         "fields": [{"name": "city", "type": "string"}]}},
+            {"name": "previousAddress", "type": ["null", "example.address"], "default": None},
+            {"name": "amount", "type": {"type": "bytes", "logicalType": "decimal", "precision": 8, "scale": 2},
+             "default": "\u0000"}
+        ]
+    }
+
+    def create_rows(self, num_rows: int) -> list:
+        return [{"id": i, "price": None if i % 2 else i * 1.5, "operation": "SALE", "created": 1577836800000 + i,
+                 "tags": ["a"] * i, "address": {"city": "Madrid"}, "amount": Decimal("10.25")}
+                for i in range(num_rows)]
+
+    def read(self, output_stream: io.BytesIO) -> "pyarrow.parquet.ParquetFile":
+        return pyarrow.parquet.ParquetFile(io.BytesIO(output_stream.getvalue()))
+
+    def test_arrow_schema(self):
+        arrow_schema = get_arrow_schema(self.example_schema)
+
+        self.assertEqual(arrow_schema.field("id").type, pyarrow.int64())
+        self.assertFalse(arrow_schema.field("id").nullable)
+        self.assertEqual(arrow_schema.field("price").type, pyarrow.float64())
+        self.assertTrue(arrow_schema.field("price").nullable)
+        self.assertFalse(arrow_schema.field("isReady").nullable)
+        self.assertEqual(arrow_schema.field("operation").type, pyarrow.string())
+        self.assertEqual(arrow_schema.field("created").type, pyarrow.timestamp("ms", tz="UTC"))
+        self.assertEqual(arrow_schema.field("tags").type, pyarrow.list_(pyarrow.string()))
+        self.assertEqual(arrow_schema.field("previousAddress").type, arrow_schema.field("address").type)
+        self.assertEqual(arrow_schema.field("amount").type, pyarrow.decimal128(8, 2))
+
+    def test_arrow_schema_unsupported_union(self):
+        schema = {"type": "record", "name": "test", "fields": [{"name": "value", "type": ["null", "int", "string"]}]}
+
+        self.assertRaises(ValueError, get_arrow_schema, schema)
+
+    def test_write_row_groups(self):
+        output_stream = io.BytesIO()
+        parquet_writer = ParquetWriter(output_stream, self.example_schema, row_group_records=4)
+        rows = self.create_rows(10)
+
+        parquet_writer.write(rows[0])
+        self.assertEqual(parquet_writer.write_many(rows[1:]), 9)
+        parquet_writer.close()
+
+        self.assertFalse(output_stream.closed)
+        parquet_file = self.read(output_stream)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 3)
+        self.assertEqual(parquet_file.metadata.row_group(2).num_rows, 2)
+        self.assertEqual(parquet_file.metadata.row_group(0).column(0).compression, "SNAPPY")
+        self.assertEqual(parquet_writer.counters.records, 10)
+        self.assertEqual(parquet_writer.counters.blocks, 3)
+        self.assertEqual(parquet_writer.counters.bytes, len(output_stream.getvalue()))
+
+        records = parquet_file.read().to_pylist()
+        self.assertEqual(records[4]["price"], 6.0)
+        self.assertIsNone(records[4]["previousAddress"])
+        self.assertFalse(records[4]["isReady"])
+        self.assertEqual(records[4]["tags"], ["a", "a", "a", "a"])
+        self.assertEqual(records[4]["created"], datetime(2020, 1, 1, 0, 0, 0, 4000, tzinfo=timezone.utc))
+        self.assertEqual(records[4]["amount"], Decimal("10.25"))
+
+    def test_read_columns(self):
+        output_stream = io.BytesIO()
+        parquet_writer = ParquetWriter(output_stream, self.example_schema, compression="gzip")
+        parquet_writer.write_many(self.create_rows(5))
+        parquet_writer.close()
+
+        table = self.read(output_stream).read(columns=["id", "price"])
+
+        self.assertEqual(table.column_names, ["id", "price"])
+        self.assertEqual(table.column("id").to_pylist(), [0, 1, 2, 3, 4])
+
+    def test_invalid_row(self):
+        parquet_writer = ParquetWriter(io.BytesIO(), self.example_schema)
+        invalid_rows = [dict(self.create_rows(1)[0], id=None), dict(self.create_rows(1)[0], id="one")]
+
+        for invalid_row in invalid_rows:
+            parquet_writer.write(invalid_row)
+            self.assertRaises(AvroMatchingException, parquet_writer.close)
+
+    def test_invalid_arguments(self):
+        self.assertRaises(ValueError, ParquetWriter, io.BytesIO(), self.example_schema, compression="unknown")
+        self.assertRaises(ValueError, ParquetWriter, io.BytesIO(), self.example_schema, row_group_records=0)
+
+    def test_create_writer(self):
+        self.assertIsInstance(create_writer(io.BytesIO(), self.example_schema), AvroWriter)
+        self.assertIsInstance(create_writer(io.BytesIO(), self.example_schema, "parquet", row_group_records=10),
+                              ParquetWriter)
+        self.assertRaises(ValueError, create_writer, io.BytesIO(), self.example_schema, "orc")
+
+    def test_convert_csv_to_parquet(self):
+        schema = {
+            "type": "record",
+            "name": "example_record",
+            "fields": [
+                {"name": "code", "aliases": ["id"], "type": ["null", "string"], "default": None},
+                {"name": "price", "type": ["null", "double"], "default": None}
+            ]
+        }
+        converter = CsvToAvroConverter(schema, output_format=OutputFormat.PARQUET,
+                                       writer_options={"row_group_records": 1})
+        output_stream = io.BytesIO()
+
+        converter.convert(io.BytesIO(b"id,price\nA1,100.5\nA2,\n"), output_stream)
+
+        parquet_file = self.read(output_stream)
+        self.assertEqual(parquet_file.metadata.num_row_groups, 2)
+        self.assertListEqual(parquet_file.read().to_pylist(),
+                             [{"code": "A1", "price": 100.5}, {"code": "A2", "price": None}])
@@ -0,0 +1,91 @@
+import os
+import tempfile
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.PartitionedAvroWriter import PartitionedAvroWriter, week_partitioner
+
+
+class PartitionedAvroWriterTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "listing",
+        "fields": [
+            {"name": "country", "type": "string"},
+            {"name": "timestamp", "type": "long"}
+        ]
+    }
+
+    # 2020-01-01 (2020W01) and 2020-01-08 (2020W02), in milliseconds
+    example_records = [
+        {"country": "es", "timestamp": 1577836800000},
+        {"country": "pt", "timestamp": 1578441600000},
+        {"country": "es", "timestamp": 1578441600000},
+        {"country": "it", "timestamp": 1577836800000},
+        {"country": "es", "timestamp": 1577836800000},
+        {"country": "pt", "timestamp": 1577836800000},
+    ]
+
+    @staticmethod
+    def read_file(path: str) -> list:
+        with open(path, "rb") as avro_file:
+            return list(fastavro.reader(avro_file))
+
+    def test_week_partitioner(self):
+        partitioner = week_partitioner("timestamp")
+        self.assertEqual(partitioner(self.example_records[0]), "2020W01")
+        self.assertEqual(partitioner(self.example_records[1]), "2020W02")
+
+    def test_write_partitions(self):
+        finished_files = []
+        with tempfile.TemporaryDirectory() as directory:
+            with PartitionedAvroWriter(directory, self.example_schema, week_partitioner("timestamp"),
+                                       file_callback=finished_files.append,
+                                       writer_options={"codec": "deflate"}) as partitioned_writer:
+                self.assertEqual(partitioned_writer.write_many(self.example_records), 6)
+
+            self.assertEqual(sorted((file.partition, file.part, file.records) for file in finished_files),
+                             [("2020W01", 0, 4), ("2020W02", 0, 2)])
+            for finished_file in finished_files:
+                self.assertEqual(os.path.getsize(finished_file.path), finished_file.bytes)
+            self.assertListEqual(self.read_file(os.path.join(directory, "2020W02", "part-00000.avro")),
+                                 [self.example_records[1], self.example_records[2]])
+
+    def test_roll_over(self):
+        finished_files = []
+        with tempfile.TemporaryDirectory() as directory:
+            partitioned_writer = PartitionedAvroWriter(directory, self.example_schema, lambda record: record["country"],
+                                                       max_records_per_file=2, file_name_template="{partition}-{part}.avro",
+                                                       file_callback=finished_files.append)
+            partitioned_writer.write_many(self.example_records)
+            partitioned_writer.close()
+
+            self.assertEqual(sorted((file.partition, file.part, file.records) for file in finished_files),
+                             [("es", 0, 2), ("es", 1, 1), ("it", 0, 1), ("pt", 0, 2)])
+            self.assertListEqual(self.read_file(os.path.join(directory, "es-1.avro")), [self.example_records[4]])
+
+    def test_max_open_writers(self):
+        finished_files = []
+        with tempfile.TemporaryDirectory() as directory:
+            partitioned_writer = PartitionedAvroWriter(directory, self.example_schema, lambda record: record["country"],
+                                                       max_open_writers=2, file_callback=finished_files.append)
+            for record in self.example_records:
+                partitioned_writer.write(record)
+                self.assertLessEqual(len(partitioned_writer._open_files), 2)
+            partitioned_writer.close()
+
+            # "pt" is the least recently used file when "it" is opened, and "it" when "pt" is opened again
+            self.assertEqual([(file.partition, file.part, file.records) for file in finished_files],
+                             [("pt", 0, 1), ("it", 0, 1), ("es", 0, 3), ("pt", 1, 1)])
+            written_records = [record for file in finished_files for record in self.read_file(file.path)]
+            self.assertEqual(len(written_records), len(self.example_records))
+
+    def test_invalid_max_open_writers(self):
+        with self.assertRaises(ValueError):
+            PartitionedAvroWriter(".", self.example_schema, lambda record: "", max_open_writers=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import random
+import tempfile
+import unittest
+
+from SwissKnife.avro.RecordDeduplicator import BloomFilter, DedupMode, RecordDeduplicator, create_key_digest
+
+
+class RecordDeduplicatorTest(unittest.TestCase):
+
+    def create_records(self, num_records: int, num_keys: int) -> list:
+        rng = random.Random(3)
+        return [{"id": f"listing-{rng.randrange(num_keys)}", "portal": rng.choice(["a", "b"]), "position": i}
+                for i in range(num_records)]
+
+    def get_expected_records(self, records: list, key_fields: tuple) -> list:
+        seen = set()
+        expected_records = []
+        for record in records:
+            key = tuple(record[field] for field in key_fields)
+            if key not in seen:
+                seen.add(key)
+                expected_records.append(record)
+        return expected_records
+
+    def test_key_digest(self):
+        key_digest = create_key_digest(["id", "portal"])
+
+        self.assertEqual(key_digest({"id": 1, "portal": "a", "x": 1}), key_digest({"portal": "a", "id": 1}))
+        self.assertNotEqual(key_digest({"id": 1, "portal": "a"}), key_digest({"id": 1, "portal": "b"}))
+        self.assertNotEqual(key_digest({"id": 1}), key_digest({"id": "1"}))
+        self.assertEqual(len(create_key_digest("id")({"id": 1})), 16)
+
+    def test_exact_in_memory(self):
+        records = self.create_records(2000, 500)
+        deduplicator = RecordDeduplicator("id")
+
+        unique_records = list(deduplicator.deduplicate(records))
+
+        self.assertListEqual(unique_records, self.get_expected_records(records, ("id",)))
+        self.assertEqual(deduplicator.metrics.records, 2000)
+        self.assertEqual(deduplicator.metrics.duplicates, 2000 - len(unique_records))
+        self.assertEqual(deduplicator.metrics.spilled_keys, 0)
+
+    def test_exact_with_spill(self):
+        records = self.create_records(5000, 3000)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with RecordDeduplicator(["id", "portal"], max_memory_keys=100, max_runs=4,
+                                    expected_records=5000, temp_dir=temp_dir) as deduplicator:
+                unique_records = list(deduplicator.deduplicate(records))
+
+                self.assertLessEqual(len(deduplicator._runs), 4)
+                self.assertGreater(deduplicator.metrics.spilled_keys, 3000)
+            self.assertListEqual(os.listdir(temp_dir), [])
+
+        self.assertListEqual(unique_records, self.get_expected_records(records, ("id", "portal")))
+        self.assertEqual(deduplicator.metrics.duplicates, 5000 - len(unique_records))
+        self.assertLess(deduplicator.metrics.disk_lookups, deduplicator.metrics.duplicates + 100)
+
+    def test_approximate(self):
+        records = self.create_records(20000, 10000)
+        deduplicator = RecordDeduplicator("id", DedupMode.APPROXIMATE, expected_records=10000,
+                                          false_positive_rate=0.01)
+
+        unique_records = list(deduplicator.deduplicate(records))
+
+        expected_records = self.get_expected_records(records, ("id",))
+        # The false positives remove some unique records, but never keep a duplicate
+        self.assertLessEqual(len(unique_records), len(expected_records))
+        self.assertGreater(len(unique_records), len(expected_records) * 0.98)
+        self.assertEqual(len({record["id"] for record in unique_records}), len(unique_records))
+        self.assertLess(deduplicator.bloom_filter.false_positive_rate, 0.02)
+
+    def test_bloom_filter(self):
+        bloom_filter = BloomFilter(1000, 0.01)
+        key_digest = create_key_digest("id")
+
+        self.assertFalse(bloom_filter.add(key_digest({"id": 1})))
+        self.assertTrue(bloom_filter.add(key_digest({"id": 1})))
+        self.assertIn(key_digest({"id": 1}), bloom_filter)
+        self.assertEqual(bloom_filter.num_hashes, 7)
+        self.assertRaises(ValueError, BloomFilter, 1000, 1.5)
@@ -0,0 +1,111 @@
+import io
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.AvroTransformer import AvroTransformer
+from SwissKnife.avro.AvroWriter import AvroWriter
+from SwissKnife.avro.SchemaCache import SchemaCache
+from SwissKnife.avro.TransformRegistry import DEFAULT_TRANSFORM_REGISTRY
+
+
+class SchemaCacheTest(unittest.TestCase):
+
+    example_avro_schema = {
+        "type": "record",
+        "name": "example_record",
+        "fields": [
+            {"name": "code", "aliases": ["id"], "type": ["null", "string"], "default": None},
+            {"name": "price", "type": ["null", "double"], "transform": "scale(2)", "default": None}
+        ]
+    }
+
+    def test_lru_eviction(self):
+        schema_cache = SchemaCache(max_size=2)
+
+        self.assertEqual(schema_cache.get_or_create(("a",), lambda: 1), 1)
+        self.assertEqual(schema_cache.get_or_create(("b",), lambda: 2), 2)
+        self.assertEqual(schema_cache.get_or_create(("a",), lambda: 3), 1)
+        # "b" is the least recently used entry
+        self.assertEqual(schema_cache.get_or_create(("c",), lambda: 4), 4)
+        self.assertEqual(schema_cache.get_or_create(("b",), lambda: 5), 5)
+
+        self.assertDictEqual(schema_cache.stats(), {"hits": 1, "misses": 4, "evictions": 2, "size": 2})
+        schema_cache.clear()
+        self.assertDictEqual(schema_cache.stats(), {"hits": 0, "misses": 0, "evictions": 0, "size": 0})
+
+    def test_invalid_max_size(self):
+        with self.assertRaises(ValueError):
+            SchemaCache(max_size=0)
+
+    def test_schema_key(self):
+        other_schema = dict(self.example_avro_schema, fields=[
+            {"name": "code", "type": ["null", "string"]},
+            {"name": "price", "type": ["null", "double"]}
+        ])
+        schema_cache = SchemaCache()
+        fingerprint, serialized_schema = schema_cache.get_schema_key(self.example_avro_schema)
+        other_fingerprint, other_serialized_schema = schema_cache.get_schema_key(other_schema)
+
+        # The same canonical form, but different attributes
+        self.assertEqual(fingerprint, other_fingerprint)
+        self.assertNotEqual(serialized_schema, other_serialized_schema)
+
+    def test_writer_uses_cache(self):
+        schema_cache = SchemaCache()
+        for _ in range(3):
+            output = io.BytesIO()
+            avro_writer = AvroWriter(output, self.example_avro_schema, schema_cache)
+            avro_writer.write({"code": "A1", "price": 1.0})
+            avro_writer.close()
+            output.seek(0)
+            self.assertListEqual(list(fastavro.reader(output)), [{"code": "A1", "price": 1.0}])
+
+        self.assertDictEqual(schema_cache.stats(), {"hits": 2, "misses": 1, "evictions": 0, "size": 1})
+
+    def test_transformer_uses_cache(self):
+        schema_cache = SchemaCache()
+        first_transformer = AvroTransformer(self.example_avro_schema, schema_cache=schema_cache)
+        second_transformer = AvroTransformer(self.example_avro_schema, compiled=True, schema_cache=schema_cache)
+
+        self.assertIs(first_transformer.compiled_function, second_transformer.compiled_function)
+        self.assertIsNot(first_transformer.counters, second_transformer.counters)
+        self.assertDictEqual(second_transformer.apply_all_transforms({"id": "A1", "price": "2"}),
+                             {"code": "A1", "price": 4.0})
+        self.assertDictEqual(schema_cache.stats(), {"hits": 1, "misses": 1, "evictions": 0, "size": 1})
+
+    def test_schema_modified_after_use(self):
+        schema_cache = SchemaCache()
+        schema = {"type": "record", "name": "example_record",
+                  "fields": [{"name": "a", "type": ["null", "long"], "default": None}]}
+        AvroTransformer(schema, schema_cache=schema_cache)
+        AvroWriter(io.BytesIO(), schema, schema_cache).close()
+
+        schema["fields"].append({"name": "b", "type": ["null", "long"], "default": None})
+        transformer = AvroTransformer(schema, schema_cache=schema_cache)
+        output = io.BytesIO()
+        avro_writer = AvroWriter(output, schema, schema_cache)
+        avro_writer.write(transformer.apply_all_transforms({"a": "1", "b": "2"}))
+        avro_writer.close()
+        output.seek(0)
+
+        self.assertListEqual(list(fastavro.reader(output)), [{"a": 1, "b": 2}])
+        self.assertEqual(schema_cache.stats()["hits"], 0)
+
+    def test_transformer_cache_depends_on_registry(self):
+        schema_cache = SchemaCache()
+        transform_registry = DEFAULT_TRANSFORM_REGISTRY.copy()
+        schema = {"type": "record", "name": "example_record",
+                  "fields": [{"name": "code", "type": "string", "transform": "lower"}]}
+
+        AvroTransformer(schema, schema_cache=schema_cache)
+        AvroTransformer(schema, transform_registry=transform_registry, schema_cache=schema_cache)
+        transform_registry.register("lower", lambda: lambda value, record: value.upper())
+        transformer = AvroTransformer(schema, transform_registry=transform_registry, schema_cache=schema_cache)
+
+        self.assertEqual(schema_cache.stats()["misses"], 3)
+        self.assertDictEqual(transformer.apply_all_transforms({"code": "a"}), {"code": "A"})
+
+
+if __name__ == '__main__':
+    unittest.main()
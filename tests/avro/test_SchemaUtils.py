@@ -0,0 +1,78 @@
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.SchemaUtils import get_fingerprint, get_full_name, project_schema, to_canonical_form
+
+
+class SchemaUtilsTest(unittest.TestCase):
+
+    example_avro_schema = {
+        "type": "record",
+        "name": "example_record",
+        "namespace": "com.example",
+        "fields": [
+            {"name": "code", "type": "string"},
+            {"name": "address", "type": {"type": "record", "name": "address_record",
+                                         "fields": [{"name": "street", "type": "string"}]}},
+            {"name": "previous_addresses", "type": {"type": "array", "items": "com.example.address_record"}},
+            {"name": "status", "type": {"type": "enum", "name": "status_enum", "symbols": ["OK", "KO"]}}
+        ]
+    }
+
+    def test_get_full_name(self):
+        self.assertEqual(get_full_name(self.example_avro_schema), "com.example.example_record")
+        self.assertEqual(get_full_name({"name": "address_record"}, "com.example"), "com.example.address_record")
+        self.assertEqual(get_full_name({"name": "other.address_record"}, "com.example"), "other.address_record")
+
+    def test_to_canonical_form(self):
+        schema = {
+            "type": "record",
+            "name": "example_record",
+            "namespace": "com.example",
+            "doc": "An example",
+            "fields": [
+                {"name": "code", "aliases": ["id"], "type": {"type": "string"}, "default": "A1"},
+                {"name": "created", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+                {"name": "address", "type": ["null", {"type": "record", "name": "address_record",
+                                                      "fields": [{"name": "street", "type": "string"}]}]},
+                {"name": "previous_address", "type": "address_record"}
+            ]
+        }
+        self.assertEqual(
+            to_canonical_form(schema),
+            '{"name":"com.example.example_record","type":"record","fields":['
+            '{"name":"code","type":"string"},'
+            '{"name":"created","type":"long"},'
+            '{"name":"address","type":["null",{"name":"com.example.address_record","type":"record",'
+            '"fields":[{"name":"street","type":"string"}]}]},'
+            '{"name":"previous_address","type":"com.example.address_record"}]}')
+
+    def test_get_fingerprint(self):
+        self.assertEqual(get_fingerprint("int"), "8f5c393f1ad57572")
+        self.assertEqual(get_fingerprint({"type": "int", "doc": "A number"}), "8f5c393f1ad57572")
+        self.assertNotEqual(get_fingerprint("long"), get_fingerprint("int"))
+
+    def test_project_schema(self):
+        projected_schema = project_schema(self.example_avro_schema, ["status", "code"])
+
+        self.assertEqual([field["name"] for field in projected_schema["fields"]], ["status", "code"])
+        self.assertEqual(projected_schema["name"], "example_record")
+        fastavro.parse_schema(projected_schema)
+
+    def test_project_schema_inlines_named_types(self):
+        projected_schema = project_schema(self.example_avro_schema, ["previous_addresses"])
+
+        items = projected_schema["fields"][0]["type"]["items"]
+        self.assertEqual(items["name"], "address_record")
+        fastavro.parse_schema(projected_schema)
+        # The original schema is not modified
+        self.assertEqual(self.example_avro_schema["fields"][2]["type"]["items"], "com.example.address_record")
+
+    def test_project_schema_invalid_field(self):
+        with self.assertRaises(ValueError):
+            project_schema(self.example_avro_schema, ["code", "unknown"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,98 @@
+import io
+import os
+import random
+import tempfile
+import unittest
+
+import fastavro
+
+from SwissKnife.avro.AvroWriter import AvroMatchingException
+from SwissKnife.avro.SortedAvroWriter import SortedAvroWriter, create_sort_key
+
+
+class SortedAvroWriterTest(unittest.TestCase):
+
+    example_schema = {
+        "type": "record",
+        "name": "listing",
+        "fields": [
+            {"name": "id", "type": "string"},
+            {"name": "timestamp", "type": {"type": "long", "logicalType": "timestamp-millis"}},
+            {"name": "price", "type": ["null", "int"], "default": None},
+            {"name": "position", "type": "int"}
+        ]
+    }
+
+    def create_records(self, num_records: int) -> list:
+        rng = random.Random(7)
+        return [{"id": f"id-{rng.randrange(50):02d}", "timestamp": rng.randrange(1000),
+                 "price": rng.choice([None, rng.randrange(100)]), "position": position}
+                for position in range(num_records)]
+
+    def read(self, output_stream: io.BytesIO) -> list:
+        output_stream.seek(0)
+        return [dict(record, timestamp=int(record["timestamp"].timestamp() * 1000))
+                for record in fastavro.reader(output_stream)]
+
+    def test_sort_key(self):
+        sort_key = create_sort_key(["id", "price"])
+
+        self.assertLess(sort_key({"id": "a", "price": None}), sort_key({"id": "a", "price": 0}))
+        self.assertLess(sort_key({"id": "a", "price": 5}), sort_key({"id": "b", "price": 0}))
+        self.assertLess(create_sort_key("price")({}), create_sort_key("price")({"price": -1}))
+
+    def test_sort_in_memory(self):
+        records = self.create_records(100)
+        output_stream = io.BytesIO()
+        sorted_writer = SortedAvroWriter(output_stream, self.example_schema, "price")
+
+        self.assertEqual(sorted_writer.write_many(records), 100)
+        sorted_writer.close()
+
+        expected_records = sorted(records, key=lambda record: (record["price"] is not None, record["price"]))
+        self.assertListEqual(self.read(output_stream), expected_records)
+        self.assertEqual(sorted_writer.metrics.runs, 0)
+        self.assertEqual(sorted_writer.metrics.merge_passes, 0)
+
+    def test_external_sort(self):
+        records = self.create_records(1000)
+        expected_records = sorted(records, key=lambda record: (record["id"], record["timestamp"]))
+        for merge_fan_in, expected_passes in ((2, 4), (4, 2), (16, 1)):
+            with self.subTest(merge_fan_in=merge_fan_in):
+                output_stream = io.BytesIO()
+                with SortedAvroWriter(output_stream, self.example_schema, ["id", "timestamp"],
+                                      max_run_records=90, merge_fan_in=merge_fan_in,
+                                      writer_options={"codec": "deflate"}) as sorted_writer:
+                    sorted_writer.write_many(records)
+
+                # The sort is stable, so the positions of the records with the same key are in order
+                self.assertListEqual(self.read(output_stream), expected_records)
+                self.assertEqual(sorted_writer.metrics.records, 1000)
+                self.assertEqual(sorted_writer.metrics.merge_passes, expected_passes)
+                self.assertGreater(sorted_writer.metrics.runs, 11)
+
+    def test_max_run_bytes(self):
+        records = self.create_records(500)
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output_stream = io.BytesIO()
+            sorted_writer = SortedAvroWriter(output_stream, self.example_schema, "timestamp",
+                                             max_run_bytes=20000, temp_dir=temp_dir)
+            sorted_writer.write_many(records)
+            self.assertGreater(sorted_writer.metrics.runs, 3)
+            sorted_writer.close()
+
+            self.assertListEqual(os.listdir(temp_dir), [])
+        self.assertListEqual(self.read(output_stream), sorted(records, key=lambda record: record["timestamp"]))
+
+    def test_invalid_record(self):
+        sorted_writer = SortedAvroWriter(io.BytesIO(), self.example_schema, "id", max_run_records=2)
+        sorted_writer.write({"id": "a", "timestamp": 1, "position": 1})
+
+        self.assertRaises(AvroMatchingException, sorted_writer.write, {"id": "b", "timestamp": 2})
+
+    def test_closed_writer(self):
+        sorted_writer = SortedAvroWriter(io.BytesIO(), self.example_schema, "id")
+        sorted_writer.close()
+
+        self.assertRaises(ValueError, sorted_writer.write, {"id": "a", "timestamp": 1, "position": 1})
+        self.assertRaises(ValueError, SortedAvroWriter, io.BytesIO(), self.example_schema, "id", merge_fan_in=1)
@@ -0,0 +1,82 @@
+import unittest
+
+from SwissKnife.avro.AvroTransformer import AvroTransformer, AvroTransformException
+
+
+class TransformProfilerTest(unittest.TestCase):
+
+    example_avro_schema = {
+        "type": "record",
+        "name": "example_record",
+        "fields": [
+            {"name": "code", "aliases": ["id"], "type": ["null", "string"], "default": None},
+            {"name": "price", "type": ["null", "double", "string"], "default": None},
+            {"name": "isReady", "type": ["boolean"], "transform": "int2boolean", "default": False},
+            {"name": "url", "type": "string"}
+        ]
+    }
+
+    example_records = [
+        {"id": "A1", "price": "100,5", "isReady": 1, "url": "a"},
+        {"code": "A2", "price": None, "url": "b"},
+        {"id": "A3", "price": "", "isReady": 0, "url": "c", "unknown": "x"}
+    ]
+
+    def test_profile_disabled(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema)
+
+        self.assertIsNone(avro_transformer.profiler)
+        self.assertIs(avro_transformer.transform_function, avro_transformer.compiled_function)
+        with self.assertRaises(RuntimeError):
+            avro_transformer.get_profile()
+
+    def test_profile(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema, profile=True)
+        expected_records = [AvroTransformer(self.example_avro_schema).apply_all_transforms(record)
+                            for record in self.example_records]
+
+        records = [avro_transformer.apply_all_transforms(record) for record in self.example_records]
+        profile = avro_transformer.get_profile()
+
+        self.assertListEqual(records, expected_records)
+        self.assertEqual(profile["records"], 3)
+        code_profile = profile["fields"]["code"]
+        self.assertEqual(code_profile["rename"]["calls"], 3)
+        self.assertEqual(code_profile["cast"]["calls"], 3)
+        self.assertEqual(code_profile["transform"]["calls"], 0)
+        self.assertGreaterEqual(code_profile["cast"]["time"], 0)
+        self.assertDictEqual(code_profile["branches"], {"string": 3})
+        # An empty string is casted to None
+        self.assertDictEqual(profile["fields"]["price"]["branches"], {"double": 1, "null": 2})
+        self.assertEqual(profile["fields"]["isReady"]["transform"]["calls"], 2)
+        self.assertEqual(profile["fields"]["isReady"]["default"]["calls"], 1)
+        self.assertDictEqual(profile["fields"]["isReady"]["branches"], {"boolean": 3})
+
+        avro_transformer.profiler.reset()
+        self.assertEqual(avro_transformer.get_profile()["records"], 0)
+        self.assertDictEqual(avro_transformer.get_profile()["fields"]["price"]["branches"], {})
+
+    def test_profile_reporter(self):
+        reports = []
+        avro_transformer = AvroTransformer(self.example_avro_schema, profile=True,
+                                           profile_reporter=reports.append, profile_report_every=2)
+
+        avro_transformer.transform_batch(self.example_records * 2)
+
+        self.assertEqual([report["records"] for report in reports], [2, 4, 6])
+        self.assertEqual(avro_transformer.counters.transformed, 6)
+
+    def test_profile_errors(self):
+        avro_transformer = AvroTransformer(self.example_avro_schema, profile=True)
+
+        with self.assertRaises(AvroTransformException) as context:
+            list(avro_transformer.transform_iter([{"code": "A1"}]))
+        self.assertEqual(context.exception.field, "url")
+        self.assertEqual(context.exception.step, "default")
+        # apply_all_transforms raises the same exception as the default mode
+        with self.assertRaises(ValueError):
+            avro_transformer.apply_all_transforms({"code": "A1", "isReady": "x", "url": "a"})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+
+from SwissKnife.avro.AvroTransformer import AvroTransformer
+from SwissKnife.avro.TransformRegistry import DEFAULT_TRANSFORM_REGISTRY, TransformRegistry
+
+
+class TransformRegistryTest(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertListEqual(TransformRegistry._parse("int2boolean"), [("int2boolean", [])])
+        self.assertListEqual(TransformRegistry._parse(" copyFrom(date) | regexExtract('(\\d+) m2', 1)|lower() "), [
+            ("copyFrom", ["date"]),
+            ("regexExtract", ["(\\d+) m2", 1]),
+            ("lower", [])
+        ])
+        self.assertListEqual(TransformRegistry._parse("clamp(-1.5, null)"), [("clamp", [-1.5, None])])
+
+    def test_invalid_expressions(self):
+        for transform_name in ["", "lower |", "clamp(1,", "scale(2))", "copyFrom(date) lower", "unknown", "scale('a')"]:
+            with self.assertRaises(RuntimeError):
+                DEFAULT_TRANSFORM_REGISTRY.compile(transform_name)
+
+    def test_builtin_transforms(self):
+        examples = [
+            ("scale(100)", "1,5", 150.0),
+            ("scale('2')", 3, 6),
+            ("scale('0.5')", "3", 1.5),
+            ("clamp(0, 10)", 12, 10),
+            ("clamp(0, 10)", "-3", 0),
+            ("defaultIfEmpty('unknown')", "", "unknown"),
+            ("defaultIfEmpty(0)", None, 0),
+            ("strip | lower", "  Madrid ", "madrid"),
+            ("upper", None, None),
+            ("regexExtract('(\\d+) m2')", "piso de 85 m2", "85"),
+            ("regexExtract('\\d+')", "sin metros", None),
+            ("epochToWeek", 1514678400000, "2017W52"),
+            ("copyFrom(date) | epochToWeek", None, "2020W01")
+        ]
+        for transform_name, value, expected_value in examples:
+            transform_function = DEFAULT_TRANSFORM_REGISTRY.compile(transform_name)
+            self.assertEqual(transform_function(value, {"date": 1577709695547}), expected_value)
+
+    def test_copy_version(self):
+        transform_registry = TransformRegistry()
+        transform_registry.register("lower", lambda: lambda value, record: value.lower())
+        registry_copy = transform_registry.copy()
+        self.assertNotEqual(registry_copy.version, transform_registry.version)
+        registry_copy.register("upper", lambda: lambda value, record: value.upper())
+        self.assertNotEqual(registry_copy.version, transform_registry.version)
+        self.assertListEqual(transform_registry.get_names(), ["lower"])
+
+    def test_custom_registry(self):
+        transform_registry = DEFAULT_TRANSFORM_REGISTRY.copy()
+
+        @transform_registry.register("add")
+        def add_factory(number):
+            return lambda value, record: value + number
+
+        avro_schema = {
+            "type": "record",
+            "name": "example_record",
+            "fields": [
+                {"name": "rooms", "type": ["int"], "transform": "add(2) | clamp(null, 5)"},
+                {"name": "city", "type": ["string"], "transform": "strip | upper"}
+            ]
+        }
+        avro_transformer = AvroTransformer(avro_schema, transform_registry=transform_registry)
+        self.assertDictEqual(avro_transformer.apply_all_transforms({"rooms": 2, "city": " madrid"}),
+                             {"rooms": 4, "city": "MADRID"})
+        self.assertDictEqual(avro_transformer.apply_all_transforms({"rooms": 7, "city": "bilbao"}),
+                             {"rooms": 5, "city": "BILBAO"})
+        self.assertNotIn("add", DEFAULT_TRANSFORM_REGISTRY.get_names())
+        with self.assertRaises(RuntimeError):
+            AvroTransformer(avro_schema)
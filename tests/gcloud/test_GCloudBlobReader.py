@@ -0,0 +1,32 @@
+import io
+import unittest
+from unittest.mock import MagicMock
+
+from SwissKnife.gcloud.GCloudBlobReader import GCloudBlobReader
+
+
+class TestGCloudBlobReader(unittest.TestCase):
+
+    def create_blob(self, data: bytes) -> MagicMock:
+        blob = MagicMock()
+        blob.size = len(data)
+        blob.download_as_bytes.side_effect = lambda start, end: data[start:end + 1]
+        return blob
+
+    def test_read_by_ranges(self):
+        data = bytes(range(100))
+        blob = self.create_blob(data)
+        stream = io.BufferedReader(GCloudBlobReader(blob), buffer_size=16)
+
+        self.assertEqual(stream.read(10), data[:10])
+        self.assertEqual(stream.read(), data[10:])
+        self.assertEqual(stream.read(), b"")
+        blob.download_as_bytes.assert_any_call(start=0, end=15)
+
+    def test_seek(self):
+        data = b"0123456789"
+        reader = GCloudBlobReader(self.create_blob(data))
+        reader.seek(-3, io.SEEK_END)
+        self.assertEqual(reader.read(5), b"789")
+        reader.seek(2)
+        self.assertEqual(reader.read(2), b"23")